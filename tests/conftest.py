@@ -0,0 +1,7 @@
+
+import sys
+from pathlib import Path
+
+example_path = str(Path(__file__).parent.parent / 'vengeance_example')
+if example_path not in set(sys.path):
+    sys.path.insert(0, example_path)
@@ -0,0 +1,135 @@
+
+import pytest
+
+from flux_commands import checkpoint_store_cls
+from flux_commands import stable_repr
+from flux_extended import flux_extended_cls
+
+
+class flux_pipeline_cls(flux_extended_cls):
+
+    def __init__(self, matrix=None):
+        super().__init__(matrix)
+        self.commands = ['_add_total',
+                         ('_keep_rows_above', (2,)),
+                         '_drop_col_b']
+
+    def _add_total(self):
+        self.assign('total', lambda row: row.col_a + row.col_b)
+
+    def _keep_rows_above(self, minimum):
+        self.where('total > minimum', minimum=minimum)
+
+    def _drop_col_b(self):
+        self.delete_columns('col_b')
+
+
+def example_pipeline():
+    return flux_pipeline_cls([['col_a', 'col_b'],
+                              [1,       1],
+                              [2,       2],
+                              [3,       3]])
+
+
+def test_profile_commands():
+    flux    = example_pipeline()
+    profile = flux.profile_commands(flux.commands)
+
+    assert [c.name for c in profile.commands] == ['_add_total', '_keep_rows_above', '_drop_col_b']
+    assert [(c.rows_in, c.rows_out) for c in profile.commands] == [(3, 3), (3, 2), (2, 2)]
+    assert profile.commands[0].columns_added == ['total']
+    assert profile.commands[2].columns_removed == ['col_b']
+    assert profile.commands[1].args == (2,)
+    assert profile.wall_seconds >= 0.0
+
+    assert flux.header_names() == ['col_a', 'total']
+    assert profile.to_flux().num_rows == 3
+
+    folded = profile.to_folded().splitlines()
+    assert folded[0].startswith('execute_commands;flux_pipeline_cls._add_total ')
+
+
+def test_execute_commands_profiler_returns_profile():
+    flux    = example_pipeline()
+    profile = flux.execute_commands(flux.commands, profiler='profile')
+
+    assert len(profile.commands) == 3
+    assert [row.total for row in flux] == [4, 6]
+
+
+executed = []
+
+
+class flux_checkpointed_cls(flux_pipeline_cls):
+
+    def _add_total(self):
+        executed.append('_add_total')
+        super()._add_total()
+
+    def _keep_rows_above(self, minimum):
+        executed.append('_keep_rows_above')
+        super()._keep_rows_above(minimum)
+
+    def _drop_col_b(self):
+        executed.append('_drop_col_b')
+        super()._drop_col_b()
+
+    def _fail(self):
+        raise RuntimeError('command failed')
+
+
+def example_checkpointed():
+    return flux_checkpointed_cls([['col_a', 'col_b'],
+                                  [1,       1],
+                                  [2,       2],
+                                  [3,       3]])
+
+
+def test_checkpoint_resumes_after_failure(tmp_path):
+    directory = str(tmp_path / 'checkpoints')
+    del executed[:]
+
+    flux = example_checkpointed()
+    with pytest.raises(RuntimeError):
+        flux.execute_commands(flux.commands[:2] + ['_fail'], checkpoint=directory)
+
+    assert executed == ['_add_total', '_keep_rows_above']
+    del executed[:]
+
+    flux = example_checkpointed()
+    flux.execute_commands(flux.commands, checkpoint=directory)
+
+    assert executed == ['_drop_col_b']
+    assert flux.header_names() == ['col_a', 'total']
+    assert [row.values for row in flux] == [[2, 4], [3, 6]]
+
+
+def test_checkpoint_keys_change_with_input_and_arguments(tmp_path):
+    store = checkpoint_store_cls(str(tmp_path))
+
+    flux = example_checkpointed()
+    keys = store.command_keys(flux, flux._parse_commands(flux.commands))
+
+    assert keys == store.command_keys(flux, flux._parse_commands(flux.commands))
+    assert keys[0] != store.command_keys(flux, flux._parse_commands([('_keep_rows_above', (3,))]))[0]
+
+    flux.matrix[1].values[0] = 100
+    assert keys[0] != store.command_keys(flux, flux._parse_commands(flux.commands))[0]
+
+
+def test_checkpoint_keys_of_lambda_arguments_are_stable():
+    def criteria():
+        return lambda row: row.col_a > 1
+
+    f_1 = criteria()
+    f_2 = criteria()
+    assert f_1 is not f_2
+    assert stable_repr((f_1, [1, {'a': f_1}])) == stable_repr((f_2, [1, {'a': f_2}]))
+    assert stable_repr(f_1) != stable_repr(lambda row: row.col_a > 2)
+
+
+def test_checkpoint_cannot_be_combined_with_profiler(tmp_path):
+    flux = example_checkpointed()
+
+    with pytest.raises(ValueError):
+        flux.execute_commands(flux.commands, profiler=True, checkpoint=str(tmp_path))
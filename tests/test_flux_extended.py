@@ -0,0 +1,531 @@
+
+import pytest
+
+from vengeance import flux_cls
+from vengeance.util.iter import ColumnNameError
+
+from flux_extended import flux_extended_cls
+
+
+def example_flux():
+    return flux_extended_cls([['col_a', 'col_b', 'col_c'],
+                              ['a',     1,       1.0],
+                              ['b',     2,       2.0],
+                              ['a',     3,       3.0]])
+
+
+def test_restructure_columns():
+    flux = example_flux()
+    with flux.restructure():
+        flux.insert_columns((0, 'inserted_a'))
+        flux.append_columns('appended_a', values=0.0)
+        flux.delete_columns('col_b')
+        flux.rename_columns({'col_a': 'renamed_a'})
+
+    assert flux.header_names() == ['inserted_a', 'renamed_a', 'col_c', 'appended_a']
+    assert flux.matrix[1].values == [None, 'a', 1.0, 0.0]
+    assert not flux.is_jagged()
+
+
+def jagged_matrix():
+    return [['col_a', 'col_b', 'col_c'],
+            ['a',     1,       1.0,     'extra'],
+            ['b',     2,       2.0],
+            ['a',     3,       3.0,     'extra', 'extra']]
+
+
+def test_column_methods_on_jagged_rows_match_flux_cls():
+    flux_base = flux_cls(jagged_matrix())
+    flux_base.append_columns('appended_a', values=0.0)
+    flux_base.insert_columns((0, 'inserted_a'))
+    flux_base.delete_columns('col_b')
+
+    flux = flux_extended_cls(jagged_matrix())
+    with flux.restructure():
+        flux.append_columns('appended_a', values=0.0)
+        flux.insert_columns((0, 'inserted_a'))
+        flux.delete_columns('col_b')
+
+    assert flux.header_names() == flux_base.header_names()
+    assert [row.values for row in flux.matrix] == [row.values for row in flux_base.matrix]
+    assert flux.matrix[1].values == [None, 'a', 1.0, 'extra', 0.0]
+
+
+def test_delete_columns_on_short_rows_raises_like_flux_cls():
+    m = [['col_a', 'col_b', 'col_c'],
+         ['a',     1],
+         ['b',     2,       2.0]]
+
+    with pytest.raises(IndexError):
+        flux_cls([list(row) for row in m]).delete_columns('col_c')
+    with pytest.raises(IndexError):
+        flux_extended_cls([list(row) for row in m]).delete_columns('col_c')
+
+
+def test_column_name_validation():
+    flux = example_flux()
+
+    with pytest.raises(ColumnNameError):
+        flux.append_columns('col_a')
+    with pytest.raises(ColumnNameError):
+        flux.append_columns('col_x', 'col_x')
+    with pytest.raises(ColumnNameError):
+        flux.delete_columns('col_x')
+    with pytest.raises(ColumnNameError):
+        flux.reassign_columns('col_a', 'col_x')
+
+    flux.delete_columns(-1)
+    assert flux.header_names() == ['col_a', 'col_b']
+
+
+def test_eval_and_where():
+    flux = example_flux()
+
+    assert list(flux.eval('col_b * rate', rate=2)) == [2, 4, 6]
+
+    flux.where('col_a in criteria', criteria={'a'})
+    assert [row.col_b for row in flux] == [1, 3]
+
+
+def test_eval_and_where_variables_conflicting_with_columns():
+    flux = example_flux()
+
+    with pytest.raises(ColumnNameError):
+        flux.eval('col_b * 2', col_b=5)
+    with pytest.raises(ColumnNameError):
+        flux.where('col_a in col_c', col_c={'a'})
+
+    assert flux.num_rows == 3
+
+
+def test_group_index_matches_map_rows_nested():
+    flux = example_flux()
+    d    = flux.group_index('col_a', 'col_b')
+
+    assert list(d.keys()) == list(flux.map_rows_nested('col_a', 'col_b').keys())
+    assert [row.col_b for row in d['a'][3]] == [3]
+    assert len(d['a']) == 2
+
+
+def nested_keys(d):
+    """ keys of every level, in iteration order """
+    if isinstance(d, list):
+        return [row.values for row in d]
+
+    return [(k, nested_keys(v)) for k, v in d.items()]
+
+
+def test_group_index_orders_keys_within_each_group():
+    flux = flux_extended_cls([['col_a', 'col_b'],
+                              ['y',     'p'],
+                              ['x',     'q'],
+                              ['x',     'p']])
+
+    d = flux.group_index('col_a', 'col_b')
+
+    assert list(d['x'].keys()) == ['q', 'p']
+    assert list(d['x']) == ['q', 'p']
+    assert [k for k, _ in d['x'].items()] == ['q', 'p']
+    assert nested_keys(d.to_dict()) == nested_keys(flux.map_rows_nested('col_a', 'col_b'))
+
+    assert d['x']['p'][0].values == ['x', 'p']
+    assert 'q' in d['x']
+    assert 'q' not in d['y']
+    assert d['y'].get('q') is None
+
+
+def test_group_index_matches_map_rows_nested_at_every_level():
+    import random
+
+    rng  = random.Random(0)
+    m    = [['col_a', 'col_b', 'col_c', 'col_d']]
+    m.extend([rng.choice('abcd'), rng.choice('pqrs'), rng.randrange(5), i] for i in range(500))
+    flux = flux_extended_cls(m)
+
+    d        = flux.group_index('col_a', 'col_b', 'col_c')
+    expected = flux.map_rows_nested('col_a', 'col_b', 'col_c')
+
+    assert nested_keys(d.to_dict()) == nested_keys(expected)
+
+    for k_a, d_b in expected.items():
+        for k_b, d_c in d_b.items():
+            assert list(d[k_a][k_b].keys()) == list(d_c.keys())
+
+            for k_c, rows in d_c.items():
+                assert d[k_a][k_b][k_c] == rows
+
+
+def test_concat():
+    flux_a = example_flux()
+    flux_b = example_flux()
+
+    flux = flux_extended_cls.concat([flux_a, flux_b, [['c', 4, 4.0]]])
+
+    assert flux.num_rows == 7
+    assert flux.matrix[-1].values == ['c', 4, 4.0]
+    assert flux.matrix[-1].col_a == 'c'
+
+
+def test_concat_keeps_data_rows_equal_to_column_names():
+    flux = flux_extended_cls.concat([example_flux(), [['col_a', 'col_b', 'col_c']]])
+
+    assert flux.num_rows == 4
+    assert flux.matrix[-1].values == ['col_a', 'col_b', 'col_c']
+
+
+def test_concat_copies_rows_unless_adopted():
+    flux_a = example_flux()
+    values = [['c', 4, 4.0]]
+
+    flux = flux_extended_cls.concat([flux_a, values])
+    flux.matrix[1].values[0] = 'changed'
+    flux.matrix[-1].values[0] = 'changed'
+
+    assert flux_a.matrix[1].values == ['a', 1, 1.0]
+    assert flux_a.matrix[1].headers is flux_a.headers
+    assert values == [['c', 4, 4.0]]
+
+    flux = flux_extended_cls.concat([flux_a], adopt=True)
+    assert flux.matrix[1] is flux_a.matrix[1]
+
+
+def test_row_blocks_header_rows():
+    from flux_rows import row_blocks_cls
+
+    rows = row_blocks_cls()
+    rows.append([['col_a', 'col_b'], [1, 2]])
+    rows.append([['col_a', 'col_b'], [3, 4]], header=True)
+    rows.append([['col_a', 'col_b']])
+
+    assert [row.values for row in rows] == [[1, 2], [3, 4], ['col_a', 'col_b']]
+
+    with pytest.raises(ColumnNameError):
+        rows.append([['col_x', 'col_y'], [5, 6]], header=True)
+    with pytest.raises(ColumnNameError):
+        row_blocks_cls().append([[1, 2]], header=False)
+
+
+@pytest.mark.parametrize('i', [slice(None), slice(1, 6), slice(None, None, 2),
+                               slice(None, None, -1), slice(6, 1, -2), slice(-2, None, -3),
+                               slice(100, -100, -1), slice(3, 3), -1, 0, 4])
+def test_row_blocks_indexing_matches_list(i):
+    from flux_rows import row_blocks_cls
+
+    m    = [[v, v * 2] for v in range(8)]
+    rows = row_blocks_cls(['col_a', 'col_b'])
+    for block in (m[:3], m[3:4], m[4:]):
+        rows.append(block)
+
+    if isinstance(i, slice):
+        assert [row.values for row in rows[i]] == m[i]
+    else:
+        assert rows[i].values == m[i]
+
+
+def test_parallel_aggregate_matches_in_process():
+    from flux_parallel import parallel_aggregate_scaling
+
+    flux = flux_extended_cls([['key', 'amount']] + [['k{}'.format(i % 7), float(i)] for i in range(1_000)])
+
+    aggregates = {'n':     ('amount', 'count'),
+                  'total': ('amount', 'sum'),
+                  'mean':  ('amount', 'mean'),
+                  'low':   ('amount', 'min'),
+                  'high':  ('amount', 'max')}
+    expected   = flux.parallel_aggregate('key', aggregates=aggregates, workers=1)
+    actual     = flux.parallel_aggregate('key', aggregates=aggregates, workers=2, min_worker_nrows=1)
+
+    assert [row.values for row in actual.matrix] == [row.values for row in expected.matrix]
+    assert expected.matrix[1].values == ['k0', 143, sum(range(0, 1_000, 7)), sum(range(0, 1_000, 7)) / 143, 0, 994]
+    assert expected.matrix[7].values[-2:] == [6, 993]
+
+    unique = flux.parallel_aggregate('key', workers=2, min_worker_nrows=1)
+    assert [row.key for row in unique] == ['k{}'.format(i) for i in range(7)]
+
+    timings = parallel_aggregate_scaling(flux_extended_cls, num_rows=1_000, workers=(1, 2))
+    assert set(timings) == {'serial', 1, 2}
+
+
+def test_category_codes_are_kept_by_categorize():
+    from flux_columns import categories_cls
+
+    flux_a = example_flux()
+    flux_b = flux_extended_cls([['col_a'], ['c'], ['b'], ['a']])
+
+    flux_a.categorize('col_a')
+    flux_a.sort('col_b', reverse=True)
+
+    codes, categories = flux_a.category_codes('col_a')
+    assert list(codes) == [0, 1, 0]
+    assert categories == ['a', 'b']
+
+    flux_a.append_rows([['c', 4, 4.0]])
+    assert list(flux_a.category_codes('col_a')[0]) == [0, 1, 0, 2]
+
+    categories = categories_cls()
+    flux_a.categorize('col_a', categories=categories)
+    flux_b.categorize('col_a', categories=categories)
+
+    assert list(flux_b.category_codes('col_a')[0]) == [2, 1, 0]
+    assert flux_b.matrix[3].col_a is flux_a.matrix[1].col_a
+
+
+def test_to_numpy_and_from_numpy():
+    numpy = pytest.importorskip('numpy')
+
+    flux = example_flux()
+
+    a = flux.to_numpy('col_b', 'col_c', dtype=float)
+    assert a.shape == (3, 2)
+    assert a.tolist() == [[1.0, 1.0], [2.0, 2.0], [3.0, 3.0]]
+    assert flux.to_numpy('col_b').tolist() == [[1], [2], [3]]
+    assert flux.to_numpy().shape == (3, 3)
+
+    s = flux.to_numpy(structured=True)
+    assert s.dtype.names == ('col_a', 'col_b', 'col_c')
+    assert s['col_b'].tolist() == [1, 2, 3]
+
+    s = flux.to_numpy(dtype=[('col_c', float), ('col_a', 'U1')])
+    assert s.tolist() == [(1.0, 'a'), (2.0, 'b'), (3.0, 'a')]
+
+    assert [row.values for row in flux_extended_cls.from_numpy(s)] == [[1.0, 'a'], [2.0, 'b'], [3.0, 'a']]
+    assert flux_extended_cls.from_numpy(a, ['x', 'y']).header_names() == ['x', 'y']
+    assert [row.x for row in flux_extended_cls.from_numpy(numpy.arange(3), ['x'])] == [0, 1, 2]
+
+    with pytest.raises(ValueError):
+        flux_extended_cls.from_numpy(a)
+
+
+def test_to_numpy_of_flux_without_rows():
+    flux = flux_extended_cls([['col_a', 'col_b', 'col_c']])
+
+    assert flux.to_numpy().shape == (0, 3)
+    assert flux.to_numpy('col_a', dtype=float).shape == (0, 1)
+    assert flux.to_numpy(dtype=object).shape == (0, 3)
+    assert flux.to_numpy(structured=True).shape == (0,)
+
+    assert flux_extended_cls.from_numpy(flux.to_numpy(), flux.header_names()).num_rows == 0
+
+
+def counted_row_lengths(flux):
+    from collections import Counter
+
+    return dict(Counter(len(row.values) for row in flux.matrix))
+
+
+def test_row_lengths_are_tracked_by_row_methods():
+    flux = example_flux()
+
+    flux.insert_rows(1, [['i', 0]])
+    assert flux.matrix[1].values == ['i', 0]
+    assert flux.row_lengths() == counted_row_lengths(flux) == {3: 4, 2: 1}
+
+    flux.insert_rows(-1, [['j', 0, 0.0, 'extra']])
+    assert flux.matrix[-2].values == ['j', 0, 0.0, 'extra']
+    assert flux.row_lengths() == counted_row_lengths(flux)
+
+    flux.insert_rows(-100, [['k']])
+    assert flux.matrix[1].values == ['k']
+    assert flux.header_names() == ['col_a', 'col_b', 'col_c']
+    assert flux.row_lengths() == counted_row_lengths(flux)
+
+    flux.append_rows([['l', 5, 5.0]])
+    assert flux.matrix[-1].values == ['l', 5, 5.0]
+    assert flux.row_lengths() == counted_row_lengths(flux)
+    assert flux.is_jagged()
+
+    flux.filter(lambda row: len(row.values) == 3)
+    assert flux.row_lengths() == counted_row_lengths(flux) == {3: 5}
+    assert not flux.is_jagged()
+
+    flux.insert_rows(2, [['m']])
+    flux.shorten_to(2)
+    assert flux.row_lengths() == counted_row_lengths(flux) == {3: 2, 1: 1}
+
+    with pytest.raises(ValueError):
+        flux.shorten_to(-1)
+    assert flux.row_lengths() == counted_row_lengths(flux)
+
+
+def test_copy_does_not_share_row_lengths():
+    flux_a = example_flux()
+    flux_b = flux_a.copy()
+
+    flux_b.insert_rows(1, [['i', 0]])
+    flux_b.shorten_to(2)
+
+    assert flux_a.row_lengths() == counted_row_lengths(flux_a) == {3: 4}
+    assert flux_b.row_lengths() == counted_row_lengths(flux_b) == {3: 2, 2: 1}
+    assert flux_a.copy(deep=True).row_lengths() == {3: 4}
+
+
+def test_fill_and_assign():
+    flux = example_flux()
+
+    flux.fill('col_d', 'd')
+    flux.fill('col_b', 0)
+    assert [row.values for row in flux] == [['a', 0, 1.0, 'd'], ['b', 0, 2.0, 'd'], ['a', 0, 3.0, 'd']]
+
+    flux.assign('col_b', lambda row: row.col_c * 2)
+    flux.assign('col_e', (v.upper() for v in flux['col_a']))
+    flux.assign('col_d', [1, 2, 3])
+    flux.assign('col_f', None)
+    assert flux.header_names() == ['col_a', 'col_b', 'col_c', 'col_d', 'col_e', 'col_f']
+    assert [row.values for row in flux] == [['a', 2.0, 1.0, 1, 'A', None],
+                                            ['b', 4.0, 2.0, 2, 'B', None],
+                                            ['a', 6.0, 3.0, 3, 'A', None]]
+    assert not flux.is_jagged()
+
+
+@pytest.mark.parametrize('values', [iter([1, 2]),
+                                    iter([1, 2, 3, 4]),
+                                    [1, 2],
+                                    (v for v in range(100))])
+def test_assign_wrong_number_of_values_leaves_flux_unchanged(values):
+    flux     = example_flux()
+    expected = [row.values.copy() for row in flux.matrix]
+
+    with pytest.raises(IndexError):
+        flux.assign('col_b', values)
+    with pytest.raises(IndexError):
+        flux.assign('col_new', values)
+
+    assert [row.values for row in flux.matrix] == expected
+
+
+def test_assign_exception_in_callable_leaves_flux_unchanged():
+    flux     = example_flux()
+    expected = [row.values.copy() for row in flux.matrix]
+
+    with pytest.raises(ZeroDivisionError):
+        flux.assign('col_c', lambda row: 1 / (row.col_b - 2))
+
+    assert [row.values for row in flux.matrix] == expected
+
+
+def passthrough(f):
+    from functools import wraps
+
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        return f(*args, **kwargs)
+
+    return wrapper
+
+
+class row_criteria_cls:
+    def __init__(self, minimum):
+        self.minimum = minimum
+
+    def is_above(self, row):
+        return row.col_b > self.minimum
+
+
+def test_filter_optimize_matches_filter():
+    from flux_expressions import optimized_row_code
+    from flux_expressions import optimized_row_function
+
+    flux    = example_flux()
+    allowed = {'a'}
+
+    def in_allowed(row):
+        return row.col_a in allowed
+
+    def with_defaults(row, minimum=1, *, maximum=3):
+        return minimum < row.col_b <= maximum
+
+    @passthrough
+    def decorated(row):
+        return row.col_c > 1.0
+
+    def reassigned(row):
+        row = row.values
+        return row[1] > 1
+
+    def nested_parameter(row):
+        return any(map(lambda row: row > 1, [row.col_b]))
+
+    rewritten  = [in_allowed, with_defaults, lambda row: row.col_c >= 2.0, row_criteria_cls(1).is_above]
+    unmodified = [decorated, reassigned, nested_parameter, bool]
+
+    for f in rewritten + unmodified:
+        expected = [row.values for row in flux.filtered(f)]
+        assert [row.values for row in flux.filtered(f, optimize=True)] == expected
+        assert [row.values for row in flux.copy().filter(f, optimize=True)] == expected
+
+    for f in rewritten:
+        assert optimized_row_function(f, flux.headers) is not f
+    for f in unmodified:
+        assert optimized_row_function(f, flux.headers) is f
+
+    assert optimized_row_code.cache_info().maxsize is not None
+
+
+def test_memory_usage():
+    import sys
+    from flux_memory import deep_sizeof
+
+    flux  = flux_extended_cls([['col_a', 'col_b']] + [['value {}'.format(i % 2), (i + 1) * 1_000] for i in range(100)])
+    usage = {row.name: row for row in flux.memory_usage()}
+
+    assert list(usage) == ['flux', 'headers', 'matrix', 'row objects', 'value lists', 'col_a', 'col_b', 'total']
+    assert usage['row objects'].objects == 200
+    assert usage['col_a'].objects == 100
+    assert usage['col_b'].objects == 100
+    assert usage['total'].bytes == sum(row.bytes for name, row in usage.items() if name != 'total')
+
+    flux.categorize('col_a')
+    usage = {row.name: row for row in flux.memory_usage()}
+    assert usage['col_a'].objects == 2
+    assert usage['col_a'].bytes == sys.getsizeof('value 0') + sys.getsizeof('value 1')
+
+    assert 'col_a' not in {row.name for row in flux.memory_usage(deep=False)}
+    assert flux.memory_usage(sample_nrows=10).matrix[-1].name == 'total'
+
+    s = 'shared value'
+    assert deep_sizeof([s, s]) == sys.getsizeof([s, s]) + sys.getsizeof(s)
+    assert deep_sizeof({'a': [1.5]}) == (sys.getsizeof({'a': [1.5]}) + sys.getsizeof('a') +
+                                         sys.getsizeof([1.5]) + sys.getsizeof(1.5))
+
+
+def test_row_conversion():
+    from flux_rows import batched_rows
+
+    flux = example_flux()
+
+    row_nt = flux.namedtuple_class()
+    assert row_nt is example_flux().namedtuple_class()
+    assert row_nt is not flux_extended_cls([['col_x']]).namedtuple_class()
+
+    rows = list(flux.namedtuples())
+    assert all(type(row) is row_nt for row in rows)
+    assert [row.col_a for row in rows] == ['a', 'b', 'a']
+
+    assert list(flux.tuples(2)) == [('b', 2, 2.0), ('a', 3, 3.0)]
+    assert list(flux.tuples(batch=2)) == [[('a', 1, 1.0), ('b', 2, 2.0)], [('a', 3, 3.0)]]
+    assert [len(rows) for rows in flux.dicts(batch=2)] == [2, 1]
+    assert [[row.col_b for row in rows] for rows in flux.namedtuples(batch=5)] == [[1, 2, 3]]
+
+    assert list(batched_rows(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(batched_rows([], 2)) == []
+
+
+def test_categorize_keeps_types_of_equal_values():
+    nan_a = float('nan')
+    nan_b = float('nan')
+    flux  = flux_extended_cls([['col_a'], [1], [1.0], [True], [1], [nan_a], [nan_b], [None]])
+
+    flux.categorize('col_a')
+
+    values = [row.col_a for row in flux]
+    assert [type(v) for v in values] == [int, float, bool, int, float, float, type(None)]
+    assert values[:4] == [1, 1.0, True, 1]
+    assert values[5] is values[4]
+
+    codes, categories = flux.category_codes('col_a')
+    assert list(codes) == [0, 1, 2, 0, 3, 3, 4]
+    assert categories[:3] == [1, 1.0, True]
+    assert [type(v) for v in categories] == [int, float, bool, float, type(None)]
+
+    codes, _ = flux_extended_cls([['col_a'], [True], [1], [float('nan')], [float('nan')]]).category_codes('col_a')
+    assert list(codes) == [0, 1, 2, 2]
@@ -0,0 +1,274 @@
+
+import pytest
+
+from vengeance.util.iter import ColumnNameError
+
+import flux_files
+from flux_extended import flux_extended_cls
+from flux_files import read_flux_chunk_table
+
+
+def example_flux(num_rows, start=0):
+    m = [['col_a', 'col_b']]
+    m.extend([i, str(i)] for i in range(start, start + num_rows))
+
+    return flux_extended_cls(m)
+
+
+def row_values(flux):
+    return [row.values for row in flux.matrix[1:]]
+
+
+@pytest.mark.parametrize('compression', [None, 'zlib', 'lzma', 'bz2'])
+def test_serialize_append_compact(tmp_path, compression):
+    path = str(tmp_path / 'flux_file.flux')
+
+    flux_a = example_flux(250)
+    flux_b = example_flux(25, start=250)
+
+    flux_a.serialize(path, compression=compression or 'zlib', chunk_nrows=100)
+    flux_b.serialize(path, mode='append', chunk_nrows=100)
+
+    table = read_flux_chunk_table(path)
+    assert table['segments'] == 2
+    assert table['num_rows'] == 275
+
+    flux = flux_extended_cls.deserialize(path)
+    assert row_values(flux) == row_values(flux_a) + row_values(flux_b)
+
+    table = flux_extended_cls.compact(path, compression=compression, chunk_nrows=100)
+    assert table['segments'] == 1
+    assert table['compression'] == compression
+    assert [nrows for _, _, nrows in table['chunks']] == [100, 100, 75]
+
+    flux = flux_extended_cls.deserialize(path)
+    assert row_values(flux) == row_values(flux_a) + row_values(flux_b)
+
+
+def test_append_creates_file(tmp_path):
+    path = str(tmp_path / 'flux_file.flux')
+    example_flux(10).serialize(path, mode='append')
+
+    assert flux_extended_cls.deserialize(path).num_rows == 10
+
+
+def test_append_rejects_different_columns(tmp_path):
+    path = str(tmp_path / 'flux_file.flux')
+    example_flux(10).serialize(path, compression='zlib')
+
+    flux = example_flux(10)
+    flux.rename_columns({'col_b': 'col_x'})
+
+    with pytest.raises(ColumnNameError):
+        flux.serialize(path, mode='append')
+
+    assert read_flux_chunk_table(path)['num_rows'] == 10
+
+
+def test_append_to_pickle_stream_raises(tmp_path):
+    path = str(tmp_path / 'flux_file.flux')
+    example_flux(10).serialize(path)
+
+    with pytest.raises(ValueError):
+        example_flux(10).serialize(path, mode='append')
+
+
+def test_read_some_chunks(tmp_path):
+    path = str(tmp_path / 'flux_file.flux')
+    example_flux(250).serialize(path, compression='zlib', chunk_nrows=100)
+
+    flux = flux_extended_cls.deserialize(path, chunks=[2])
+    assert [row.col_a for row in flux] == list(range(200, 250))
+
+
+def test_append_round_trip(tmp_path):
+    path = str(tmp_path / 'flux_file.flux')
+
+    flux_a = example_flux(120)
+    flux_a.source = 'hourly'
+    flux_a.serialize(path, compression='lzma', chunk_nrows=50)
+
+    for start in (120, 150):
+        example_flux(30, start=start).serialize(path, mode='append', chunk_nrows=20)
+
+    table = read_flux_chunk_table(path)
+    assert table['segments'] == 3
+    assert table['compression'] == 'lzma'
+    assert [nrows for _, _, nrows in table['chunks']] == [50, 50, 20, 20, 10, 20, 10]
+
+    flux = flux_extended_cls.deserialize(path)
+    assert row_values(flux) == row_values(example_flux(180))
+    assert flux.source == 'hourly'
+
+
+def test_read_chunks_of_appended_segments(tmp_path):
+    path = str(tmp_path / 'flux_file.flux')
+
+    example_flux(100).serialize(path, compression='zlib', chunk_nrows=40)
+    example_flux(30, start=100).serialize(path, mode='append', chunk_nrows=40)
+
+    flux = flux_extended_cls.deserialize(path, chunks=[1, 3])
+    assert [row.col_a for row in flux] == list(range(40, 80)) + list(range(100, 130))
+
+
+@pytest.mark.parametrize('damage', ['truncated', 'corrupted', 'unfinished'])
+def test_damaged_tail_falls_back_to_previous_table(tmp_path, damage):
+    import os
+
+    path = str(tmp_path / 'flux_file.flux')
+
+    example_flux(100).serialize(path, compression='zlib', chunk_nrows=40)
+    size = os.path.getsize(path)
+
+    if damage == 'unfinished':
+        # an append killed after writing chunks, before writing its table
+        with open(path, 'ab') as f:
+            f.write(os.urandom(5_000))
+    else:
+        example_flux(30, start=100).serialize(path, mode='append')
+
+        with open(path, 'r+b') as f:
+            if damage == 'truncated':
+                f.truncate(os.path.getsize(path) - 3)
+            else:
+                f.seek(os.path.getsize(path) - flux_files.chunked_flux_footer_size - 10)
+                b = f.read(1)
+                f.seek(-1, os.SEEK_CUR)
+                f.write(bytes([b[0] ^ 0xff]))
+
+    assert read_flux_chunk_table(path)['num_rows'] == 100
+    assert row_values(flux_extended_cls.deserialize(path)) == row_values(example_flux(100))
+
+    example_flux(5, start=100).serialize(path, mode='append')
+    assert row_values(flux_extended_cls.deserialize(path)) == row_values(example_flux(105))
+
+    table = read_flux_chunk_table(path)
+    assert table['chunks'][-1][0] == size
+    assert table['segments'] == 2
+
+
+def test_file_without_valid_table_raises(tmp_path):
+    path = str(tmp_path / 'flux_file.flux')
+    example_flux(10).serialize(path, compression='zlib')
+
+    with open(path, 'r+b') as f:
+        f.truncate(len(flux_files.chunked_flux_magic) + 10)
+
+    with pytest.raises(ValueError):
+        read_flux_chunk_table(path)
+
+
+@pytest.mark.parametrize('block_nbytes', [1, 5, 13, 14, 30, 1_000])
+def test_table_magic_is_found_across_blocks(block_nbytes):
+    import io
+
+    magic = flux_files.chunked_flux_table_magic
+    data  = b'x' * 10 + magic + b'y' * 7 + magic + magic + b'z'
+    ends  = list(flux_files.table_magic_ends(io.BytesIO(data), block_nbytes))
+
+    assert ends == [len(data) - 1, len(data) - 1 - len(magic), 10 + len(magic)]
+
+
+def test_csv_append(tmp_path):
+    path = str(tmp_path / 'flux_file.csv')
+
+    example_flux(5).to_csv(path)
+    example_flux(5, start=5).to_csv(path, mode='append')
+
+    flux = flux_extended_cls.from_csv(path)
+    assert [row.col_a for row in flux] == [str(i) for i in range(10)]
+
+
+@pytest.mark.parametrize('kwargs', [{}, {'nrows': 3}, {'exclude_header_row': True}])
+def test_from_csv_categorize_matches_from_csv(tmp_path, kwargs):
+    path = str(tmp_path / 'flux_file.csv')
+
+    m = [['col_a', 'col_b']] + [['a{}'.format(i % 3), str(i)] for i in range(10)]
+    flux_extended_cls(m).to_csv(path)
+
+    expected = flux_extended_cls.from_csv(path, **dict(kwargs))
+    flux     = flux_extended_cls.from_csv(path, categorize=True, **dict(kwargs))
+
+    assert flux.header_names() == expected.header_names()
+    assert row_values(flux) == row_values(expected)
+
+    if not kwargs:
+        assert flux.matrix[1].col_a is flux.matrix[4].col_a
+
+        codes, categories = flux.category_codes('col_a')
+        assert list(codes) == [i % 3 for i in range(10)]
+        assert categories == ['a0', 'a1', 'a2']
+
+
+@pytest.mark.parametrize('extension', ['.parquet', '.arrow'])
+def test_arrow_file_round_trip(tmp_path, extension):
+    pytest.importorskip('pyarrow')
+
+    path   = str(tmp_path / ('flux_file' + extension))
+    flux_a = example_flux(10)
+    flux_a.to_file(path)
+
+    flux = flux_extended_cls.from_file(path)
+    assert flux.header_names() == ['col_a', 'col_b']
+    assert row_values(flux) == row_values(flux_a)
+
+
+@pytest.mark.parametrize('extension', ['.parquet', '.arrow'])
+def test_arrow_file_projection_and_filters(tmp_path, extension):
+    pytest.importorskip('pyarrow')
+
+    path = str(tmp_path / ('flux_file' + extension))
+    if extension == '.parquet':
+        example_flux(10).to_parquet(path, row_group_size=3)
+    else:
+        example_flux(10).to_arrow(path)
+
+    flux = flux_extended_cls.from_file(path, columns=['col_b'])
+    assert flux.header_names() == ['col_b']
+    assert row_values(flux) == [[str(i)] for i in range(10)]
+
+    flux = flux_extended_cls.from_file(path, filters=[('col_a', '>=', 7)])
+    assert row_values(flux) == [[7, '7'], [8, '8'], [9, '9']]
+
+    flux = flux_extended_cls.from_file(path, columns=['col_a'],
+                                             filters=[[('col_a', '==', 1)], [('col_a', '==', 8)]])
+    assert row_values(flux) == [[1], [8]]
+
+
+@pytest.mark.parametrize('extension', ['.parquet', '.arrow'])
+def test_arrow_file_without_rows(tmp_path, extension):
+    pytest.importorskip('pyarrow')
+
+    path = str(tmp_path / ('flux_file' + extension))
+    flux_extended_cls([['col_a', 'col_b']]).to_file(path)
+
+    flux = flux_extended_cls.from_file(path)
+    assert flux.header_names() == ['col_a', 'col_b']
+    assert flux.num_rows == 0
+
+
+def test_from_files(tmp_path):
+    paths = [str(tmp_path / 'flux_file_{}.csv'.format(i)) for i in range(3)]
+
+    example_flux(3).to_csv(paths[0])
+    example_flux(2, start=3).to_csv(paths[1])
+    flux_extended_cls([['col_b', 'col_c'], ['x', 'y']]).to_csv(paths[2])
+
+    flux = flux_extended_cls.from_files(paths[:2], workers=2)
+    assert row_values(flux) == [[str(i), str(i)] for i in range(5)]
+
+    flux = flux_extended_cls.from_files(str(tmp_path / 'flux_file_*.csv'), schema='union', source_column='source')
+    assert flux.header_names() == ['col_a', 'col_b', 'col_c', 'source']
+    assert flux.matrix[1].values == ['0', '0', None, paths[0]]
+    assert flux.matrix[-1].values == [None, 'x', 'y', paths[2]]
+    assert flux.num_rows == 6
+
+    flux = flux_extended_cls.from_files(paths, schema=['col_b'])
+    assert row_values(flux) == [['0'], ['1'], ['2'], ['3'], ['4'], ['x']]
+
+    with pytest.raises(ColumnNameError):
+        flux_extended_cls.from_files(paths)
+    with pytest.raises(ColumnNameError):
+        flux_extended_cls.from_files(paths[:1], source_column='col_a')
+    with pytest.raises(FileNotFoundError):
+        flux_extended_cls.from_files(str(tmp_path / 'missing_*.csv'))
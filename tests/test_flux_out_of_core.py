@@ -0,0 +1,163 @@
+
+import random
+
+import pytest
+
+import flux_out_of_core
+from flux_extended import flux_extended_cls
+from flux_out_of_core import grouped_rows
+
+
+def example_rows(num_rows, num_keys, seed=0):
+    rng = random.Random(seed)
+    return [[rng.randrange(num_keys), i] for i in range(num_rows)]
+
+
+def grouped_in_memory(rows):
+    groups = {}
+    for row in rows:
+        groups.setdefault(row[0], []).append(row)
+
+    return groups
+
+
+def test_oversized_partitions_are_partitioned_again(tmp_path, monkeypatch):
+    levels   = []
+    original = flux_out_of_core.grouped_rows
+
+    def counted_grouped_rows(*args, **kwargs):
+        levels.append(kwargs.get('level', args[6] if len(args) > 6 else 0))
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(flux_out_of_core, 'grouped_rows', counted_grouped_rows)
+
+    rows   = example_rows(20_000, 2_000)
+    groups = dict(counted_grouped_rows(iter(rows), lambda row: row[0], 1,
+                                       num_partitions=2,
+                                       temp_dir=str(tmp_path),
+                                       sample_nrows=1_000))
+
+    assert groups == grouped_in_memory(rows)
+    assert max(levels) >= 2
+
+
+def test_single_key_partition_is_not_split(tmp_path):
+    rows   = [[0, i] for i in range(5_000)] + [[1, 0]]
+    groups = dict(grouped_rows(iter(rows), lambda row: row[0], 1,
+                               num_partitions=2,
+                               temp_dir=str(tmp_path),
+                               sample_nrows=100))
+
+    assert groups == grouped_in_memory(rows)
+
+
+def test_chunked_flux_file_is_streamed(tmp_path, monkeypatch):
+    path = str(tmp_path / 'flux_file.flux')
+
+    m = [['col_a', 'col_b']] + example_rows(2_500, 10)
+    flux_extended_cls(m).serialize(path, compression='zlib', chunk_nrows=500)
+
+    def deserialize(*args, **kwargs):
+        raise AssertionError('chunked .flux file loaded whole')
+
+    monkeypatch.setattr(flux_extended_cls, 'deserialize', classmethod(deserialize))
+
+    header, rows = flux_out_of_core.read_file_rows(path, flux_class=flux_extended_cls)
+    assert header == ['col_a', 'col_b']
+    assert list(rows) == m[1:]
+
+    flux = flux_extended_cls.aggregate_file(path, 'col_a',
+                                            aggregates={'n': ('col_b', len)},
+                                            memory_limit=1,
+                                            num_partitions=4,
+                                            temp_dir=str(tmp_path))
+
+    counts = {row.col_a: row.n for row in flux}
+    assert counts == {k: len(v) for k, v in grouped_in_memory(m[1:]).items()}
+
+
+def test_sort_file(tmp_path):
+    src = str(tmp_path / 'flux_file.csv')
+    dst = str(tmp_path / 'flux_file_sorted.csv')
+
+    m = [['col_a', 'col_b']] + [[str(k), str(i)] for k, i in example_rows(3_000, 50)]
+    flux_extended_cls(m).to_csv(src)
+
+    flux_extended_cls.sort_file(src, dst, ['col_a', 'col_b'], reverse=[False, True], memory_limit=1)
+
+    expected = sorted(m[1:], key=lambda row: row[1], reverse=True)
+    expected = sorted(expected, key=lambda row: row[0])
+
+    assert [row.values for row in flux_extended_cls.from_csv(dst)] == expected
+
+
+@pytest.mark.parametrize('memory_limit', [1, '1GB'])
+def test_sort_file_to_flux_file(tmp_path, memory_limit):
+    from flux_files import is_chunked_flux_file
+
+    src = str(tmp_path / 'flux_file.csv')
+    dst = str(tmp_path / 'flux_file_sorted.flux')
+
+    m = [['col_a', 'col_b']] + [[str(k), str(i)] for k, i in example_rows(3_000, 50)]
+    flux_extended_cls(m).to_csv(src)
+
+    flux_extended_cls.sort_file(src, dst, 'col_a', memory_limit=memory_limit)
+
+    assert is_chunked_flux_file(dst)
+    assert [row.values for row in flux_extended_cls.deserialize(dst)] == sorted(m[1:], key=lambda row: row[0])
+
+
+def test_sort_file_spills_each_run_before_reading_the_next(tmp_path, monkeypatch):
+    import flux_extended
+
+    src = str(tmp_path / 'flux_file.csv')
+    dst = str(tmp_path / 'flux_file_sorted.csv')
+    flux_extended_cls([['col_a', 'col_b']] + example_rows(3_500, 50)).to_csv(src)
+
+    events = []
+
+    def memory_bounded_runs(*args, **kwargs):
+        for run in flux_out_of_core.memory_bounded_runs(*args, **kwargs):
+            events.append('run')
+            yield run
+
+    def write_spill_file(path, rows):
+        events.append('spill')
+        return flux_out_of_core.write_spill_file(path, rows)
+
+    monkeypatch.setattr(flux_extended, 'memory_bounded_runs', memory_bounded_runs)
+    monkeypatch.setattr(flux_extended, 'write_spill_file', write_spill_file)
+
+    flux_extended_cls.sort_file(src, dst, 'col_a', memory_limit=1)
+
+    assert events == ['run', 'spill'] * 4
+
+
+def test_csv_file_is_closed_when_rows_are_not_exhausted(tmp_path, monkeypatch):
+    path = str(tmp_path / 'flux_file.csv')
+    flux_extended_cls([['col_a', 'col_b']] + example_rows(100, 10)).to_csv(path)
+
+    files = []
+
+    def tracked_open(*args, **kwargs):
+        files.append(open(*args, **kwargs))
+        return files[-1]
+
+    monkeypatch.setattr(flux_out_of_core, 'open', tracked_open, raising=False)
+
+    header, rows = flux_out_of_core.read_file_rows(path)
+    assert header == ['col_a', 'col_b']
+    assert all(f.closed for f in files)
+
+    assert len(next(rows)) == 2
+    assert not all(f.closed for f in files)
+
+    rows.close()
+    assert all(f.closed for f in files)
+
+
+@pytest.mark.parametrize('size, expected', [(2_000, 2_000),
+                                            ('2KB', 2_000),
+                                            ('1.5 KiB', 1_536)])
+def test_parse_memory_size(size, expected):
+    assert flux_out_of_core.parse_memory_size(size) == expected
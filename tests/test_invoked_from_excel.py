@@ -0,0 +1,75 @@
+
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+import invoked_from_excel
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.delenv('VENGEANCE_EXAMPLE_TOKEN', raising=False)
+    monkeypatch.setattr(invoked_from_excel, 'server_address', ('127.0.0.1', free_port()))
+    monkeypatch.setattr(invoked_from_excel, 'server_token_path', str(tmp_path / 'server_token'))
+
+    thread = threading.Thread(target=invoked_from_excel.serve, daemon=True)
+    thread.start()
+
+    for _ in range(200):
+        if invoked_from_excel.server_token() is not None:
+            break
+        time.sleep(0.01)
+
+    yield invoked_from_excel.server_address
+
+    assert invoked_from_excel.forward_to_server(['stop_server']) == 0
+    thread.join(5)
+
+    assert not thread.is_alive()
+    assert invoked_from_excel.server_token() is None
+
+
+def send_request(address, request):
+    with socket.create_connection(address) as conn:
+        conn.sendall((json.dumps(request) + '\n').encode('utf-8'))
+        with conn.makefile('r', encoding='utf-8') as f:
+            return f.read()
+
+
+def test_usage_errors_are_sent_to_client(server, capsys):
+    assert invoked_from_excel.forward_to_server(['not_a_command']) == 2
+
+    out = capsys.readouterr().out
+    assert 'usage: invoked_from_excel' in out
+    assert 'invalid choice' in out
+
+
+def test_invalid_token_is_rejected(server):
+    response = send_request(server, {'token': 'wrong', 'argv': ['stop_server']})
+    assert response.endswith('{}1\n'.format(invoked_from_excel.exit_status_token))
+
+    response = send_request(server, ['stop_server'])
+    assert response.endswith('{}1\n'.format(invoked_from_excel.exit_status_token))
+
+
+def test_server_class_is_not_modified(server):
+    from socketserver import ThreadingTCPServer
+
+    assert ThreadingTCPServer.allow_reuse_address is False
+    assert ThreadingTCPServer.daemon_threads is False
+
+
+def test_no_server_running(tmp_path, monkeypatch):
+    monkeypatch.delenv('VENGEANCE_EXAMPLE_TOKEN', raising=False)
+    monkeypatch.setattr(invoked_from_excel, 'server_token_path', str(tmp_path / 'server_token'))
+
+    assert invoked_from_excel.forward_to_server(['write_file']) is None
@@ -0,0 +1,138 @@
+
+import gc
+
+import pytest
+
+import share
+
+
+@pytest.mark.parametrize('kwargs', [{'value_type': bool},
+                                    {'value_type': (str, bytes)},
+                                    {'len_values': 0},
+                                    {'cardinality': 0},
+                                    {'none_ratio': 2.0}])
+def test_random_matrix_invalid_arguments(kwargs):
+    with pytest.raises((TypeError, ValueError)):
+        share.random_matrix(**kwargs)
+
+    assert gc.isenabled()
+
+
+def test_random_matrix_seed():
+    m_1 = share.random_matrix(50, value_type=(str, float, int), seed=1, cardinality=5, none_ratio=0.1)
+    m_2 = share.random_matrix(50, value_type=(str, float, int), seed=1, cardinality=5, none_ratio=0.1)
+
+    assert m_1 == m_2
+    assert m_1[0] == ['col_a', 'col_b', 'col_c']
+    assert len(m_1) == 51
+    assert len({row[0] for row in m_1[1:]} - {None}) <= 5
+
+
+def test_random_matrix_fixture_path_includes_generator():
+    args = (100, 3, 3, str, 1, 0.0, None)
+
+    assert (share.random_matrix_fixture_path(*args, 'numpy') !=
+            share.random_matrix_fixture_path(*args, 'python'))
+
+
+def test_import_share_defers_vengeance():
+    flux = share.import_times('import share')
+    assert [m for m in flux['module'] if m.split('.')[0] == 'vengeance'] == []
+
+
+def test_import_package_defers_submodules():
+    statement = "import sys; sys.path.insert(0, '..'); import vengeance_example"
+    flux      = share.import_times(statement)
+
+    assert [m for m in flux['module'] if m.split('.')[0] == 'vengeance'] == []
+    assert [m for m in flux['module'] if m.startswith('vengeance_example.')] == []
+
+
+@pytest.mark.parametrize('statement', ['import share',
+                                       "import sys; sys.path.insert(0, '..'); import vengeance_example"])
+def test_import_budget(statement):
+    share.assert_import_budget(statement)
+
+
+def test_escape_excel_values_error_codes():
+    m = ((1.0, -2146826281, 'a'),
+         (2.0, -2146826246, True),
+         (3.0, 5,           None))
+
+    assert share.escape_excel_values(m) == [[1.0, '#excel_error: div0#', 'a'],
+                                            [2.0, '#excel_error: na#',   True],
+                                            [3.0, 5,                     None]]
+
+
+def test_escape_excel_values_date_serials():
+    from datetime import datetime
+
+    m = ((43831.0, 43831.0),
+         (43831.5, 'text'),
+         (None,    1.0))
+
+    assert share.escape_excel_values(m, date_indices=[0]) == [[datetime(2020, 1, 1),     43831.0],
+                                                              [datetime(2020, 1, 1, 12), 'text'],
+                                                              [None,                     1.0]]
+
+
+def test_escape_excel_values_single_cell():
+    assert share.escape_excel_values(-2146826265) == [['#excel_error: ref#']]
+    assert share.escape_excel_values(7.0) == [[7.0]]
+
+
+@pytest.fixture
+def workbook_path(tmp_path):
+    openpyxl = pytest.importorskip('openpyxl')
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = 'Data'
+
+    # meta row 1, header row 2, values from column B (as lev_cls reads sheets other than sheet1)
+    ws.append([None, 'meta_a', None,    None])
+    ws.append([None, 'col_a',  'col_b', 'col_c'])
+    ws.append([None, 'a',      1,       '#N/A'])
+    ws.append([None, 'b',      2,       3.5])
+    ws.append([None, None,     None,    None])
+
+    path = str(tmp_path / 'workbook.xlsx')
+    wb.save(path)
+
+    return path
+
+
+def test_read_worksheet_file(workbook_path):
+    m = share.read_worksheet_file((workbook_path, 'data', 1, 2, 'B', None))
+
+    assert m == [['col_a', 'col_b', 'col_c'],
+                 ['a',     1,       '#excel_error: na#'],
+                 ['b',     2,       3.5]]
+
+    m = share.read_worksheet_file((workbook_path, 'data', 1, 2, 'col_b', 'col_b'))
+    assert m == [['col_b'], [1], [2]]
+
+    m = share.read_worksheet_file((workbook_path, 'data', 1, 0, 'meta_a', 'meta_a'))
+    assert m == [['col_a'], ['a'], ['b']]
+
+    m = share.read_worksheet_file((workbook_path, 'data', 0, 0, 'B', 'B'))
+    assert m == [['meta_a'], ['col_a'], ['a'], ['b']]
+
+
+def test_load_sheets_caches_fluxes_separately(workbook_path, monkeypatch):
+    monkeypatch.setattr(share, 'wb_levs',   {})
+    monkeypatch.setattr(share, 'wb_fluxes', {})
+
+    fluxes = share.load_sheets([(workbook_path, 'Data')], workers=1)
+    flux   = fluxes[(workbook_path, 'Data')]
+
+    assert flux.header_names() == ['col_a', 'col_b', 'col_c']
+    assert flux.num_rows == 2
+    assert share.wb_levs == {}
+    assert len(share.wb_fluxes) == 1
+
+    monkeypatch.setattr(share, 'read_worksheet_file', None)
+    cached = share.load_sheets([(workbook_path, 'Data')], workers=1)[(workbook_path, 'Data')]
+
+    assert [row.values for row in cached] == [row.values for row in flux]
+    assert cached is not flux
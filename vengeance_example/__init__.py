@@ -12,3 +12,32 @@ if module_path not in set(sys.path):
     sys.path.append(module_path)
 
 print('vengeance_example loaded')
+
+# submodules are imported on first attribute access (eg, vengeance_example.share),
+# so importing the package does not pay for vengeance / excel_com
+__all__ = ['excel_example',
+           'flux_example',
+           'flux_extended',
+           'flux_columns',
+           'flux_commands',
+           'flux_expressions',
+           'flux_files',
+           'flux_groups',
+           'flux_memory',
+           'flux_out_of_core',
+           'flux_parallel',
+           'flux_rows',
+           'invoked_from_excel',
+           'share']
+
+
+def __getattr__(name):
+    if name in __all__:
+        import importlib
+        return importlib.import_module('.' + name, __name__)
+
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
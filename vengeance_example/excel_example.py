@@ -215,6 +215,10 @@ def iterate_primitive_rows():
         * however, there may be reasons you don't want to do this,
           potentially because the matrix returns as read-only tuples,
           and because Excel's error values are not recognized (see iterate_excel_errors())
+
+    m = list(share.worksheet_values(lev))
+        * same values as lev.values(), but read in large blocks through .Value2
+          with Excel's error values escaped in bulk (see iterate_excel_errors())
     """
     lev = share.worksheet_to_lev('Sheet1')
     # lev = share.tab_to_lev('errors')
@@ -300,6 +304,18 @@ def iterate_excel_errors():
     for row in lev.flux_rows(3, 3):
         a = row.col_c
 
+    # same escaped values, but read with a single .Value2 call per block of rows
+    # instead of one COM call per error cell; fastest way to read large sheets
+    for row in share.worksheet_values(lev, 3, 3):
+        a = row[-1]
+
+    for row in share.worksheet_flux_rows(lev, 3, 3):
+        a = row.col_c
+
+    # .Value2 returns dates as serial numbers, convert specific columns to datetimes
+    # m = list(share.worksheet_values(lev, '*f', date_columns=['col_a']))
+    # flux = share.worksheet_to_flux('Sheet1', value2=True, date_columns=['col_a'])
+
 
 def convert_to_flux():
     """
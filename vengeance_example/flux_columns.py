@@ -0,0 +1,273 @@
+
+"""
+column helpers of flux_extended_cls:
+    * column name validation, same rules and messages as flux_cls
+    * column_plan_cls / new_column_cls, used by flux_extended_cls.restructure()
+    * categories_cls / categorized_rows(), used by flux_extended_cls.categorize() / .from_csv()
+"""
+from collections import Counter
+from typing import Any
+from typing import Dict
+from typing import List
+
+from vengeance.util.iter import ColumnNameError
+from vengeance.util.iter import IterationDepthError
+from vengeance.util.iter import iteration_depth
+from vengeance.util.iter import iterator_to_collection
+from vengeance.util.iter import standardize_variable_arity_values
+
+
+# region {column name validation}
+def validate_names_as_indices(names, headers) -> List[int]:
+    """ column names (or int positions, including negative positions) to int indices of headers """
+    names = standardize_variable_arity_values(names, depth=1)
+    validate_name_datatypes(names)
+
+    h_indices = list(headers.values())
+    invalid   = [n for n in names if n not in headers and not is_header_position(n, len(h_indices))]
+    if invalid:
+        s = '\n\t'.join('{}: {}'.format(name, i) for name, i in headers.items())
+        raise ColumnNameError("'{}' column name does not exist, available columns: "
+                              "\n\t{}".format(set(invalid), s))
+
+    return [h_indices[headers.get(n, n)] for n in names]
+
+
+def is_header_position(name, num_cols) -> bool:
+    return isinstance(name, int) and -num_cols <= name < num_cols
+
+
+def validate_name_datatypes(names):
+    valid_datatypes = (int,
+                       str,
+                       bytes)
+
+    invalid = [n for n in names if not isinstance(n, valid_datatypes)]
+    if invalid:
+        v = ', '.join(v.__name__ for v in valid_datatypes)
+        raise TypeError("invalid column datatype: '{}'\n"
+                        "valid types are: ({})\n\n"
+                        '\t(Make sure any arguments following variable position parameters are submitted by keyword)'
+                        .format(invalid, v))
+
+    return names
+
+
+def validate_no_duplicate_names(names):
+    names = standardize_variable_arity_values(names, depth=1)
+
+    duplicates = [n for n, count in Counter(names).items() if count > 1]
+    if duplicates:
+        raise ColumnNameError('duplicate column name detected: \n{}'.format(duplicates))
+
+    return names
+
+
+def validate_no_names_intersect_with_headers(names, headers):
+    names = standardize_variable_arity_values(names, depth=1)
+
+    conflicting = headers.keys() & set(names)
+    if conflicting:
+        raise ColumnNameError('column names already exist: \n{}'.format(conflicting))
+
+    return names
+
+
+def validate_inserted_items(inserted, headers) -> list:
+    """ :return: list of ({location}, {name}) tuples, see flux_cls.insert_columns() """
+    if isinstance(inserted, dict):
+        inserted = list(inserted.items())
+
+    inserted = standardize_variable_arity_values(inserted, depth=2)
+
+    for item in inserted:
+        if iteration_depth(item) != 1 or len(item) != 2:
+            raise IterationDepthError("inserted values must be ({location}, {name}) tuples "
+                                      "\n\teg: (2, 'new_col') "
+                                      "\n\teg: [('col_a', 'new_col_a'), ('col_b', 'new_col_b')]")
+
+    locations, names = list(zip(*inserted))
+
+    validate_name_datatypes(names)
+    validate_no_duplicate_names(names)
+    validate_no_names_intersect_with_headers(names, headers)
+    validate_names_as_indices(locations, headers)
+
+    return inserted
+
+
+def validate_renamed_or_inserted_column(name, headers):
+    """ name of a column in flux_cls.reassign_columns():
+        'col_a':             existing column
+        '(col_new)':         new column, must be surrounded by parenthesis
+        {'col_a': 'col_b'}:  existing column, renamed (headers is updated with the new name)
+    """
+    is_remapped_column = isinstance(name, dict)
+    is_inserted_column = (isinstance(name, str)   and name.startswith('(')  and name.endswith(')') or
+                          isinstance(name, bytes) and name.startswith(b'(') and name.endswith(b')')
+                          and name not in headers)
+
+    if is_remapped_column:
+        name_old, name = list(name.items())[0]
+        headers[name]  = headers[name_old]
+    elif is_inserted_column:
+        name = name[1:-1]
+        if name in headers:
+            raise ColumnNameError("column: '{}' already exists".format(name))
+
+    elif name not in headers:
+        raise ColumnNameError("column: '{name}' does not exist. "
+                              "\nTo ensure new columns are being created intentionally (not a new column "
+                              "because to a typo) inserted headers must be surrounded by parenthesis, eg: "
+                              "\n '({name})', not '{name}'".format(name=name))
+
+    return name
+# endregion
+
+
+class column_plan_cls:
+    """ final column names of flux_extended_cls.restructure(), and the source of each column:
+    an index of the original row values, or a new_column_cls
+
+    the column methods are also recorded in order (.operations), so they can be replayed
+    one at a time with flux_cls semantics when rows are jagged
+    """
+
+    def __init__(self, names):
+        self.names            = list(names)
+        self.sources          = list(range(len(names)))
+        self.sources_original = list(self.sources)
+        self.assignments      = []
+        self.operations       = []
+
+    def record(self, method_name, *args, **kwargs):
+        self.operations.append((method_name, args, kwargs))
+
+    def headers(self) -> Dict[Any, int]:
+        return {name: i for i, name in enumerate(self.names)}
+
+    def index(self, source):
+        """ final position of source column, or None if it was deleted """
+        for i, s in enumerate(self.sources):
+            if s is source or (type(s) is int and s == source):
+                return i
+
+        return None
+
+    def defer_assignment(self, name, values, is_scalar):
+        """ .fill() / .assign() within restructure(): applied to the source column after rows are rebuilt,
+        so callables see the final columns and later renames in the block are followed
+        """
+        if isinstance(name, int):
+            i = name
+        elif name in self.names:
+            i = self.names.index(name)
+        else:
+            self.names.append(name)
+            self.sources.append(new_column_cls())
+            self.record('append_columns', name)
+            i = -1
+
+        self.assignments.append((self.sources[i], values, is_scalar))
+
+    def is_identity(self) -> bool:
+        return self.sources == self.sources_original
+
+
+class new_column_cls:
+    """ a column created in flux_extended_cls.restructure(), filled after rows are rebuilt """
+
+    def __init__(self, values=None, is_scalar=True):
+        self.values    = values
+        self.is_scalar = is_scalar
+
+    @classmethod
+    def from_values(cls, values, num_cols, num_rows) -> List['new_column_cls']:
+        """ same values argument as flux_cls.append_columns() """
+        values = iterator_to_collection(values)
+        nd     = iteration_depth(values, first_element_only=True)
+
+        if nd == 0:
+            return [cls(values) for _ in range(num_cols)]
+
+        if nd == 1:
+            columns = [values]
+        else:
+            columns = [list(c) for c in zip(*values)]
+
+        v_num_rows = len(values)
+        v_num_cols = len(columns)
+
+        if (v_num_rows != num_rows) or (v_num_cols != num_cols):
+            raise IndexError('invalid dimensions for column values\n\t'
+                             'expected: {:,} cols x {:,} rows\n\t'
+                             'recieved: {:,} cols x {:,} rows'.format(num_cols, num_rows,
+                                                                      v_num_cols, v_num_rows))
+
+        return [cls(c, is_scalar=False) for c in columns]
+
+    def assign(self, rows, i):
+        if self.is_scalar:
+            if self.values is not None:
+                for row in rows:
+                    row.values[i] = self.values
+        else:
+            for row, v in zip(rows, self.values):
+                row.values[i] = v
+
+
+# category_key() of every NaN
+nan_category = object()
+
+
+def category_key(v) -> tuple:
+    """ key of v in categories_cls.codes: (type, value)
+
+    values that are equal but of different types (1, 1.0, True) are separate categories,
+    so replacing a value by the object of its category never changes its type; NaN is
+    not equal to itself, so every NaN of a type shares a single key
+    """
+    if v == v:
+        return type(v), v
+
+    return type(v), nan_category
+
+
+class categories_cls:
+    """ dictionary of a categorical column: {category_key(value): int code}, and the single
+    value object of each code
+    codes are in order of first appearance; a categories_cls may be shared by columns (or fluxes)
+    that should have the same codes, see flux_extended_cls.categorize()
+    """
+
+    def __init__(self):
+        self.codes  = {}
+        self.values = []
+
+    def __len__(self):
+        return len(self.values)
+
+    def __repr__(self):
+        return '{} {:,} categories'.format(self.__class__.__name__, len(self))
+
+
+def categorized_rows(rows, indices, categories):
+    """ yield each row (a list of values) after replacing its values at indices by the single
+    value object of their category, adding new values to categories
+
+    categories: a categories_cls for each of indices
+    """
+    encoders = [(i, c.codes, c.values) for i, c in zip(indices, categories)]
+
+    for values in rows:
+        for i, codes, category_values in encoders:
+            v = values[i]
+            k = (type(v), v) if v == v else (type(v), nan_category)     # category_key(v), inlined
+            c = codes.get(k)
+            if c is None:
+                codes[k] = len(category_values)
+                category_values.append(v)
+            else:
+                values[i] = category_values[c]
+
+        yield values
@@ -0,0 +1,263 @@
+
+"""
+command pipeline helpers of flux_extended_cls.execute_commands():
+    * commands_profile_cls, returned by flux_extended_cls.profile_commands()
+    * checkpoint_store_cls, for execute_commands(checkpoint=...)
+"""
+import json
+import os
+import pickle
+import zlib
+
+from collections import namedtuple
+from hashlib import sha1
+from typing import List
+
+from vengeance import flux_cls
+from vengeance.util.text import format_seconds
+
+
+command_nt         = namedtuple('Command', ('name',
+                                            'attr',
+                                            'method',
+                                            'args',
+                                            'kwargs'))
+command_profile_nt = namedtuple('CommandProfile', ('i',
+                                                   'name',
+                                                   'args',
+                                                   'kwargs',
+                                                   'wall_seconds',
+                                                   'cpu_seconds',
+                                                   'memory_peak',
+                                                   'memory_net',
+                                                   'rows_in',
+                                                   'rows_out',
+                                                   'columns_added',
+                                                   'columns_removed'))
+
+
+class commands_profile_cls:
+    """ returned by flux_extended_cls.profile_commands() """
+
+    def __init__(self, class_name, commands):
+        self.class_name = class_name
+        self.commands: List[command_profile_nt] = commands
+
+    @property
+    def wall_seconds(self) -> float:
+        return sum(c.wall_seconds for c in self.commands)
+
+    @property
+    def cpu_seconds(self) -> float:
+        return sum(c.cpu_seconds for c in self.commands)
+
+    def slowest(self, n=5) -> List[command_profile_nt]:
+        return sorted(self.commands, key=lambda c: c.wall_seconds, reverse=True)[:n]
+
+    def to_flux(self) -> flux_cls:
+        m = [list(command_profile_nt._fields)]
+        m.extend([list(c) for c in self.commands])
+
+        return flux_cls(m)
+
+    def to_json(self, path=None, **kwargs):
+        """ path=None returns a json string, like flux_cls.to_json() """
+        o = {'class_name':   self.class_name,
+             'wall_seconds': self.wall_seconds,
+             'cpu_seconds':  self.cpu_seconds,
+             'commands':     [c._asdict() for c in self.commands]}
+
+        kwargs.setdefault('default', repr)
+        j_str = json.dumps(o, **kwargs)
+
+        if path is None:
+            return j_str
+
+        with open(path, 'w') as f:
+            f.write(j_str)
+
+        return self
+
+    def to_folded(self, path=None, metric='wall_seconds'):
+        """ 'folded stacks' format, one line per command, weighted in microseconds
+        eg:
+            execute_commands;flux_custom_cls._convert_dates 1234
+
+        accepted by flamegraph.pl, speedscope, inferno, etc
+        metric may be any numeric field of the command profiles
+        """
+        lines = []
+        for c in self.commands:
+            v = getattr(c, metric) or 0
+            if metric.endswith('_seconds'):
+                v = v * 1e6
+
+            lines.append('execute_commands;{}.{} {}'.format(self.class_name, c.name, int(round(v))))
+
+        s = '\n'.join(lines) + '\n'
+
+        if path is None:
+            return s
+
+        with open(path, 'w') as f:
+            f.write(s)
+
+        return self
+
+    def __repr__(self):
+        s = ['{}: {} commands, {}'.format(self.class_name,
+                                          len(self.commands),
+                                          format_seconds(self.wall_seconds))]
+
+        for c in self.commands:
+            s.append('    ⟨{}⟩  @{}: {}, rows {:,} → {:,}'.format(c.i,
+                                                                 c.name,
+                                                                 format_seconds(c.wall_seconds),
+                                                                 c.rows_in,
+                                                                 c.rows_out))
+
+        return '\n'.join(s)
+
+
+class checkpoint_store_cls:
+    """ persisted intermediate states for flux_extended_cls.execute_commands(checkpoint=...)
+
+    eg:
+        store = checkpoint_store_cls(share.files_dir + 'checkpoints', min_seconds=5.0)
+        flux.execute_commands(flux.commands, checkpoint=store)
+
+    each command's key is a hash chained from:
+        * the input flux (row values and instance attributes)
+        * every preceding command's key
+        * the command's name, args and kwargs (see stable_repr())
+        * the source code of the command's method
+    so changing the input, a command's arguments or its implementation invalidates
+    that command's checkpoint and all checkpoints after it
+
+    arguments are hashed by their repr(), except functions (including lambdas), which are
+    hashed by their source code; objects whose repr() includes a memory address
+    (eg, the default object.__repr__) produce a new key on every run, so commands that take
+    them, and every command after them, are never resumed
+
+    min_seconds:
+        only commands that take at least this long are checkpointed
+        (keys are chained, so skipped saves do not break resumption)
+
+    states are pickled and zlib-compressed
+
+    *** SECURITY VULNERABILITY ***
+    as with flux_cls.deserialize(), checkpoint files are pickles: make sure
+    no one else can write to the checkpoint directory
+    """
+
+    def __init__(self, directory, min_seconds=0.0, compress_level=1):
+        self.directory      = str(directory)
+        self.min_seconds    = min_seconds
+        self.compress_level = compress_level
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    def command_keys(self, flux, commands) -> List[str]:
+        key  = self.hash_state(flux._capture_state())
+        keys = []
+
+        for command in commands:
+            h = sha1(key.encode())
+            h.update(stable_repr((command.attr, command.args, command.kwargs)).encode())
+            h.update(method_source(command.method).encode())
+
+            key = h.hexdigest()
+            keys.append(key)
+
+        return keys
+
+    @staticmethod
+    def hash_state(state) -> str:
+        """ state is pickled straight into the hash, without a second copy of its bytes """
+        h = sha1()
+        pickle.Pickler(hash_writer_cls(h), protocol=pickle.HIGHEST_PROTOCOL).dump(state)
+
+        return h.hexdigest()
+
+    def path(self, key) -> str:
+        return os.path.join(self.directory, '{}.checkpoint'.format(key))
+
+    def save(self, key, state):
+        """ write to a temporary file first, an interrupted save never leaves a partial checkpoint """
+        b = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        b = zlib.compress(b, self.compress_level)
+
+        path = self.path(key)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(b)
+
+        os.replace(path + '.tmp', path)
+
+    def load(self, key):
+        """ :return: None if checkpoint does not exist or cannot be read """
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, 'rb') as f:
+                return pickle.loads(zlib.decompress(f.read()))
+        except (OSError, zlib.error, pickle.UnpicklingError, EOFError):
+            return None
+
+    def clear(self):
+        for filename in os.listdir(self.directory):
+            if filename.endswith(('.checkpoint', '.checkpoint.tmp')):
+                os.remove(os.path.join(self.directory, filename))
+
+
+class hash_writer_cls:
+    """ file-like object for pickle.Pickler: written bytes update a hash """
+
+    def __init__(self, h):
+        self.h = h
+
+    def write(self, b):
+        self.h.update(b)
+        return len(b)
+
+
+def method_source(method) -> str:
+    """ source code of method, or its qualified name if source is unavailable (eg, builtins) """
+    import inspect
+
+    f = getattr(method, '__func__', method)
+
+    try:
+        return inspect.getsource(f)
+    except (OSError, TypeError):
+        return '{}.{}'.format(getattr(f, '__module__', ''), getattr(f, '__qualname__', repr(f)))
+
+
+def stable_repr(o) -> str:
+    """ repr() of command arguments for checkpoint keys, the same from one run to the next
+    for functions and lambdas (by source code, see method_source()), and for
+    functools.partial objects of them
+    """
+    from functools import partial
+    from types import BuiltinFunctionType
+    from types import FunctionType
+    from types import MethodType
+
+    if isinstance(o, (FunctionType, MethodType, BuiltinFunctionType)):
+        return 'function({})'.format(method_source(o))
+
+    if isinstance(o, partial):
+        return 'partial({}, {}, {})'.format(stable_repr(o.func), stable_repr(o.args), stable_repr(o.keywords))
+
+    if isinstance(o, (list, tuple)):
+        return '{}({})'.format(type(o).__name__, ', '.join(stable_repr(v) for v in o))
+
+    if isinstance(o, dict):
+        return '{}({})'.format(type(o).__name__, ', '.join('{}: {}'.format(stable_repr(k), stable_repr(v))
+                                                          for k, v in o.items()))
+
+    if isinstance(o, (set, frozenset)):
+        return '{}({})'.format(type(o).__name__, ', '.join(sorted(stable_repr(v) for v in o)))
+
+    return repr(o)
@@ -20,8 +20,10 @@ from vengeance.classes.flux_row_cls import flux_row_cls
 
 try:
     import share
+    from flux_extended import flux_extended_cls
 except (ModuleNotFoundError, ImportError):
     from . import share
+    from .flux_extended import flux_extended_cls
 
 profiler = share.resolve_profiler_function()
 
@@ -52,8 +54,10 @@ def main():
 
     write_to_file(flux)
     read_from_file()
+    # flux_numpy()
 
     # read_from_excel()
+    # read_from_excel_files()
     # write_to_excel(flux)
 
     flux_subclass()
@@ -258,6 +262,11 @@ def iterate_flux_rows(flux: flux_cls):
     b = list(flux.namedrows())
     b = list(flux.namedtuples())
 
+    # flux_extended_cls: namedtuple class cached per column names, and batches for database drivers
+    # for rows in flux_extended_cls(flux).tuples(batch=10_000):
+    #     cursor.executemany(sql, rows)
+    b = list(flux_extended_cls(flux).namedtuples(batch=10))
+
     for row in flux:
         rp = repr(row)
 
@@ -409,6 +418,23 @@ def flux_sort_and_filter_methods(flux: flux_cls):
     # flux_b = flux_a.filtered(lambda _row_: str(_row_.col_b) != 'b')
     flux_b = flux_a.filtered_by_unique('col_a', 'col_b')
 
+    # flux_extended_cls: in-place filter by compiled expression
+    flux_b = flux_extended_cls(flux_a.matrix).copy()
+    flux_b.where('str(col_b) != "b"')
+    flux_b.where('str(col_a)[0] in criteria_a', criteria_a=criteria_a)
+
+    # flux_extended_cls: filter functions recompiled with row.values[i] in place of row.col_a
+    flux_b.filter(starts_with_criteria, optimize=True)
+
+    # files larger than memory: sorted in runs, spilled to disk, then merged
+    # flux_extended_cls.sort_file(share.files_dir + 'flux_file.csv',
+    #                             share.files_dir + 'flux_file_sorted.csv',
+    #                             ['col_a', 'col_b', 'col_c'],
+    #                             reverse=[True, False, True],
+    #                             memory_limit='2GB')
+    # for value, flux_c in flux_extended_cls.contiguous_file(share.files_dir + 'flux_file_sorted.csv', 'col_a'):
+    #     pass
+
     pass
 
 
@@ -476,6 +502,13 @@ def flux_grouping_and_mapping_methods(flux: flux_cls):
     # d = flux.map_rows_append('col_a', 'col_b', rowtype=list)
     # d = flux.map_rows_append('col_a', 'col_b', rowtype=tuple)
 
+    # bytes of each rowtype, and of the flux itself, by structure and by column
+    # from flux_memory import deep_sizeof
+    # nbytes = {rowtype: deep_sizeof(flux.map_rows_append('col_a', 'col_b', rowtype=rowtype))
+    #                    for rowtype in ('dict', 'list', 'tuple', 'namedrow', 'namedtuple')}
+    usage = flux_extended_cls(flux).memory_usage()
+    # usage = flux_extended_cls(flux).memory_usage(sample_nrows=10_000)
+
     # group rows: hierarchically nested column values
     m = [['col_a', 'col_b', 'col_c']] + \
         [['a', 'b', 'c'] for _ in range(3)] + \
@@ -489,12 +522,24 @@ def flux_grouping_and_mapping_methods(flux: flux_cls):
     d_1 = flux_b.map_rows_nested('col_a', 'col_b')
     d_2 = flux_b.groupby('col_a', 'col_b')
 
+    # memory-light alternative for high-cardinality keys: a sorted row permutation plus group offsets
+    # d_1 = flux_extended_cls(m).group_index('col_a', 'col_b')
+    # rows = d_1['a']['b']
+    # d_2  = d_1.to_dict()
+
     # compare differences to .map_rows_append()
     d_1 = flux_b.map_rows_nested('col_a', 'col_b')
     d_2 = flux_b.map_rows_append('col_a', 'col_b')
     # a = list(d_1.keys())
     # b = list(d_2.keys())
 
+    # groups reduced to one row each over multiple processes: columns are shared, not pickled
+    # (with fewer than min_worker_nrows rows per worker, runs in this process)
+    m = [['col_a', 'col_b', 'amount']] + [[row.col_a, row.col_b, float(i)] for i, row in enumerate(flux_b)]
+    flux_c = flux_extended_cls(m).parallel_aggregate('col_a', 'col_b',
+                                                    aggregates={'num_rows':     ('amount', 'count'),
+                                                                'total_amount': ('amount', 'sum')})
+
     m = [['date', 'col_a', 'col_b', 'col_c']] + \
         [['2000-01-01', 'a', 'b', 'c'] for _ in range(3)] + \
         [['2001-01-01', 'c', 'd', 'e'] for _ in range(3)] + \
@@ -513,6 +558,14 @@ def flux_grouping_and_mapping_methods(flux: flux_cls):
     #   group rows where *adjacent* values are identical
     items = list(flux.contiguous('col_c'))
 
+    # groups larger than memory: rows are hash-partitioned to spill files when memory_limit is exceeded
+    # for k, flux_c in flux_extended_cls.groupby_file(share.files_dir + 'flux_file.csv', 'col_a', 'col_b',
+    #                                                 memory_limit='2GB'):
+    #     pass
+    # flux_c = flux_extended_cls.aggregate_file(share.files_dir + 'flux_file.csv', 'col_a',
+    #                                           aggregates={'countifs': ('col_b', len)},
+    #                                           memory_limit='2GB')
+
     pass
 
 
@@ -546,6 +599,13 @@ def flux_jagged_rows(flux: flux_cls):
     assert '🗲jagged🗲' in flux_repr_jagged
     assert '🗲jagged' in row_repr_jagged
 
+    # flux_extended_cls keeps a histogram of row lengths, so .is_jagged() and repr() do not scan rows
+    # modifying row.values directly is not tracked, call .validate_row_lengths() afterwards
+    # flux_b = flux_extended_cls(share.random_matrix(num_rows=10))
+    # flux_b.matrix[1].values.append('too long')
+    # flux_b.validate_row_lengths()
+    # assert flux_b.is_jagged()
+
     pass
 
 
@@ -581,6 +641,20 @@ def flux_rows_methods(flux: flux_cls):
     flux_a += flux_b.matrix[10:15]
     flux_a += [['a', 'b', 'c']] * 10
 
+    # flux_c = flux_c + flux_a in a loop copies every accumulated row on each iteration
+    # to accumulate many batches, build the flux once
+    # adopt=True moves the batches' rows to flux_c instead of copying them, so batches are taken from a copy
+    flux_d  = flux.copy()
+    batches = [flux_d.matrix[i:i + 10] for i in range(1, len(flux_d.matrix), 10)]
+    flux_c  = flux_extended_cls.concat(batches, adopt=True)
+
+    # from flux_rows import row_blocks_cls
+    # rows = row_blocks_cls()
+    # for batch in batches:
+    #     rows += batch
+    # rows.insert(5, [['a', 'b', 'c']])
+    # flux_c = rows.to_flux(flux_extended_cls)
+
     pass
 
 
@@ -620,6 +694,17 @@ def flux_columns_methods(flux: flux_cls):
                             '(inserted_a)',
                             '(inserted_b)',
                             '(inserted_c)')
+
+    # flux_extended_cls: column methods within .restructure() are compiled into
+    # a single index map, and every row is rebuilt once when the block exits
+    flux_c = flux_extended_cls(share.random_matrix(num_rows=5,
+                                                   num_cols=5))
+    with flux_c.restructure():
+        flux_c.insert_columns((0, 'inserted_a'))
+        flux_c.append_columns('append_a', 'append_b', values=0.0)
+        flux_c.delete_columns('col_b', 'col_c', 'col_d')
+        flux_c.rename_columns({'col_a': 'renamed_a'})
+
     pass
 
 
@@ -669,6 +754,17 @@ def flux_column_values(flux: flux_cls):
     except IndexError:
         pass
 
+    # flux_extended_cls: single values, callables and iterators, without building a list of num_rows values
+    flux_e = flux_extended_cls(flux.matrix)
+    flux_e.fill('col_z', 'blah')
+    flux_e.assign('value_a', 100.0)
+    flux_e.assign('col_new', lambda row: (row.col_a, row.col_b))
+    flux_e.assign('col_new', (v.lower() for v in flux_e['col_c']))
+
+    # compiled expressions: column names become index lookups, no row.col_a attribute access
+    flux_e.assign('col_new', flux_e.eval('(col_a, col_b, col_c)'))
+    flux_e.assign('col_new', flux_e.eval('value_a * rate', rate=1.1))
+
     # set existing values from another column
     flux['col_a'] = flux['col_b']
     # append to a new column
@@ -749,6 +845,21 @@ def write_to_file(flux: flux_cls):
     # flux.to_file(share.files_dir + 'flux_file.json')
     # flux.to_file(share.files_dir + 'flux_file.flux')
 
+    # flux_extended_cls: .parquet and .arrow files (requires pyarrow)
+    # flux = flux_extended_cls(flux.matrix)
+    # flux.to_parquet(share.files_dir + 'flux_file.parquet', row_group_size=10_000)
+    # flux.to_arrow(share.files_dir + 'flux_file.arrow')
+
+    # flux_extended_cls: rows compressed in chunks by a pool of threads ('zlib', 'lzma' or 'bz2');
+    # read back with flux_extended_cls.deserialize(), not flux_cls.deserialize()
+    # flux.serialize(share.files_dir + 'flux_file_compressed.flux', compression='zlib', chunk_nrows=100_000)
+
+    # flux_extended_cls: append rows without rewriting the file
+    # (.flux segments are merged by flux_extended_cls.compact())
+    # flux.to_csv(share.files_dir + 'flux_file_appended.csv', mode='append')
+    # flux.serialize(share.files_dir + 'flux_file_compressed.flux', mode='append')
+    # flux_extended_cls.compact(share.files_dir + 'flux_file_compressed.flux')
+
     # specify encoding
     # flux.to_csv(share.files_dir + 'flux_file.csv', 'utf-8-sig')
     # flux.to_json(share.files_dir + 'flux_file.json', 'utf-8-sig')
@@ -768,6 +879,29 @@ def read_from_file():
     # flux = flux_cls.from_file(share.files_dir + 'flux_file.json')
     # flux = flux_cls.from_file(share.files_dir + 'flux_file.flux')
 
+    # flux_extended_cls: only the requested columns are read, and row groups
+    # that cannot match filters are skipped (requires pyarrow)
+    # flux = flux_extended_cls.from_parquet(share.files_dir + 'flux_file.parquet',
+    #                                       columns=['col_a', 'col_b'],
+    #                                       filters=[('col_a', '>=', 'm')])
+    # flux = flux_extended_cls.from_arrow(share.files_dir + 'flux_file.arrow', columns=['col_a'])
+
+    # compressed .flux files: all chunks, or only some of them (see flux_files.read_flux_chunk_table())
+    # flux = flux_extended_cls.deserialize(share.files_dir + 'flux_file_compressed.flux')
+    # flux = flux_extended_cls.deserialize(share.files_dir + 'flux_file_compressed.flux', chunks=[0])
+
+    # many files, read concurrently and concatenated in order of paths;
+    # schema='union' aligns columns by name instead of requiring identical headers
+    # flux = flux_extended_cls.from_files(share.files_dir + 'flux_file*.csv',
+    #                                     workers=8,
+    #                                     schema='union',
+    #                                     source_column='source_file')
+
+    # repeated values in low-cardinality columns share a single object: less memory, faster grouping and sorting
+    # flux = flux_extended_cls.from_csv(share.files_dir + 'flux_file.csv', categorize=['col_a', 'col_b'])
+    # flux = flux_extended_cls.from_csv(share.files_dir + 'flux_file.csv').categorize('col_a', 'col_b')
+    # codes, categories = flux.category_codes('col_a')
+
     # specify encoding
     # flux = flux_cls.from_csv(share.files_dir + 'flux_file.csv', 'utf-8-sig')
     # flux = flux_cls.from_json(share.files_dir + 'flux_file.json', 'utf-8-sig')
@@ -780,6 +914,24 @@ def read_from_file():
     pass
 
 
+def flux_numpy():
+    """ requires numpy """
+    flux = flux_extended_cls(share.random_matrix(num_rows=1_000,
+                                                 num_cols=4,
+                                                 value_type=(str, float, float, int),
+                                                 seed=0))
+
+    a = flux.to_numpy('col_b', 'col_c', dtype=float)
+    a = flux.to_numpy(structured=True)
+    a = flux.to_numpy(dtype=[('col_a', 'U3'),
+                             ('col_d', 'i8')])
+
+    flux = flux_extended_cls.from_numpy(a)
+    flux = flux_extended_cls.from_numpy(a['col_d'], ['col_d'])
+
+    pass
+
+
 def read_from_excel():
     if vengeance.conditional.loads_excel_module is False:
         print('excel module excluded for platform compatibility')
@@ -796,6 +948,26 @@ def read_from_excel():
     pass
 
 
+def read_from_excel_files():
+    """
+    share.load_sheets() reads worksheets directly from the workbook files (requires openpyxl),
+    in parallel processes, without an Excel instance, so it also works on Linux / macOS
+
+    sheets already loaded (cached in share.wb_levs or share.wb_fluxes) are not read again
+    """
+    path = share.files_dir + 'example.xlsm'
+
+    fluxes = share.load_sheets([(path, 'sheet1'),
+                                (path, 'sheet2'),
+                                (path, 'subsections', {'c_1': '<sect_2>',
+                                                       'c_2': '</sect_2>'})],
+                               workers=3)
+
+    flux = fluxes[(path, 'sheet1')]
+
+    pass
+
+
 def write_to_excel(flux: flux_cls):
     if vengeance.conditional.loads_excel_module is False:
         print('excel module excluded for platform compatibility')
@@ -842,12 +1014,26 @@ def flux_subclass():
     # flux.execute_commands(flux.commands, profiler='line_profiler')
     # flux.execute_commands(flux.commands, profiler='print_runtime')
 
+    # checkpoints: a rerun resumes after the last command that completed with the same input
+    # flux.execute_commands(flux.commands, checkpoint=share.files_dir + 'checkpoints')
+
+    # structured profile: wall / cpu time, memory, rows and columns changed by each command
+    flux = flux_custom_cls(m, product='apples')
+    profile = flux.profile_commands(flux.commands)
+    # profile = flux.execute_commands(flux.commands, profiler='profile')
+
+    # print(profile)
+    a = profile.slowest(3)
+    b = profile.to_flux()
+    c = profile.to_json()
+    d = profile.to_folded()
+
     flux.validate()
 
     pass
 
 
-class flux_custom_cls(flux_cls):
+class flux_custom_cls(flux_extended_cls):
 
     # high-level summary of state transformations
     commands = (('sort',  ('apples_sold', 'apples_bought'),
@@ -887,7 +1073,7 @@ class flux_custom_cls(flux_cls):
         self.num_unique_names = len(self.unique('name'))
 
     def _filter_apples_sold(self):
-        self.filter(lambda row: row.apples_sold >= 2)
+        self.filter(lambda row: row.apples_sold >= 2, optimize=True)
 
     def validate(self):
         error_indices = []
@@ -926,7 +1112,8 @@ def attribute_access_performance():
     """
     num_rows = 1_000_000
 
-    flux_a = flux_cls(share.random_matrix(num_rows))
+    # seeded and cached on disk: identical input across runs, without the cost of generating it each time
+    flux_a = flux_cls(share.random_matrix(num_rows, seed=0, cache=True))
     flux_b = flux_a.copy()
     flux_c = flux_a.copy()
     flux_d = flux_a.copy()
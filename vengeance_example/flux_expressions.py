@@ -0,0 +1,244 @@
+
+"""
+compiled row functions of flux_extended_cls:
+    * compile_row_expression(), used by flux_extended_cls.eval() / .where()
+    * optimized_row_function(), used by flux_extended_cls.filter(optimize=True)
+"""
+from functools import lru_cache
+
+from vengeance.util.iter import ColumnNameError
+
+
+# names available to flux_extended_cls.eval() / .where() expressions, in addition to columns and variables
+expression_builtins = {f.__name__: f for f in (abs, all, any, bool, dict, divmod, enumerate, float, frozenset,
+                                               int, isinstance, len, list, map, max, min, pow, range, repr,
+                                               reversed, round, set, sorted, str, sum, tuple, type, zip)}
+
+
+@lru_cache(maxsize=256)
+def compile_row_expression(expression, headers, variable_names=()):
+    """ :return: code object for
+            lambda _values_: {expression}
+    with each column name in expression replaced by _values_[i]
+
+    headers: tuple of (name, index) items, hashable for the cache
+    """
+    import ast
+
+    headers = dict(headers)
+    tree    = ast.parse(expression.strip(), mode='eval')
+
+    # names bound within the expression (eg, comprehension variables)
+    bound_names = {node.id for node in ast.walk(tree)
+                           if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load)}
+
+    # region {closure classes}
+    class column_index_transformer_cls(ast.NodeTransformer):
+        def visit_Name(self, node):
+            if node.id in bound_names:
+                return node
+
+            if node.id in headers:
+                index = ast.parse('_values_[{}]'.format(headers[node.id]), mode='eval').body
+                return ast.copy_location(index, node)
+
+            if node.id in variable_names or node.id in expression_builtins:
+                return node
+
+            raise ColumnNameError("'{}' is not a column, variable or builtin in expression: {}"
+                                  "\n\tavailable columns: {}".format(node.id, expression, list(headers.keys())))
+
+        def visit_Attribute(self, node):
+            if node.attr.startswith('_'):
+                raise ValueError("private attribute '{}' not allowed in expression: {}".format(node.attr, expression))
+
+            self.generic_visit(node)
+            return node
+    # endregion
+
+    body = column_index_transformer_cls().visit(tree).body
+
+    function_tree = ast.parse('lambda _values_: None', mode='eval')
+    function_tree.body.body = body
+    ast.fix_missing_locations(function_tree)
+
+    return compile(function_tree, '<expression: {}>'.format(expression), 'eval')
+
+
+def optimized_row_function(f, headers):
+    """ :return: f, rebuilt with row.col_a replaced by row.values[i] in its source
+
+    eg:
+        def starts_with_a(_row_):
+            return str(_row_.col_a).startswith('a')
+
+    is recompiled as
+        def starts_with_a(_row_):
+            return str(_row_.values[0]).startswith('a')
+
+    only attributes of f's first parameter (the row) are rewritten, and only
+    for names in headers that are not attributes of flux_row_cls itself
+    the rewritten function shares f's globals, defaults and closure cells, so
+    closure variables work as before
+
+    f is returned unchanged when it cannot be rewritten safely: source is unavailable
+    (eg, builtins, functions defined in the interpreter), the row parameter is
+    reassigned, a nested function has its own parameter with the same name, etc
+
+    rewritten code is cached per (f.__code__, header layout), see optimized_row_code()
+    """
+    from types import FunctionType
+    from types import MethodType
+
+    bound_self = getattr(f, '__self__', None) if isinstance(f, MethodType) else None
+    func       = f.__func__ if bound_self is not None else f
+
+    code = getattr(func, '__code__', None)
+    if code is None or not isinstance(func, FunctionType):
+        return f
+
+    optimized_code = optimized_row_code(code, tuple(headers.items()), param_index=int(bound_self is not None))
+    if optimized_code is None:
+        return f
+
+    optimized = FunctionType(optimized_code,
+                             func.__globals__,
+                             func.__name__,
+                             func.__defaults__,
+                             func.__closure__)
+    optimized.__kwdefaults__ = func.__kwdefaults__
+
+    if bound_self is not None:
+        return MethodType(optimized, bound_self)
+
+    return optimized
+
+
+@lru_cache(maxsize=256)
+def optimized_row_code(code, headers, param_index=0):
+    """ :return: rewritten code object, or None if code cannot be rewritten (see rewrite_row_code())
+
+    headers: tuple of (name, index) items, hashable for the cache
+    """
+    try:
+        return rewrite_row_code(code, dict(headers), param_index)
+    except (OSError, TypeError, SyntaxError, ValueError, NameError):
+        return None
+
+
+def rewrite_row_code(code, headers, param_index=0):
+    """ :return: rewritten function code object, or None if it cannot be safely rewritten
+
+    the source is found from the code object itself (not from a function, whose
+    source may be that of a function it wraps, see inspect.unwrap())
+    """
+    import ast
+    import inspect
+    import textwrap
+
+    from vengeance.classes.flux_row_cls import flux_row_cls
+
+    if code.co_argcount <= param_index:
+        return None
+
+    row_name = code.co_varnames[param_index]
+    reserved = set(flux_row_cls.reserved_names())
+
+    source = textwrap.dedent(inspect.getsource(code))
+    tree   = ast.parse(source)
+    ast.increment_lineno(tree, code.co_firstlineno - 1)
+
+    # region {closure functions}
+    def parameter_names(node):
+        a = node.args
+        return {p.arg for p in (a.posonlyargs + a.args + a.kwonlyargs + [a.vararg, a.kwarg]) if p is not None}
+
+    def find_function_node():
+        if code.co_name == '<lambda>':
+            lambdas = [node for node in ast.walk(tree)
+                            if isinstance(node, ast.Lambda)
+                            and [p.arg for p in node.args.args] == list(code.co_varnames[:code.co_argcount])]
+            return lambdas[0] if len(lambdas) == 1 else None
+
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == code.co_name:
+                return node
+
+        return None
+
+    def is_rewrite_safe(node):
+        for child in ast.walk(node):
+            if isinstance(child, ast.Name) and child.id == row_name and not isinstance(child.ctx, ast.Load):
+                return False
+
+            is_nested_function = isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda))
+            if is_nested_function and child is not node and row_name in parameter_names(child):
+                return False
+
+        return True
+    # endregion
+
+    # region {closure classes}
+    class row_attribute_transformer_cls(ast.NodeTransformer):
+        def visit_Attribute(self, node):
+            self.generic_visit(node)
+
+            is_row_column = (isinstance(node.value, ast.Name) and
+                             node.value.id == row_name and
+                             node.attr in headers and
+                             node.attr not in reserved and
+                             not isinstance(node.ctx, ast.Del))
+            if not is_row_column:
+                return node
+
+            index = ast.parse('{}.values[{}]'.format(row_name, headers[node.attr]), mode='eval').body
+            index.ctx = node.ctx
+
+            return ast.copy_location(index, node)
+    # endregion
+
+    function_node = find_function_node()
+    if function_node is None or not is_rewrite_safe(function_node):
+        return None
+
+    # defaults and annotations are evaluated when the function is defined:
+    # the original function's defaults are reused instead
+    a = function_node.args
+    a.defaults    = []
+    a.kw_defaults = [None] * len(a.kwonlyargs)
+    for p in (a.posonlyargs + a.args + a.kwonlyargs + [a.vararg, a.kwarg]):
+        if p is not None:
+            p.annotation = None
+
+    if isinstance(function_node, ast.Lambda):
+        statement = ast.parse('__optimized__ = None').body[0]
+        statement.value = function_node
+        function_name   = '__optimized__'
+    else:
+        function_node.decorator_list = []
+        function_node.returns        = None
+        statement     = function_node
+        function_name = function_node.name
+
+    statement = row_attribute_transformer_cls().visit(statement)
+
+    # closure variables become parameters of a factory function, so
+    # the rewritten function is compiled with the same free variables
+    factory = ast.parse('def __optimized_factory__({}):\n'
+                        '    return {}'.format(', '.join(code.co_freevars), function_name)).body[0]
+    factory.body.insert(0, statement)
+
+    module = ast.Module(body=[factory], type_ignores=[])
+    ast.fix_missing_locations(module)
+
+    namespace = {}
+    exec(compile(module, code.co_filename, 'exec'), namespace)
+
+    optimized = namespace['__optimized_factory__'](*[None] * len(code.co_freevars))
+    optimized_code = optimized.__code__
+
+    if optimized_code.co_freevars != code.co_freevars:
+        return None
+
+    return optimized_code
+
@@ -0,0 +1,1802 @@
+
+"""
+flux_extended_cls:
+    * flux_cls subclass with the additional methods used by the examples
+    * subclass this instead of flux_cls for command pipelines (see flux_example.flux_subclass())
+"""
+import os
+
+from collections import Counter
+from contextlib import contextmanager
+from operator import attrgetter
+from time import perf_counter
+from time import process_time
+from typing import Any
+from typing import Dict
+from typing import List
+
+from vengeance import flux_cls
+from vengeance.util.filesystem import is_path_a_url
+from vengeance.util.iter import ColumnNameError
+from vengeance.util.iter import iterator_to_collection
+from vengeance.util.iter import standardize_variable_arity_values
+
+try:
+    from flux_columns import categories_cls
+    from flux_columns import category_key
+    from flux_columns import categorized_rows
+    from flux_columns import column_plan_cls
+    from flux_columns import new_column_cls
+    from flux_columns import validate_inserted_items
+    from flux_columns import validate_names_as_indices
+    from flux_columns import validate_no_duplicate_names
+    from flux_columns import validate_no_names_intersect_with_headers
+    from flux_columns import validate_renamed_or_inserted_column
+    from flux_commands import checkpoint_store_cls
+    from flux_commands import command_nt
+    from flux_commands import command_profile_nt
+    from flux_commands import commands_profile_cls
+    from flux_expressions import compile_row_expression
+    from flux_expressions import expression_builtins
+    from flux_expressions import optimized_row_function
+    from flux_files import arrow_extensions
+    from flux_files import arrow_file_extension
+    from flux_files import compact_flux_file
+    from flux_files import is_chunked_flux_file
+    from flux_files import missing
+    from flux_files import read_flux_chunk_table
+    from flux_files import read_flux_chunks
+    from flux_files import write_chunked_flux_file
+    from flux_groups import group_index_cls
+    from flux_memory import atomic_types
+    from flux_memory import deep_sizeof
+    from flux_out_of_core import column_indices
+    from flux_out_of_core import grouped_rows
+    from flux_out_of_core import max_open_spill_files
+    from flux_out_of_core import memory_bounded_runs
+    from flux_out_of_core import parse_memory_size
+    from flux_out_of_core import read_file_rows
+    from flux_out_of_core import read_spill_file
+    from flux_out_of_core import row_key_function
+    from flux_out_of_core import sort_key_cls
+    from flux_out_of_core import sort_rows
+    from flux_out_of_core import write_file_rows
+    from flux_out_of_core import write_spill_file
+    from flux_parallel import aggregate_rows
+    from flux_parallel import aggregate_shared_rows
+    from flux_parallel import encoded_column
+    from flux_parallel import parallel_reducers
+    from flux_parallel import shared_column
+    from flux_rows import batched_rows
+    from flux_rows import row_blocks_cls
+    from flux_rows import row_namedtuple_class
+except (ModuleNotFoundError, ImportError):
+    from .flux_columns import categories_cls
+    from .flux_columns import category_key
+    from .flux_columns import categorized_rows
+    from .flux_columns import column_plan_cls
+    from .flux_columns import new_column_cls
+    from .flux_columns import validate_inserted_items
+    from .flux_columns import validate_names_as_indices
+    from .flux_columns import validate_no_duplicate_names
+    from .flux_columns import validate_no_names_intersect_with_headers
+    from .flux_columns import validate_renamed_or_inserted_column
+    from .flux_commands import checkpoint_store_cls
+    from .flux_commands import command_nt
+    from .flux_commands import command_profile_nt
+    from .flux_commands import commands_profile_cls
+    from .flux_expressions import compile_row_expression
+    from .flux_expressions import expression_builtins
+    from .flux_expressions import optimized_row_function
+    from .flux_files import arrow_extensions
+    from .flux_files import arrow_file_extension
+    from .flux_files import compact_flux_file
+    from .flux_files import is_chunked_flux_file
+    from .flux_files import missing
+    from .flux_files import read_flux_chunk_table
+    from .flux_files import read_flux_chunks
+    from .flux_files import write_chunked_flux_file
+    from .flux_groups import group_index_cls
+    from .flux_memory import atomic_types
+    from .flux_memory import deep_sizeof
+    from .flux_out_of_core import column_indices
+    from .flux_out_of_core import grouped_rows
+    from .flux_out_of_core import max_open_spill_files
+    from .flux_out_of_core import memory_bounded_runs
+    from .flux_out_of_core import parse_memory_size
+    from .flux_out_of_core import read_file_rows
+    from .flux_out_of_core import read_spill_file
+    from .flux_out_of_core import row_key_function
+    from .flux_out_of_core import sort_key_cls
+    from .flux_out_of_core import sort_rows
+    from .flux_out_of_core import write_file_rows
+    from .flux_out_of_core import write_spill_file
+    from .flux_parallel import aggregate_rows
+    from .flux_parallel import aggregate_shared_rows
+    from .flux_parallel import encoded_column
+    from .flux_parallel import parallel_reducers
+    from .flux_parallel import shared_column
+    from .flux_rows import batched_rows
+    from .flux_rows import row_blocks_cls
+    from .flux_rows import row_namedtuple_class
+
+
+class flux_extended_cls(flux_cls):
+
+    def __init__(self, matrix=None):
+        super().__init__(matrix)
+        self.validate_row_lengths()
+
+    # region {row length tracking}
+    def validate_row_lengths(self):
+        """ recompute the row length histogram used by .is_jagged() and repr()
+
+        the histogram is kept up to date by flux methods that add, remove or
+        reshape rows; call this after modifying row.values or flux.matrix directly, eg
+            flux.matrix[5].values.append('extra')
+            flux.validate_row_lengths()
+        """
+        self.__row_lengths = Counter([len(row.values) for row in self.matrix])
+        return self
+
+    def row_lengths(self) -> Dict[int, int]:
+        """ {len(row.values): number of rows}, including header row """
+        self.__sync_row_lengths()
+        return dict(self.__row_lengths)
+
+    def is_jagged(self) -> bool:
+        """ O(1): compares the row length histogram to the number of headers """
+        self.__sync_row_lengths()
+        return self.__row_lengths.get(len(self.headers), 0) != len(self.matrix)
+
+    def jagged_rows(self):
+        if not self.is_jagged():
+            return
+
+        yield from super().jagged_rows()
+
+    def __sync_row_lengths(self):
+        """ rows added or removed through flux.matrix directly are caught by their count """
+        row_lengths = self.__dict__.get('_flux_extended_cls__row_lengths')
+        if row_lengths is None or sum(row_lengths.values()) != len(self.matrix):
+            self.validate_row_lengths()
+
+    def __track_row_lengths(self, method, *args, **kwargs):
+        """ for methods that reshape columns or remove rows:
+        if rows were not jagged before method, they are not jagged after it
+        """
+        was_jagged = self.is_jagged()
+        method(*args, **kwargs)
+
+        if was_jagged:
+            self.validate_row_lengths()
+        else:
+            self.__row_lengths = Counter({len(self.headers): len(self.matrix)})
+
+        return self
+
+    def reset_matrix(self, m):
+        super().reset_matrix(m)
+        return self.validate_row_lengths()
+
+    def insert_rows(self, i, rows):
+        from itertools import islice
+
+        if self.is_empty():
+            return super().insert_rows(i, rows)
+
+        self.__sync_row_lengths()
+        num_rows = len(self.matrix)
+
+        # negative positions count from the end, as list.insert(); rows are never inserted above the header
+        if i is None:
+            i = num_rows
+        elif i < 0:
+            i += num_rows
+        i = min(max(i, 1), num_rows)
+
+        super().insert_rows(i, rows)
+
+        num_inserted = len(self.matrix) - num_rows
+        self.__row_lengths.update([len(row.values) for row in islice(self.matrix, i, i + num_inserted)])
+
+        return self
+
+    def shorten_to(self, nrows):
+        self.__sync_row_lengths()
+        removed = [len(row.values) for row in self.matrix[max(nrows, 1) + 1:]]
+
+        super().shorten_to(nrows)
+
+        self.__row_lengths.subtract(removed)
+        self.__row_lengths += Counter()
+
+        return self
+
+    def filter(self, f, *args, optimize=False, **kwargs):
+        """ in-place
+
+        optimize:
+            rewrite row.col_a attribute accesses in f to row.values[i] index lookups
+            (see optimized_row_function()); falls back to f if it cannot be rewritten safely
+        """
+        if optimize:
+            f = optimized_row_function(f, self.headers)
+
+        super().filter(f, *args, **kwargs)
+        return self.validate_row_lengths()
+
+    def filtered(self, f, *args, optimize=False, **kwargs):
+        """ :return: new flux_cls, see .filter() for optimize """
+        if optimize:
+            f = optimized_row_function(f, self.headers)
+
+        return super().filtered(f, *args, **kwargs).validate_row_lengths()
+
+    def copy(self, deep=False):
+        self.__sync_row_lengths()
+
+        flux = super().copy(deep)
+        flux.__dict__.pop('_flux_extended_cls__column_plan', None)
+        if not deep and '_flux_extended_cls__categories' in flux.__dict__:
+            flux.__categories = dict(flux.__categories)
+
+        # flux_cls.copy() copies the instance __dict__: the copy must not share self's histogram
+        flux.__row_lengths = Counter(self.__row_lengths)
+
+        return flux
+    # endregion
+
+    # region {column restructuring}
+    @contextmanager
+    def restructure(self):
+        """ defer column methods until the end of the block, then rebuild every row once
+
+        eg:
+            with flux.restructure():
+                flux.insert_columns((0, 'inserted_a'))
+                flux.append_columns('appended_a', 'appended_b', values=0.0)
+                flux.delete_columns('col_b', 'col_c')
+                flux.rename_columns({'col_a': 'renamed_a'})
+
+        deferred: .insert_columns(), .append_columns(), .delete_columns(),
+                  .reassign_columns(), .rename_columns(), .fill(), .assign()
+        each column method compiles into a single index map of the final columns,
+        instead of passing over every row once per method (or once per column)
+
+        rows are not modified until the block exits, so other methods should not be
+        used inside the block; if an exception is raised, no columns are changed
+        """
+        if self.__dict__.get('_flux_extended_cls__column_plan') is not None:
+            yield self
+            return
+
+        self.__column_plan = column_plan_cls(self.header_names())
+        try:
+            yield self
+            plan = self.__column_plan
+        finally:
+            self.__column_plan = None
+
+        self.__track_row_lengths(self.__apply_column_plan, plan)
+
+        for source, values, is_scalar in plan.assignments:
+            i = plan.index(source)
+            if i is None:
+                continue
+
+            if is_scalar: self.fill(i, values)
+            else:         self.assign(i, values)
+
+    def __apply_column_plan(self, plan):
+        import gc
+        from operator import itemgetter
+
+        if self.is_jagged():
+            return self.__replay_column_plan(plan)
+
+        if not plan.names:
+            return self.reset_matrix(None)
+
+        if plan.is_identity():
+            if plan.names != self.header_names():
+                self.reset_headers(plan.names)
+
+            return self
+
+        num_cols    = len(plan.sources_original)
+        new_columns = [(i, source) for i, source in enumerate(plan.sources) if isinstance(source, new_column_cls)]
+        pad         = [None] * len(new_columns)
+
+        # new columns index into pad, which is appended to each row's values
+        indices = []
+        i_pad   = num_cols
+        for source in plan.sources:
+            if isinstance(source, new_column_cls):
+                indices.append(i_pad)
+                i_pad += 1
+            else:
+                indices.append(source)
+
+        if len(indices) == 1:
+            i_single = indices[0]
+            getter   = lambda _values_: (_values_[i_single],)
+        else:
+            getter = itemgetter(*indices)
+
+        gc_enabled = gc.isenabled()
+        if gc_enabled: gc.disable()
+
+        is_append_only = (plan.sources[:num_cols] == plan.sources_original)
+
+        if is_append_only:
+            for row in self.matrix[1:]:
+                row.values.extend(pad)
+        else:
+            for row in self.matrix[1:]:
+                v = row.values
+                v.extend(pad)
+                v[:] = getter(v)
+
+        if gc_enabled: gc.enable()
+
+        self.reset_headers(plan.names)
+
+        for i, column in new_columns:
+            column.assign(self.matrix[1:], i)
+
+        return self
+
+    def __replay_column_plan(self, plan):
+        """ rows of different lengths: apply each column method as flux_cls would, in order
+        (eg appended values follow a row's extra values, deleting a column missing from a short row raises IndexError)
+        """
+        for method_name, args, kwargs in plan.operations:
+            getattr(flux_cls, method_name)(self, *args, **kwargs)
+
+        return self
+
+    def insert_columns(self, *names, after=False):
+        plan = self.__dict__.get('_flux_extended_cls__column_plan')
+        if plan is None:
+            with self.restructure():
+                return self.insert_columns(*names, after=after)
+
+        names = standardize_variable_arity_values(names, depth=1)
+        if not names:
+            return self
+
+        plan.record('insert_columns', names, after=after)
+
+        names = validate_inserted_items(names, plan.headers())
+
+        for before, header in reversed(names):
+            if isinstance(before, int): i = before
+            else:                       i = plan.names.index(before)
+
+            if after:
+                i += 1
+
+            plan.names.insert(i, header)
+            plan.sources.insert(i, new_column_cls())
+
+        return self
+
+    def append_columns(self, *names, values=None):
+        plan = self.__dict__.get('_flux_extended_cls__column_plan')
+        if plan is None:
+            with self.restructure():
+                return self.append_columns(*names, values=values)
+
+        names = standardize_variable_arity_values(names, depth=1)
+        if not names:
+            return self
+
+        values = iterator_to_collection(values)
+        plan.record('append_columns', names, values=values)
+
+        validate_no_duplicate_names(names)
+        validate_no_names_intersect_with_headers(names, plan.headers())
+
+        plan.names.extend(names)
+        plan.sources.extend(new_column_cls.from_values(values, len(names), self.num_rows))
+
+        return self
+
+    def delete_columns(self, *names):
+        plan = self.__dict__.get('_flux_extended_cls__column_plan')
+        if plan is None:
+            with self.restructure():
+                return self.delete_columns(*names)
+
+        names = standardize_variable_arity_values(names, depth=1)
+        if not names:
+            return self
+
+        plan.record('delete_columns', names)
+
+        indices = validate_names_as_indices(names, plan.headers())
+        indices = validate_no_duplicate_names(indices)
+
+        for i in sorted(indices, reverse=True):
+            del plan.names[i]
+            del plan.sources[i]
+
+        return self
+
+    def reassign_columns(self, *names):
+        plan = self.__dict__.get('_flux_extended_cls__column_plan')
+        if plan is None:
+            if self.is_empty():
+                raise ValueError('matrix is empty')
+
+            with self.restructure():
+                return self.reassign_columns(*names)
+
+        names = standardize_variable_arity_values(names, depth=1)
+        if not names:
+            return self
+
+        plan.record('reassign_columns', names)
+
+        if isinstance(names, dict):
+            names = [names]
+
+        headers = plan.headers()
+        names   = [validate_renamed_or_inserted_column(name, headers) for name in names]
+
+        sources = []
+        for name in names:
+            if name in headers: sources.append(plan.sources[headers[name]])
+            else:               sources.append(new_column_cls())
+
+        plan.names   = names
+        plan.sources = sources
+
+        return self
+
+    def rename_columns(self, old_to_new_mapping):
+        plan = self.__dict__.get('_flux_extended_cls__column_plan')
+        if plan is None:
+            return super().rename_columns(old_to_new_mapping)
+
+        plan.record('rename_columns', old_to_new_mapping)
+
+        if not isinstance(old_to_new_mapping, dict):
+            raise TypeError('old_to_new_mapping must be a dictionary')
+
+        headers = plan.headers()
+        for h_old, h_new in old_to_new_mapping.items():
+            plan.names[headers[h_old]] = h_new
+
+        return self
+    # endregion
+
+    # region {column values}
+    def fill(self, name, value):
+        """ set a single value to every row in column, appending the column if it does not exist
+
+        eg:
+            flux.fill('col_z', 'blah')
+            flux.fill('col_z', None)
+
+        replaces
+            flux['col_z'] = ['blah'] * flux.num_rows
+        without building a list of num_rows references
+
+        value is always treated as a single value, even if it is a list
+        (every row references the same object, as with [[1, 2, 3]] * flux.num_rows)
+        """
+        from itertools import islice
+
+        # region {closure functions}
+        def append_filled_column():
+            for row in islice(self.matrix, 1, None):
+                row.values.append(value)
+
+            self.reset_headers(self.header_names() + [name])
+        # endregion
+
+        plan = self.__dict__.get('_flux_extended_cls__column_plan')
+        if plan is not None:
+            plan.defer_assignment(name, value, is_scalar=True)
+            return self
+
+        is_appended = (name not in self.headers and not isinstance(name, int))
+
+        if is_appended and not self.is_jagged():
+            return self.__track_row_lengths(append_filled_column)
+
+        i = self.__column_index(name)
+
+        for row in islice(self.matrix, 1, None):
+            row.values[i] = value
+
+        return self
+
+    def assign(self, name, values):
+        """ set values to column, appending the column if it does not exist
+
+        values may be:
+            a single value:         flux.assign('col_z', 100.0)                    (same as .fill())
+            a callable:             flux.assign('col_z', lambda row: row.col_a + row.col_b)
+            an iterator / iterable: flux.assign('col_z', (v.lower() for v in flux['col_c']))
+
+        raises IndexError if values has more or fewer items than flux has rows; the flux is
+        left unchanged: values without a len() (callables, iterators) are evaluated into a
+        list before any row is assigned, and that list is checked first. an exception raised
+        by a callable also leaves the column as it was
+        """
+        from itertools import islice
+
+        plan = self.__dict__.get('_flux_extended_cls__column_plan')
+        if plan is not None:
+            plan.defer_assignment(name, values, is_scalar=False)
+            return self
+
+        if callable(values):
+            values = map(values, islice(self.matrix, 1, None))
+        elif isinstance(values, (str, bytes)) or not hasattr(values, '__iter__'):
+            return self.fill(name, values)
+
+        num_rows = self.num_rows
+        is_sized = hasattr(values, '__len__')
+        if not is_sized:
+            values = list(islice(values, num_rows + 1))
+
+        if len(values) != num_rows:
+            if is_sized or len(values) < num_rows: num_values = format(len(values), ',')
+            else:                                  num_values = 'more than {:,}'.format(num_rows)
+
+            raise IndexError('invalid number of column values\n\t'
+                             'expected: {:,} rows\n\t'
+                             'recieved: {} rows'.format(num_rows, num_values))
+
+        i = self.__column_index(name)
+        for row, v in zip(islice(self.matrix, 1, None), values):
+            row.values[i] = v
+
+        return self
+
+    def eval(self, expression, **variables):
+        """ :return: iterator of expression evaluated for each row
+
+        eg:
+            flux.assign('col_new', flux.eval('value_a * 1.1 + cost'))
+            flux.assign('col_new', flux.eval('(col_a, col_b, col_c)'))
+            flux.assign('col_new', flux.eval('value_a * rate', rate=1.1))
+
+        column names in expression are compiled to index lookups on row.values,
+        instead of row.col_a attribute access on each row; names that are not columns
+        must be passed as keyword variables, or be one of expression_builtins;
+        ColumnNameError is raised if a variable has the same name as a column
+        compiled expressions are cached by expression text and header layout
+        """
+        f = self.__compiled_expression(expression, variables)
+        return map(f, [row.values for row in self.matrix[1:]])
+
+    def where(self, expression, **variables):
+        """ in-place filter by expression (see .eval())
+
+        eg:
+            flux.where('apples_sold >= 2 and name != None')
+            flux.where('col_a in criteria', criteria={'a', 'b'})
+        """
+        from itertools import compress
+
+        # region {closure functions}
+        def filter_rows():
+            rows = self.matrix[1:]
+            self.matrix[1:] = list(compress(rows, map(f, [row.values for row in rows])))
+        # endregion
+
+        f = self.__compiled_expression(expression, variables)
+
+        return self.__track_row_lengths(filter_rows)
+
+    def categorize(self, *names, categories=None):
+        """ dictionary-encode columns: rows with equal values share a single value object,
+        and each column keeps a {value: int code} dictionary (see .category_codes());
+        equal values of different types (1, 1.0, True) are separate categories
+
+        values read from a file are separate objects, even when a short code like 'abc'
+        repeats millions of times; after .categorize(), each distinct value is stored once and
+        rows refer to it, so
+            * the column costs one pointer per row, plus one object per distinct value
+            * each distinct value is hashed once (str caches its hash), and dict lookups
+              compare by identity first: faster .map_rows(), .unique(), .filter_by_unique(), joins
+        values are unchanged: every flux method and row.col_a work as before
+
+        eg:
+            flux.categorize('col_a', 'col_b')
+            flux.categorize()                       # all columns
+
+            # share categories between fluxes, so join keys are the same objects and have the same codes
+            categories = categories_cls()
+            flux_a.categorize('col_a', categories=categories)
+            flux_b.categorize('col_a', categories=categories)
+
+        categories:
+            categories_cls to encode into, shared by all names
+            by default, each column has its own, kept across calls
+        """
+        from collections import deque
+
+        if not names:
+            names = self.header_names()
+
+        names   = list(names[0]) if (len(names) == 1 and isinstance(names[0], (list, tuple))) else list(names)
+        indices = validate_names_as_indices(names, self.headers)
+        names   = [self.header_names()[i] for i in indices]
+
+        column_categories = self.__column_categories()
+        for name in names:
+            if categories is not None:
+                column_categories[name] = categories
+            else:
+                column_categories.setdefault(name, categories_cls())
+
+        rows = categorized_rows((row.values for row in self.matrix[1:]),
+                                indices,
+                                [column_categories[name] for name in names])
+        deque(rows, maxlen=0)
+
+        return self
+
+    def category_codes(self, name):
+        """ :return: (array of int codes, one per row, list of categories)
+
+        eg:
+            codes, categories = flux.category_codes('col_a')
+            categories[codes[0]] == flux.matrix[1].col_a
+
+        codes are those of the column's categories_cls (see .categorize()): equal across calls,
+        and across fluxes that share categories; values added since .categorize() are given new codes
+        columns that were not categorized are encoded for this call only, in order of first appearance
+        """
+        from array import array
+        from operator import itemgetter
+
+        i          = validate_names_as_indices(name, self.headers)[0]
+        categories = self.__column_categories().get(self.header_names()[i]) or categories_cls()
+        codes      = categories.codes
+        values     = lambda: map(itemgetter(i), map(attrgetter('values'), self.matrix[1:]))
+
+        try:
+            a = array('q', map(codes.__getitem__, map(category_key, values())))
+        except KeyError:
+            category_values = categories.values
+
+            a = array('q')
+            for v in values():
+                k = category_key(v)
+                c = codes.get(k)
+                if c is None:
+                    c = codes[k] = len(category_values)
+                    category_values.append(v)
+
+                a.append(c)
+
+        return a, list(categories.values)
+
+    def __column_categories(self) -> Dict[Any, categories_cls]:
+        """ {column name: categories_cls} of categorized columns """
+        column_categories = self.__dict__.get('_flux_extended_cls__categories')
+        if column_categories is None:
+            column_categories = self.__categories = {}
+
+        return column_categories
+
+    def __compiled_expression(self, expression, variables):
+        conflicting = self.headers.keys() & variables.keys()
+        if conflicting:
+            raise ColumnNameError('expression variables conflict with column names: \n{}\n\t'
+                                  '(column names in expression always refer to columns, '
+                                  'rename the variables)'.format(conflicting))
+
+        code = compile_row_expression(expression,
+                                      tuple(self.headers.items()),
+                                      tuple(sorted(variables.keys())))
+
+        namespace = {'__builtins__': expression_builtins}
+        namespace.update(variables)
+
+        return eval(code, namespace)
+
+    def __column_index(self, name) -> int:
+        if name not in self.headers and not isinstance(name, int):
+            self.append_columns(name)
+
+        return validate_names_as_indices(name, self.headers)[0]
+    # endregion
+
+    # region {row conversion}
+    def dicts(self, r_1=1, r_2=None, batch=None):
+        """ batch: yield lists of up to batch rows instead of single rows, eg
+            for rows in flux.dicts(batch=10_000):
+                cursor.executemany(sql, rows)
+        """
+        return batched_rows(super().dicts(r_1, r_2), batch)
+
+    def namedrows(self, r_1=1, r_2=None, batch=None):
+        """ see .dicts() for batch """
+        return batched_rows(super().namedrows(r_1, r_2), batch)
+
+    def namedtuples(self, r_1=1, r_2=None, batch=None):
+        """ the namedtuple class is cached per column names (see .namedtuple_class())
+        rather than created on every call, and rows are converted with its ._make()
+        see .dicts() for batch
+        """
+        row_nt = self.namedtuple_class()
+        rows   = map(row_nt._make, map(attrgetter('values'), self.matrix[r_1:r_2]))
+
+        return batched_rows(rows, batch)
+
+    def tuples(self, r_1=1, r_2=None, batch=None):
+        """ row values as tuples, eg for database drivers
+        see .dicts() for batch
+        """
+        rows = map(tuple, map(attrgetter('values'), self.matrix[r_1:r_2]))
+        return batched_rows(rows, batch)
+
+    def namedtuple_class(self):
+        """ namedtuple class of .namedtuples(), shared by all fluxes with the same column names """
+        return row_namedtuple_class(tuple(self.header_names()))
+    # endregion
+
+    def execute_commands(self, commands,
+                               profiler=False,
+                               print_commands=False,
+                               checkpoint=None):
+        """
+        profiler='profile':
+            return a commands_profile_cls with time, memory and shape changes
+            recorded for each command (see .profile_commands())
+
+        checkpoint: checkpoint_store_cls, or a directory
+            resume from the latest checkpoint matching this input and these commands,
+            skipping every command before it (see checkpoint_store_cls)
+        """
+        if str(profiler).lower() == 'profile':
+            return self.profile_commands(commands)
+
+        if checkpoint is not None:
+            if profiler:
+                raise ValueError('profiler cannot be combined with checkpoint')
+
+            return self.__execute_commands_checkpointed(commands, checkpoint, print_commands)
+
+        return super().execute_commands(commands,
+                                        profiler=profiler,
+                                        print_commands=print_commands)
+
+    def __execute_commands_checkpointed(self, commands, store, print_commands):
+        if not isinstance(store, checkpoint_store_cls):
+            store = checkpoint_store_cls(store)
+
+        commands = self._parse_commands(commands)
+        keys     = store.command_keys(self, commands)
+
+        i_resume = 0
+        for i in reversed(range(len(commands))):
+            state = store.load(keys[i])
+            if state is not None:
+                self._restore_state(state)
+                i_resume = i + 1
+                break
+
+        if print_commands and i_resume:
+            print('    resumed from checkpoint after ⟨{}⟩  @{}'.format(i_resume - 1, commands[i_resume - 1].attr))
+
+        for i, command in enumerate(commands[i_resume:], i_resume):
+            if print_commands:
+                print('    ⟨{}⟩  @{}'.format(i, command.attr))
+
+            w_1 = perf_counter()
+            command.method(*command.args, **command.kwargs)
+            w_2 = perf_counter()
+
+            if (w_2 - w_1) >= store.min_seconds:
+                store.save(keys[i], self._capture_state())
+
+        return commands
+
+    def _capture_state(self) -> dict:
+        """ row values and instance attributes: everything needed to resume a pipeline """
+        return {'matrix':     [row.values for row in self.matrix],
+                'attributes': self._captured_attributes()}
+
+    def _captured_attributes(self) -> dict:
+        """ instance attributes, other than headers, matrix and derived state """
+        return {k: v for k, v in self.__dict__.items()
+                     if k not in ('headers',
+                                  'matrix',
+                                  '_flux_extended_cls__row_lengths',
+                                  '_flux_extended_cls__column_plan')}
+
+    def _restore_state(self, state):
+        self.reset_matrix(state['matrix'])
+        self.__dict__.update(state['attributes'])
+
+    def profile_commands(self, commands, trace_memory=True) -> 'commands_profile_cls':
+        """ execute commands and record a structured profile for each one
+
+        eg:
+            profile = flux.profile_commands(flux.commands)
+            print(profile)
+            profile.to_json('profile.json')
+            profile.to_folded('profile.folded')        # input for flamegraph.pl / speedscope
+
+        trace_memory:
+            tracemalloc peak and net allocations per command; tracemalloc
+            slows down allocation-heavy code, so wall times are inflated
+        """
+        import tracemalloc
+
+        started_tracing = trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+
+        profiles = []
+
+        try:
+            for i, command in enumerate(self._parse_commands(commands)):
+                headers_in = list(self.headers.keys())
+                rows_in    = self.num_rows
+
+                if trace_memory:
+                    tracemalloc.reset_peak()
+                    mem_1, _ = tracemalloc.get_traced_memory()
+
+                w_1 = perf_counter()
+                c_1 = process_time()
+
+                command.method(*command.args, **command.kwargs)
+
+                c_2 = process_time()
+                w_2 = perf_counter()
+
+                if trace_memory:
+                    mem_2, mem_peak = tracemalloc.get_traced_memory()
+                    mem_peak = mem_peak - mem_1
+                    mem_net  = mem_2 - mem_1
+                else:
+                    mem_peak = None
+                    mem_net  = None
+
+                headers_out = list(self.headers.keys())
+
+                profiles.append(command_profile_nt(i,
+                                                   command.attr,
+                                                   command.args,
+                                                   command.kwargs,
+                                                   w_2 - w_1,
+                                                   c_2 - c_1,
+                                                   mem_peak,
+                                                   mem_net,
+                                                   rows_in,
+                                                   self.num_rows,
+                                                   [h for h in headers_out if h not in headers_in],
+                                                   [h for h in headers_in if h not in headers_out]))
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+
+        return commands_profile_cls(self.__class__.__name__, profiles)
+
+    def memory_usage(self, deep=True, sample_nrows=None) -> flux_cls:
+        """ bytes used by the flux, by structure and by column
+
+        eg:
+            print(flux.memory_usage())
+            print(flux.memory_usage(sample_nrows=10_000))      # estimated from 10,000 evenly spaced rows
+
+            # compare rowtypes of .map_rows_append()
+            n = deep_sizeof(flux.map_rows_append('col_a', rowtype='namedtuple'))
+
+        :return: flux_cls with columns ['name', 'kind', 'objects', 'bytes', 'percent']
+            flux:          flux object and its attribute dict
+            headers:       headers dict and header row, shared by all rows
+            matrix:        list of row references
+            row objects:   flux_row_cls instances and their attribute dicts
+            value lists:   row.values lists (references to values only)
+            {column}:      value objects of each column (deep=True)
+            total
+
+        deep:
+            include value objects, each counted once: values shared by many rows
+            (eg, after .categorize(), small ints) are not counted again, and values
+            shared by several columns are counted in the first of them
+        sample_nrows:
+            measure evenly spaced rows only and scale to the number of rows; values
+            seen once in the sample are scaled, values repeated in the sample are
+            assumed to be shared and are counted once
+        """
+        import sys
+
+        rows     = self.matrix[1:]
+        num_rows = len(rows)
+
+        if sample_nrows and num_rows > sample_nrows:
+            step  = num_rows / sample_nrows
+            rows  = [rows[int(j * step)] for j in range(sample_nrows)]
+            scale = num_rows / len(rows)
+        else:
+            scale = 1
+
+        header_row = self.matrix[0] if self.matrix else None
+        seen       = set()
+
+        m = [['name', 'kind', 'objects', 'bytes']]
+        m.append(['flux', 'structure', 2, sys.getsizeof(self) + sys.getsizeof(self.__dict__)])
+
+        if header_row is not None:
+            m.append(['headers', 'structure', None, deep_sizeof(self.headers, seen) +
+                                                    deep_sizeof(header_row, seen)])
+
+        m.append(['matrix', 'structure', 1, sys.getsizeof(self.matrix)])
+        m.append(['row objects', 'structure', num_rows * 2,
+                  round(sum(sys.getsizeof(row) + sys.getsizeof(row.__dict__) for row in rows) * scale)])
+        m.append(['value lists', 'structure', num_rows,
+                  round(sum(sys.getsizeof(row.values) for row in rows) * scale)])
+
+        for name, i in (self.headers.items() if deep else ()):
+            counts = Counter()
+            nbytes = {}
+
+            for row in rows:
+                values = row.values
+                if i >= len(values):
+                    continue
+
+                v = values[i]
+                k = id(v)
+
+                if k in nbytes:
+                    counts[k] += 1
+                elif k not in seen:
+                    counts[k] = 1
+                    if type(v) in atomic_types:
+                        nbytes[k] = sys.getsizeof(v)
+                        seen.add(k)
+                    else:
+                        nbytes[k] = deep_sizeof(v, seen)
+
+            num_shared  = sum(1 for c in counts.values() if c > 1)
+            num_objects = num_shared + (len(counts) - num_shared) * scale
+            num_bytes   = sum(nbytes[k] if c > 1 else nbytes[k] * scale for k, c in counts.items())
+
+            m.append([name, 'column', round(num_objects), round(num_bytes)])
+
+        total = sum(row[3] for row in m[1:])
+        m.append(['total', 'total', None, total])
+
+        for row in m[1:]:
+            row.append(round(row[3] / max(total, 1) * 100, 1))
+        m[0].append('percent')
+
+        return flux_cls(m)
+
+    def to_numpy(self, *names, dtype=None, structured=False):
+        """ requires numpy
+
+        2D array of all values (or named columns):
+            a = flux.to_numpy(dtype=float)
+            a = flux.to_numpy('col_b', 'col_c', dtype=float)
+
+        structured array, each column has its own dtype:
+            a = flux.to_numpy(structured=True)
+            a = flux.to_numpy(dtype=[('col_a', 'U3'), ('col_b', float)])
+
+        when dtype is given, values are streamed from rows directly into the
+        array's buffer with numpy.fromiter (no intermediate lists); dtype=None
+        lets numpy infer types, which needs the values as lists first
+        """
+        import numpy
+        from itertools import chain
+        from operator import itemgetter
+
+        if names == ():
+            names = self.header_names()
+        elif len(names) == 1 and isinstance(names[0], (list, tuple)):
+            names = names[0]
+
+        dtype = numpy.dtype(dtype) if dtype is not None else None
+        if dtype is not None and dtype.names:
+            names      = dtype.names
+            structured = True
+
+        indices  = [self.headers[name] for name in names]
+        rows     = self.matrix[1:]
+        num_rows = len(rows)
+
+        if structured:
+            columns = []
+            for name, i in zip(names, indices):
+                values = map(itemgetter(i), (row.values for row in rows))
+
+                if dtype is None:
+                    columns.append(numpy.array(list(values)))
+                elif dtype[name].hasobject or dtype[name].kind in 'USV':
+                    columns.append(numpy.array(list(values), dtype=dtype[name]))
+                else:
+                    columns.append(numpy.fromiter(values, dtype=dtype[name], count=num_rows))
+
+            if dtype is None:
+                dtype = numpy.dtype([(str(name), c.dtype) for name, c in zip(names, columns)])
+
+            a = numpy.empty(num_rows, dtype=dtype)
+            for name, c in zip(dtype.names, columns):
+                a[name] = c
+
+            return a
+
+        if num_rows == 0:
+            return numpy.empty((0, len(indices)), dtype=dtype)
+
+        if indices == list(range(self.num_cols)):
+            values = (row.values for row in rows)
+        elif len(indices) == 1:
+            values = ((row.values[indices[0]],) for row in rows)
+        else:
+            ig     = itemgetter(*indices)
+            values = (ig(row.values) for row in rows)
+
+        if dtype is None or dtype.hasobject or dtype.kind in 'USV':
+            return numpy.array(list(values), dtype=dtype)
+
+        a = numpy.fromiter(chain.from_iterable(values), dtype=dtype, count=num_rows * len(indices))
+        return a.reshape(num_rows, len(indices))
+
+    @classmethod
+    def from_numpy(cls, a, headers=None):
+        """ requires numpy
+
+        flux = flux_extended_cls.from_numpy(a, ['col_a', 'col_b', 'col_c'])
+        flux = flux_extended_cls.from_numpy(structured_a)        # headers from dtype names
+
+        a.tolist() converts the whole buffer to python values in a single call,
+        rather than one numpy scalar at a time
+        """
+        import gc
+
+        if a.dtype.names:
+            headers = headers or list(a.dtype.names)
+        elif headers is None:
+            raise ValueError('headers required for arrays without field names')
+
+        if a.ndim == 1 and not a.dtype.names:
+            a = a.reshape(-1, 1)
+        elif a.ndim > 2:
+            raise ValueError('array must be one or two dimensional, not {}'.format(a.ndim))
+
+        gc_enabled = gc.isenabled()
+        if gc_enabled: gc.disable()
+
+        m = [list(headers)]
+        if a.dtype.names:
+            m.extend(map(list, a.tolist()))
+        else:
+            m.extend(a.tolist())
+
+        if gc_enabled: gc.enable()
+
+        return cls(m)
+
+    def to_file(self, path,
+                      encoding=None,
+                      filetype=None,
+                      **kwargs):
+        """ adds .parquet and .arrow / .feather (Arrow IPC) to flux_cls.to_file() """
+        arrow_format = arrow_extensions.get(arrow_file_extension(path, filetype))
+
+        if arrow_format == 'parquet':
+            return self.to_parquet(path, **kwargs)
+        if arrow_format == 'ipc':
+            return self.to_arrow(path, **kwargs)
+
+        return super().to_file(path, encoding, filetype, **kwargs)
+
+    def serialize(self, path,
+                        compression=None,
+                        compress_level=None,
+                        chunk_nrows=100_000,
+                        workers=None,
+                        mode='write',
+                        **kwargs):
+        """ compression:
+            None: a single pickle stream, as flux_cls.serialize()
+            'zlib', 'lzma' or 'bz2': rows are pickled in chunks of chunk_nrows rows,
+            and each chunk is compressed on its own, in a pool of workers threads
+            (these compressors release the GIL); the file ends with a table of chunk
+            offsets, so .deserialize() can read chunks concurrently, or only some of them
+        mode:
+            'write':  replace the file
+            'append': add rows to the end of the file as a new segment of chunks,
+                      without rewriting existing rows (the file is created if it does not exist);
+                      column names must match and the file's compression is used.
+                      .deserialize() reads all segments, .compact() merges them
+
+        eg:
+            flux.serialize('flux_file.flux', compression='zlib')
+            flux.to_file('flux_file.flux', compression='lzma', compress_level=1)
+
+            flux_new_rows.serialize('flux_file.flux', mode='append')
+            flux_extended_cls.compact('flux_file.flux')
+
+        see flux_cls.serialize() for security concerns about pickle files
+        """
+        from itertools import islice
+
+        if compression is None and mode == 'write':
+            return super().serialize(path, **kwargs)
+
+        write_chunked_flux_file(path,
+                                self.matrix[0].values if self.matrix else [],
+                                islice(self.matrix, 1, None),
+                                self._captured_attributes(),
+                                compression,
+                                compress_level,
+                                chunk_nrows,
+                                workers,
+                                mode)
+
+        return self
+
+    @classmethod
+    def deserialize(cls, path, chunks=None, workers=None, **kwargs):
+        """ reads files from flux_cls.serialize() and from .serialize(compression=...)
+
+        chunks:
+            for compressed files, indices of the chunks to read, eg
+                table = read_flux_chunk_table('flux_file.flux')
+                flux  = flux_extended_cls.deserialize('flux_file.flux', chunks=[0, len(table['chunks']) - 1])
+        workers:
+            number of threads reading and decompressing chunks
+
+        see flux_cls.deserialize() for security concerns about pickle files
+        """
+        import gc
+
+        if not is_chunked_flux_file(path):
+            return super().deserialize(path, **kwargs)
+
+        table = read_flux_chunk_table(path)
+
+        gc_enabled = gc.isenabled()
+        if gc_enabled: gc.disable()
+
+        m = [table['header']]
+        for rows in read_flux_chunks(path, table, chunks, workers):
+            m.extend(rows)
+
+        if gc_enabled: gc.enable()
+
+        flux = cls(m) if table['header'] else cls()
+        flux.__dict__.update(table['attributes'])
+
+        return flux
+
+    @classmethod
+    def compact(cls, path,
+                     compression=missing,
+                     compress_level=None,
+                     chunk_nrows=100_000,
+                     workers=None) -> dict:
+        """ rewrite a .flux file from .serialize(mode='append') as a single segment
+
+        segments appended by frequent, small writes are small chunks, each followed by its
+        own chunk table; rows are streamed from the old file to the new one, one chunk at a time
+        compression:
+            default is the file's current compression
+
+        :return: new chunk table, see read_flux_chunk_table()
+        """
+        return compact_flux_file(path, compression, compress_level, chunk_nrows, workers)
+
+    def to_csv(self, path,
+                     encoding=None,
+                     mode='write',
+                     **kwargs):
+        """ mode:
+            'write':  replace the file
+            'append': add rows to the end of the file; if the file exists, its header row
+                      must match the column names (the header is not written again)
+        """
+        import csv
+
+        if mode not in ('write', 'append'):
+            raise ValueError("invalid mode: '{}' \nmode must be in ['write', 'append']".format(mode))
+
+        if mode == 'write' or not os.path.exists(path) or os.path.getsize(path) == 0:
+            return super().to_csv(path, encoding, **kwargs)
+
+        newline = kwargs.pop('newline', '')
+
+        with open(path, 'r', encoding=encoding, newline=newline) as f:
+            header = next(csv.reader(f, **kwargs), [])
+
+        names = [str(name) for name in self.matrix[0].values]
+        if header != names:
+            raise ColumnNameError('column names do not match header of {}: \n\texpected: {}\n\trecieved: {}'
+                                  .format(path, header, names))
+
+        with open(path, 'a', encoding=encoding, newline=newline) as f:
+            csv.writer(f, **kwargs).writerows(row.values for row in self.matrix[1:])
+
+        return self
+
+    @classmethod
+    def from_csv(cls, path,
+                      encoding=None,
+                      categorize=None,
+                      **kwargs):
+        """ categorize:
+            column names to .categorize(), or True for all columns
+            rows are categorized as they are read, so duplicate values are released
+            while the file is loaded, rather than after all rows are in memory
+        """
+        if not categorize:
+            return super().from_csv(path, encoding, **kwargs)
+
+        if is_path_a_url(path):
+            flux = super().from_csv(path, encoding, **kwargs)
+            return flux.categorize(*([] if categorize is True else categorize))
+
+        import csv
+        from itertools import islice
+
+        nrows              = kwargs.pop('nrows', None)
+        exclude_header_row = kwargs.pop('exclude_header_row', False)
+
+        with open(path, 'r', encoding=encoding, newline=kwargs.pop('newline', '')) as f:
+            csv_reader = csv.reader(f, **kwargs)
+            if exclude_header_row:
+                next(csv_reader, None)
+
+            rows   = islice(csv_reader, nrows)
+            header = next(rows, None)
+            if header is None:
+                return cls()
+
+            flux    = cls([header])
+            names   = flux.header_names() if categorize is True else categorize
+            indices = validate_names_as_indices(names, flux.headers)
+            names   = [flux.header_names()[i] for i in indices]
+
+            column_categories = flux.__column_categories()
+            for name in names:
+                column_categories[name] = categories_cls()
+
+            m = [header]
+            m.extend(categorized_rows(rows, indices, [column_categories[name] for name in names]))
+
+        return flux.reset_matrix(m)
+
+    @classmethod
+    def from_file(cls, path,
+                       encoding=None,
+                       filetype=None,
+                       **kwargs):
+        """ adds .parquet and .arrow / .feather (Arrow IPC) to flux_cls.from_file() """
+        arrow_format = arrow_extensions.get(arrow_file_extension(path, filetype))
+
+        if arrow_format == 'parquet':
+            return cls.from_parquet(path, **kwargs)
+        if arrow_format == 'ipc':
+            return cls.from_arrow(path, **kwargs)
+
+        return super().from_file(path, encoding, filetype, **kwargs)
+
+    @classmethod
+    def from_files(cls, paths,
+                        workers=8,
+                        schema=None,
+                        source_column=None,
+                        encoding=None,
+                        filetype=None,
+                        **kwargs):
+        """ read many files concurrently, concatenated into one flux in order of paths
+
+        eg:
+            flux = flux_extended_cls.from_files('drops/*.csv', workers=16,
+                                                schema='union',
+                                                source_column='source_file')
+
+        paths:
+            list of paths, or a glob pattern (matches are sorted)
+        workers:
+            number of threads reading files: waiting on file I/O overlaps, though
+            csv / json parsing holds the GIL
+        schema:
+            None:    every file must have the same column names, in the same order
+            'union': columns aligned by name: all column names, in order of first appearance
+            list of column names: columns aligned by name to these columns, others are dropped
+            missing columns are filled with None
+        source_column:
+            name of an additional column with each row's file path
+        additional kwargs are passed to .from_file()
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        from glob import glob
+
+        if isinstance(paths, str):
+            pattern = paths
+            paths   = sorted(glob(pattern))
+            if not paths:
+                raise FileNotFoundError('no files match {}'.format(pattern))
+        else:
+            paths = list(paths)
+
+        # region {closure functions}
+        def read_file(path):
+            return cls.from_file(path, encoding, filetype, **kwargs)
+        # endregion
+
+        with ThreadPoolExecutor(max(1, min(workers, len(paths)))) as executor:
+            fluxes = list(executor.map(read_file, paths))
+
+        if schema is None:
+            names = fluxes[0].header_names() if fluxes else []
+        elif schema == 'union':
+            names = list({name: None for flux in fluxes for name in flux.header_names()})
+        else:
+            names = list(schema)
+
+        if source_column is not None:
+            validate_no_names_intersect_with_headers([source_column], dict.fromkeys(names))
+
+        rows = row_blocks_cls(names + ([source_column] if source_column is not None else []), adopt=True)
+        for path, flux in zip(paths, fluxes):
+            header = flux.header_names()
+
+            if header == names:
+                m = [row.values for row in flux.matrix[1:]]
+            elif schema is None:
+                raise ColumnNameError('column names of {} do not match {}: \n\texpected: {}\n\trecieved: {}'
+                                      .format(path, paths[0], names, header))
+            else:
+                indices = [header.index(name) if name in header else None for name in names]
+                m = [[row.values[i] if i is not None else None for i in indices] for row in flux.matrix[1:]]
+
+            if source_column is not None:
+                for values in m:
+                    values.append(path)
+
+            rows.append(m)
+
+        return rows.to_flux(cls)
+
+    def to_arrow_table(self):
+        """ requires pyarrow
+        each column must hold a single type (None is allowed in any column)
+        """
+        import pyarrow
+        from operator import itemgetter
+
+        values  = [row.values for row in self.matrix[1:]]
+        columns = {str(name): list(map(itemgetter(i), values)) for name, i in self.headers.items()}
+
+        return pyarrow.Table.from_pydict(columns)
+
+    @classmethod
+    def from_arrow_table(cls, table):
+        import gc
+
+        gc_enabled = gc.isenabled()
+        if gc_enabled: gc.disable()
+
+        columns = [c.to_pylist() for c in table.columns]
+
+        m = [list(table.column_names)]
+        m.extend(map(list, zip(*columns)))
+
+        if gc_enabled: gc.enable()
+
+        return cls(m)
+
+    def to_parquet(self, path,
+                         row_group_size=None,
+                         compression='snappy',
+                         **kwargs):
+        """ requires pyarrow
+
+        row_group_size:
+            max rows per row group; smaller groups let from_parquet(filters=...) skip
+            more of the file, larger groups compress better
+        additional kwargs are passed to pyarrow.parquet.write_table()
+        """
+        import pyarrow.parquet
+
+        pyarrow.parquet.write_table(self.to_arrow_table(), path,
+                                    row_group_size=row_group_size,
+                                    compression=compression,
+                                    **kwargs)
+        return self
+
+    @classmethod
+    def from_parquet(cls, path,
+                          columns=None,
+                          filters=None,
+                          **kwargs):
+        """ requires pyarrow
+
+        columns:
+            only these columns are read from the file (projection)
+        filters:
+            rows that satisfy these predicates, eg
+                filters=[('col_a', '==', 'abc'), ('col_b', '>', 5.0)]
+                filters=[[('col_a', '==', 'abc')], [('col_a', '==', 'xyz')]]    # or
+            row groups whose min / max statistics cannot satisfy the
+            predicates are skipped without being read (predicate pushdown)
+        additional kwargs are passed to pyarrow.parquet.read_table()
+        """
+        import pyarrow.parquet
+
+        table = pyarrow.parquet.read_table(path,
+                                           columns=columns,
+                                           filters=filters,
+                                           **kwargs)
+        return cls.from_arrow_table(table)
+
+    def to_arrow(self, path, compression=None):
+        """ requires pyarrow
+        Arrow IPC file (also known as Feather v2); compression may be 'lz4' or 'zstd'
+        """
+        import pyarrow.feather
+
+        pyarrow.feather.write_feather(self.to_arrow_table(), path, compression=compression)
+        return self
+
+    @classmethod
+    def from_arrow(cls, path,
+                        columns=None,
+                        filters=None):
+        """ requires pyarrow
+        file is memory-mapped, columns and filters are as in from_parquet()
+        """
+        import pyarrow.dataset
+        import pyarrow.parquet
+
+        if filters is not None:
+            filters = pyarrow.parquet.filters_to_expression(filters)
+
+        table = pyarrow.dataset.dataset(path, format='ipc').to_table(columns=columns,
+                                                                     filter=filters)
+        return cls.from_arrow_table(table)
+
+    @classmethod
+    def sort_file(cls, src, dst, keys,
+                       reverse=False,
+                       memory_limit='2GB',
+                       encoding=None,
+                       temp_dir=None,
+                       **kwargs):
+        """ external merge sort, for files larger than memory
+
+        eg:
+            flux_extended_cls.sort_file('transactions.csv',
+                                        'transactions_sorted.csv',
+                                        ['customer', 'date'],
+                                        reverse=[False, True],
+                                        memory_limit='2GB')
+
+        keys, reverse:
+            same semantics as flux.sort(*keys, reverse=reverse), including
+            a separate reverse flag for each key; the sort is stable
+        memory_limit:
+            approximate memory for rows held at once, eg 2_000_000_000, '2GB', '512MB'
+            the input is sorted in runs of this size, runs are spilled to temp_dir,
+            then k-way merged into dst
+        src, dst:
+            .csv files are streamed
+            chunked .flux files (see .serialize(compression=...)) are read one chunk at a time,
+            other .flux files are loaded whole; .flux files are written in chunks
+        additional kwargs are passed to csv.reader / csv.writer
+        """
+        import heapq
+        import tempfile
+        from itertools import chain
+
+        names    = [keys] if isinstance(keys, (str, bytes)) else list(keys)
+        reverses = [bool(v) for v in (reverse if isinstance(reverse, (list, tuple)) else [reverse])]
+        reverses.extend([False] * (len(names) - len(reverses)))
+
+        header, rows = read_file_rows(src, encoding, cls, **kwargs)
+        indices      = column_indices(header, names)
+        memory_limit = parse_memory_size(memory_limit)
+
+        rows     = iter(rows)
+        run      = sort_rows(next(memory_bounded_runs(rows, memory_limit), []), indices, reverses)
+        overflow = next(rows, missing)
+
+        if overflow is missing:
+            write_file_rows(dst, header, run, encoding, **kwargs)
+            return
+
+        with tempfile.TemporaryDirectory(dir=temp_dir) as t_dir:
+            # the first run is spilled before the next run is read: only one run is held at a time
+            paths = [write_spill_file(os.path.join(t_dir, 'run_0.spill'), run)]
+            del run
+
+            for run in memory_bounded_runs(chain([overflow], rows), memory_limit):
+                path = os.path.join(t_dir, 'run_{}.spill'.format(len(paths)))
+                paths.append(write_spill_file(path, sort_rows(run, indices, reverses)))
+                del run
+
+            if len(set(reverses)) == 1:
+                merge_kwargs = {'key':     row_key_function(indices),
+                                'reverse': reverses[0]}
+            else:
+                merge_kwargs = {'key': lambda row: sort_key_cls([row[i] for i in indices], reverses)}
+
+            # merge in passes when there are more runs than files that should be opened at once
+            i_pass = 0
+            while len(paths) > max_open_spill_files:
+                merged = heapq.merge(*[read_spill_file(p) for p in paths[:max_open_spill_files]], **merge_kwargs)
+                path   = os.path.join(t_dir, 'pass_{}.spill'.format(i_pass))
+                paths  = [write_spill_file(path, merged)] + paths[max_open_spill_files:]
+                i_pass += 1
+
+            merged = heapq.merge(*[read_spill_file(p) for p in paths], **merge_kwargs)
+            write_file_rows(dst, header, merged, encoding, **kwargs)
+
+    @classmethod
+    def contiguous_file(cls, path, *names,
+                              encoding=None,
+                              **kwargs):
+        """ streaming flux.contiguous() over a file sorted by names (eg, by sort_file())
+        yields a (value, flux) pair for each run of equal values; only one group is held in memory
+
+        eg:
+            for value, flux in flux_extended_cls.contiguous_file('transactions_sorted.csv', 'customer'):
+                pass
+        """
+        from itertools import groupby
+
+        header, rows = read_file_rows(path, encoding, cls, **kwargs)
+        key          = row_key_function(column_indices(header, names))
+
+        for value, group in groupby(rows, key=key):
+            m = [list(header)]
+            m.extend(group)
+
+            yield value, cls(m)
+
+    @classmethod
+    def groupby_file(cls, src, *names,
+                          memory_limit='2GB',
+                          num_partitions=64,
+                          encoding=None,
+                          temp_dir=None,
+                          **kwargs):
+        """ out-of-core grouping: yield a (key, flux) pair for each group
+        key is a single value for one name, a tuple for multiple names (as in flux.map_rows_append())
+
+        eg:
+            for customer, flux in flux_extended_cls.groupby_file('transactions.csv', 'customer',
+                                                                 memory_limit='2GB'):
+                pass
+
+        src:
+            .csv file (streamed), .flux file (streamed if chunked, see sort_file()), or a flux_cls
+        memory_limit:
+            approximate memory for rows held at once, eg 2_000_000_000, '2GB', '512MB'
+            when the groups fit, they are yielded in order of first appearance;
+            when they do not, rows are hash-partitioned by key into num_partitions
+            spill files in temp_dir and each partition is grouped on its own,
+            so groups are yielded in arbitrary order; partitions that are still larger than
+            memory_limit are partitioned again
+        additional kwargs are passed to csv.reader
+        """
+        header, rows = read_file_rows(src, encoding, cls, **kwargs)
+        key          = row_key_function(column_indices(header, names))
+
+        for k, group in grouped_rows(rows, key,
+                                     parse_memory_size(memory_limit),
+                                     num_partitions,
+                                     temp_dir):
+            m = [list(header)]
+            m.extend(group)
+
+            yield k, cls(m)
+
+    @classmethod
+    def aggregate_file(cls, src, *names,
+                            aggregates,
+                            memory_limit='2GB',
+                            num_partitions=64,
+                            encoding=None,
+                            temp_dir=None,
+                            **kwargs):
+        """ out-of-core grouping, reduced to one row per group
+
+        eg:
+            flux = flux_extended_cls.aggregate_file('transactions.csv', 'customer', 'month',
+                                                    aggregates={'num_transactions': ('amount', len),
+                                                                'total_amount':     ('amount', lambda c: sum(map(float, c)))})
+
+            flux.header_names() == ['customer', 'month', 'num_transactions', 'total_amount']
+
+        aggregates:
+            {new column name: (column name, function)}, where function is
+            called with the list of the column's values in each group
+        see groupby_file() for the other arguments
+        """
+        header, rows = read_file_rows(src, encoding, cls, **kwargs)
+        key          = row_key_function(column_indices(header, names))
+
+        aggregate_indices = column_indices(header, [column for column, _ in aggregates.values()])
+        aggregate_fs      = [f for _, f in aggregates.values()]
+
+        m = [list(names) + list(aggregates.keys())]
+        for k, group in grouped_rows(rows, key,
+                                     parse_memory_size(memory_limit),
+                                     num_partitions,
+                                     temp_dir):
+            row = list(k) if len(names) > 1 else [k]
+            row.extend(f([values[i] for values in group]) for i, f in zip(aggregate_indices, aggregate_fs))
+
+            m.append(row)
+
+        return cls(m)
+
+    def parallel_aggregate(self, *names,
+                                 aggregates=None,
+                                 workers=None,
+                                 min_worker_nrows=100_000):
+        """ group by names, reduced to one row per group, over multiple processes
+
+        eg:
+            flux_b = flux.parallel_aggregate('customer', 'month',
+                                             aggregates={'num_transactions': ('amount', 'count'),
+                                                         'total_amount':     ('amount', 'sum'),
+                                                         'mean_amount':      ('amount', 'mean')})
+
+            flux_b.header_names() == ['customer', 'month', 'num_transactions', 'total_amount', 'mean_amount']
+
+            # unique combinations of values, in order of first appearance
+            flux_b = flux.parallel_aggregate('customer', 'month')
+
+        aggregates:
+            {new column name: (column name, reducer)}, reducer one of
+            'count', 'sum', 'min', 'max', 'mean'; columns of 'sum', 'min', 'max'
+            and 'mean' must be numeric
+        workers:
+            number of processes, default os.cpu_count(); reduced so that each
+            worker has at least min_worker_nrows rows. with a single worker,
+            rows are aggregated in this process
+
+        key columns are dictionary-encoded to int codes and value columns converted
+        to floats, each copied once into a multiprocessing.shared_memory block; workers
+        attach to the blocks by name (rows are never pickled), aggregate a range of rows
+        each (see flux_parallel.aggregate_rows()), and return partial values per group,
+        which are merged here
+
+        only the reduction is parallel: encoding and float conversion run in this process,
+        one row at a time, before any worker starts, since workers cannot read flux rows
+        without having them pickled. this serial part (about a quarter of the 1-worker time
+        on 1,000,000 rows) bounds the speedup; measure with flux_parallel.parallel_aggregate_scaling()
+        .unique(), .map_rows() and the other grouping methods are not parallelized:
+        parallel_aggregate() with no aggregates gives the unique key combinations
+        """
+        from array import array
+        from concurrent.futures import ProcessPoolExecutor
+
+        if not names:
+            raise ValueError('parallel_aggregate requires at least one column name')
+
+        names      = list(names[0]) if (len(names) == 1 and isinstance(names[0], (list, tuple))) else list(names)
+        aggregates = aggregates or {}
+
+        invalid = {r for _, r in aggregates.values() if r not in parallel_reducers}
+        if invalid:
+            raise ValueError('invalid reducers: {}, expected one of {}'.format(invalid, list(parallel_reducers)))
+
+        header   = self.header_names()
+        rows     = self.matrix[1:]
+        num_rows = len(rows)
+        workers  = workers or os.cpu_count() or 1
+        workers  = max(1, min(workers, num_rows // max(min_worker_nrows, 1)))
+
+        columns     = []
+        code_values = []
+        for i in column_indices(header, names):
+            codes, values = encoded_column([row.values[i] for row in rows])
+            columns.append(codes)
+            code_values.append(values)
+
+        value_columns = {}
+        reducers      = []
+        for column, reducer in aggregates.values():
+            if reducer == 'count':
+                columns.append(None)
+            else:
+                if column not in value_columns:
+                    i = column_indices(header, [column])[0]
+                    value_columns[column] = array('d', [row.values[i] for row in rows])
+
+                columns.append(value_columns[column])
+
+            reducers.append(reducer)
+
+        del rows
+
+        if workers == 1:
+            partials = [aggregate_rows(columns, len(names), reducers, 0, num_rows)]
+        else:
+            bounds = [num_rows * w // workers for w in range(workers + 1)]
+            shms   = {}
+            for c in columns:
+                if c is not None and id(c) not in shms:
+                    shms[id(c)] = shared_column(c)
+
+            try:
+                shm_names = [shms[id(c)].name if c is not None else None for c in columns]
+                typecodes = [c.typecode       if c is not None else None for c in columns]
+
+                with ProcessPoolExecutor(workers) as executor:
+                    futures = [executor.submit(aggregate_shared_rows, shm_names, typecodes, len(names),
+                                               reducers, lo, hi)
+                               for lo, hi in zip(bounds, bounds[1:])]
+                    partials = [future.result() for future in futures]
+            finally:
+                for shm in shms.values():
+                    shm.close()
+                    shm.unlink()
+
+        merges = [parallel_reducers[r] for r in reducers]
+        groups = {}
+        for partial in partials:
+            for key, values in partial.items():
+                merged = groups.get(key)
+                if merged is None:
+                    groups[key] = values
+                else:
+                    groups[key] = [f(a, b) for f, a, b in zip(merges, merged, values)]
+
+        m = [names + list(aggregates.keys())]
+        for key, values in groups.items():
+            row = [cv[c] for cv, c in zip(code_values, key)]
+            row.extend(v[0] / v[1] if r == 'mean' else v for r, v in zip(reducers, values))
+
+            m.append(row)
+
+        return self.__class__(m)
+
+    def group_index(self, *names) -> 'group_index_cls':
+        """ memory-light alternative to flux.map_rows_nested() / flux.groupby()
+
+        eg:
+            d = flux.group_index('col_a', 'col_b')
+
+            rows = d['a']['b']                  # list of rows, as in flux.map_rows_nested()
+            n    = len(d['a'])
+            for k_a, d_b in d.items():
+                for k_b, rows in d_b.items():
+                    pass
+
+        keys are ordered by first appearance, as in flux.map_rows_nested()
+        see group_index_cls
+        """
+        return group_index_cls(self, names)
+
+    @classmethod
+    def concat(cls, batches, block_nrows=8_192, adopt=False):
+        """ one flux from many fluxes (or lists of rows) with the same columns
+
+        the new flux's matrix is built once; rows of each batch are copied, or with adopt=True,
+        moved into the new flux without copies (the batches should not be used afterwards)
+        see row_blocks_cls to accumulate or insert batches incrementally
+
+        eg:
+            flux = flux_extended_cls.concat(read_batches(), adopt=True)
+        """
+        return row_blocks_cls(block_nrows=block_nrows, adopt=adopt).extend(batches).to_flux(cls)
+
+    def _parse_commands(self, commands) -> List[command_nt]:
+        """ same command syntax as flux_cls.execute_commands(), parsed by flux_cls itself
+            'method_name'
+            ('method_name', (arg_1, arg_2), {'kw': kwarg})
+        """
+        return self._flux_cls__validate_command_methods(commands, command_nt)
@@ -0,0 +1,330 @@
+
+"""
+file formats of flux_extended_cls:
+    * .parquet / .arrow / .feather extensions, handled by pyarrow
+    * chunked .flux files, written by flux_extended_cls.serialize(compression=...) or serialize(mode='append')
+"""
+import os
+import pickle
+import zlib
+
+from itertools import islice
+
+from vengeance.util.iter import ColumnNameError
+
+
+missing = object()
+
+# to_file() / from_file() extensions handled by pyarrow
+arrow_extensions = {'.parquet': 'parquet',
+                    '.arrow':   'ipc',
+                    '.feather': 'ipc',
+                    '.ipc':     'ipc'}
+
+
+def arrow_file_extension(path, filetype=None) -> str:
+    """ eg, '.parquet' from either 'parquet', '.parquet' or 'flux_file.parquet' """
+    filetype = str(filetype or path)
+    filetype = os.path.splitext(filetype)[1] or filetype
+
+    return '.' + filetype.lstrip('.').lower()
+
+
+# .flux files written by flux_extended_cls.serialize(compression=...) or serialize(mode='append'):
+#     magic bytes
+#     segment: compressed chunks (pickled lists of row values),
+#              chunk table: pickled dict, see read_flux_chunk_table()
+#              footer: chunk table offset (8 bytes, little-endian), crc32 of the pickled
+#                      chunk table (4 bytes, little-endian), table magic bytes
+#     segment ...
+# each appended segment ends with a table of all chunks so far: the table of the
+# last segment is the current one, earlier tables are dead bytes until compact_flux_file()
+# a segment whose writer was killed leaves a tail without a valid footer: readers fall back
+# to the last valid table (see read_last_flux_chunk_table()), and the next append truncates the tail
+chunked_flux_magic       = b'\x00flux-chunks\x00\x01'
+chunked_flux_table_magic = b'\x00flux-table\x00'
+chunked_flux_footer_size = 8 + 4 + len(chunked_flux_table_magic)
+
+
+def chunk_codec(compression, level=None):
+    """ :return: (compress, decompress) functions for None, 'zlib', 'lzma' or 'bz2' """
+    import bz2
+    import lzma
+    from functools import partial
+
+    codecs = {None:   (bytes,         bytes,           None),     # uncompressed chunks
+              'zlib': (zlib.compress, zlib.decompress, 'level'),
+              'lzma': (lzma.compress, lzma.decompress, 'preset'),
+              'bz2':  (bz2.compress,  bz2.decompress,  'compresslevel')}
+
+    if compression not in codecs:
+        raise ValueError("invalid compression: '{}' \ncompression must be in {}".format(compression, list(codecs)))
+
+    compress, decompress, level_name = codecs[compression]
+    if level is not None and level_name is not None:
+        compress = partial(compress, **{level_name: level})
+
+    return compress, decompress
+
+
+def ordered_map(executor, f, items, max_pending):
+    """ executor.map(), but items are submitted at most max_pending ahead of the results consumed """
+    from collections import deque
+
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(f, item))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+
+    while pending:
+        yield pending.popleft().result()
+
+
+def row_value_chunks(rows, chunk_nrows):
+    """ lists of up to chunk_nrows row values, from flux rows or from lists of row values """
+    rows = iter(rows)
+    for chunk in iter(lambda: list(islice(rows, chunk_nrows)), []):
+        yield [getattr(row, 'values', row) for row in chunk]
+
+
+def write_chunked_flux_file(path, header, rows, attributes, compression,
+                            compress_level=None,
+                            chunk_nrows=100_000,
+                            workers=None,
+                            mode='write'):
+    """ rows are streamed: flux rows or lists of row values, consumed one chunk at a time
+
+    mode:
+        'write':  a new file is written to path + '.tmp', then replaces path
+        'append': rows are appended to path as a new segment; the header must match
+                  and the file's compression is used. an interrupted append is truncated
+                  back to the previous segment; the tail of a killed append is ignored by
+                  readers, and truncated by the next append
+    """
+    header = list(header)
+
+    if mode not in ('write', 'append'):
+        raise ValueError("invalid mode: '{}' \nmode must be in ['write', 'append']".format(mode))
+
+    if mode == 'append' and os.path.exists(path) and os.path.getsize(path) > 0:
+        if not is_chunked_flux_file(path):
+            raise ValueError('{} is a single pickle stream and cannot be appended to; '
+                             'rewrite it once with .serialize(path, compression=...)'.format(path))
+
+        with open(path, 'r+b') as f:
+            table, size = read_last_flux_chunk_table(f, path)
+            if table['header'] != header:
+                raise ColumnNameError('column names do not match those of {}: \n\texpected: {}\n\trecieved: {}'
+                                      .format(path, table['header'], header))
+
+            compress, _ = chunk_codec(table['compression'], compress_level)
+
+            # bytes after the last valid table are the tail of an append that did not finish
+            f.truncate(size)
+            f.seek(size)
+            try:
+                chunks = row_value_chunks(rows, chunk_nrows)
+                chunks = write_flux_chunks(f, chunks, compress, workers)
+
+                table['chunks']   += chunks
+                table['num_rows'] += sum(nrows for _, _, nrows in chunks)
+                table['segments']  = table.get('segments', 1) + 1
+                table['attributes'].update(attributes)
+
+                write_flux_chunk_table(f, table)
+            except BaseException:
+                f.truncate(size)
+                raise
+
+        return table
+
+    compress, _ = chunk_codec(compression, compress_level)
+
+    with open(path + '.tmp', 'wb') as f:
+        f.write(chunked_flux_magic)
+        chunks = row_value_chunks(rows, chunk_nrows)
+        chunks = write_flux_chunks(f, chunks, compress, workers)
+
+        table = {'compression': compression,
+                 'header':      header,
+                 'attributes':  attributes,
+                 'num_rows':    sum(nrows for _, _, nrows in chunks),
+                 'chunk_nrows': chunk_nrows,
+                 'segments':    1,
+                 'chunks':      chunks}
+
+        write_flux_chunk_table(f, table)
+
+    os.replace(path + '.tmp', path)
+
+    return table
+
+
+def write_flux_chunks(f, chunks, compress, workers=None) -> list:
+    """ rows are pickled and compressed in worker threads, chunks are written here in order
+    (pickling holds the GIL: it overlaps with compression and file writes, rather than
+    running in parallel with other pickling)
+
+    :return: [(file offset, compressed bytes, number of rows), ...]
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    workers = workers or os.cpu_count() or 1
+
+    # region {closure functions}
+    def encoded_chunk(chunk):
+        return len(chunk), compress(pickle.dumps(chunk, protocol=pickle.HIGHEST_PROTOCOL))
+    # endregion
+
+    entries = []
+
+    with ThreadPoolExecutor(workers) as executor:
+        for num_rows, b in ordered_map(executor, encoded_chunk, chunks, workers * 2):
+            entries.append((f.tell(), len(b), num_rows))
+            f.write(b)
+
+    return entries
+
+
+def write_flux_chunk_table(f, table):
+    offset = f.tell()
+    b      = pickle.dumps(table, protocol=pickle.HIGHEST_PROTOCOL)
+
+    f.write(b)
+    f.write(offset.to_bytes(8, 'little'))
+    f.write(zlib.crc32(b).to_bytes(4, 'little'))
+    f.write(chunked_flux_table_magic)
+
+
+def compact_flux_file(path,
+                      compression=missing,
+                      compress_level=None,
+                      chunk_nrows=100_000,
+                      workers=None) -> dict:
+    """ rewrite a chunked .flux file as a single segment of chunk_nrows chunks
+
+    appended segments are usually small chunks, each followed by its own table;
+    rows are streamed from the old file to the new one, one chunk at a time
+    compression:
+        default is the file's current compression
+    """
+    table = read_flux_chunk_table(path)
+    if compression is missing:
+        compression = table['compression']
+
+    compress, _ = chunk_codec(compression, compress_level)
+    rows        = (values for chunk in read_flux_chunks(path, table, workers=workers) for values in chunk)
+
+    with open(path + '.tmp', 'wb') as f:
+        f.write(chunked_flux_magic)
+        chunks = write_flux_chunks(f, row_value_chunks(rows, chunk_nrows), compress, workers)
+
+        table = dict(table,
+                     compression=compression,
+                     num_rows=sum(nrows for _, _, nrows in chunks),
+                     chunk_nrows=chunk_nrows,
+                     segments=1,
+                     chunks=chunks)
+
+        write_flux_chunk_table(f, table)
+
+    os.replace(path + '.tmp', path)
+
+    return table
+
+
+def is_chunked_flux_file(path) -> bool:
+    with open(path, 'rb') as f:
+        return f.read(len(chunked_flux_magic)) == chunked_flux_magic
+
+
+def read_flux_chunk_table(path) -> dict:
+    """ {'compression': None, 'zlib', 'lzma' or 'bz2',
+         'header':      header row values,
+         'attributes':  flux instance attributes,
+         'num_rows':    number of rows (not including header),
+         'chunk_nrows': rows per chunk,
+         'segments':    number of segments written: .serialize(), then each .serialize(mode='append')
+         'chunks':      [(file offset, compressed bytes, number of rows), ...]}
+    """
+    with open(path, 'rb') as f:
+        return read_last_flux_chunk_table(f, path)[0]
+
+
+def read_last_flux_chunk_table(f, path=None):
+    """ :return: (chunk table, file position after its footer) of the last valid table in f
+
+    the file normally ends with a valid footer; if not (an append was killed part way),
+    the file is searched backwards for the footer of the previous table. a footer is
+    valid if its table offset is in range and the crc32 of the table bytes matches
+    """
+    for end in table_magic_ends(f):
+        table = read_flux_chunk_table_at(f, end)
+        if table is not None:
+            return table, end
+
+    raise ValueError('no valid chunk table found in {}'.format(path or f))
+
+
+def table_magic_ends(f, block_nbytes=1_048_576):
+    """ yield file positions just after each occurrence of chunked_flux_table_magic, last first """
+    magic = chunked_flux_table_magic
+    n     = len(magic)
+
+    # hi: occurrences starting before hi have not been searched yet
+    hi = f.seek(0, os.SEEK_END) - n + 1
+    while hi > 0:
+        lo = max(0, hi - block_nbytes)
+        f.seek(lo)
+        block = f.read(hi - lo + n - 1)
+
+        j = block.rfind(magic)
+        while j != -1:
+            yield lo + j + n
+            j = block.rfind(magic, 0, j + n - 1)
+
+        hi = lo
+
+
+def read_flux_chunk_table_at(f, end):
+    """ :return: chunk table whose footer ends at end, or None if the footer is not valid """
+    footer_start = end - chunked_flux_footer_size
+    if footer_start < len(chunked_flux_magic):
+        return None
+
+    f.seek(footer_start)
+    footer = f.read(chunked_flux_footer_size)
+    offset = int.from_bytes(footer[:8], 'little')
+    crc    = int.from_bytes(footer[8:12], 'little')
+
+    if not len(chunked_flux_magic) <= offset < footer_start:
+        return None
+
+    f.seek(offset)
+    b = f.read(footer_start - offset)
+    if zlib.crc32(b) != crc:
+        return None
+
+    return pickle.loads(b)
+
+
+def read_flux_chunks(path, table, chunks=None, workers=None):
+    """ yield lists of row values for each chunk, in order; chunks are read and decompressed in worker threads """
+    from concurrent.futures import ThreadPoolExecutor
+
+    _, decompress = chunk_codec(table['compression'])
+    workers       = workers or os.cpu_count() or 1
+    entries       = table['chunks'] if chunks is None else [table['chunks'][i] for i in chunks]
+
+    # region {closure functions}
+    def read_chunk(entry):
+        offset, nbytes, _ = entry
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            return decompress(f.read(nbytes))
+    # endregion
+
+    with ThreadPoolExecutor(workers) as executor:
+        for b in ordered_map(executor, read_chunk, entries, workers * 2):
+            yield pickle.loads(b)
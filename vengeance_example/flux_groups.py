@@ -0,0 +1,240 @@
+
+"""
+group_index_cls, returned by flux_extended_cls.group_index()
+"""
+
+
+class group_index_cls:
+    """ returned by flux_extended_cls.group_index()
+
+    rows are not copied into nested dicts of lists; instead, the index holds
+        * a permutation of row indices, sorted by group
+        * for each level, one (key code, child offset) pair per group, ordered by first appearance
+          within each parent group (as map_rows_nested() orders its keys)
+        * for each level, one (key code, group position) pair per group, sorted by key code
+          within each parent group, for lookups by key
+        * for each level, a single {key: code} dict of that level's unique keys
+    about 8 bytes per row and 32 bytes per group, rather than a dict and a list for every group
+
+    nested access, len(), iteration, .keys(), .values(), .items() and `in` behave like
+    the dict of dicts returned by flux.map_rows_nested(); the innermost value is a list of rows
+
+    the index refers to rows by position: rebuild it after the flux's rows are modified
+    """
+
+    def __init__(self, flux, names, _parent=None, _level=0, _lo=0, _hi=None):
+        if _parent is None:
+            self.__build(flux, names)
+        else:
+            self.__dict__.update(_parent.__dict__)
+
+        self.level = _level
+        self.lo    = _lo
+        self.hi    = len(self.node_codes[0]) if _hi is None else _hi
+
+    def __build(self, flux, names):
+        from array import array
+        from operator import itemgetter
+
+        if not names:
+            raise ValueError('group_index requires at least one column name')
+
+        names      = list(names[0]) if (len(names) == 1 and isinstance(names[0], (list, tuple))) else list(names)
+        indices    = [flux.headers[name] if not isinstance(name, int) else name for name in names]
+        levels     = range(len(indices))
+        last_level = len(indices) - 1
+
+        # one code per unique combination of keys (one per innermost group), in order of first appearance
+        key        = itemgetter(*indices)
+        leaf_codes = {}
+        row_leaves = array('L', (leaf_codes.setdefault(key(row.values), len(leaf_codes))
+                                 for row in flux.matrix[1:]))
+
+        leaves = [(k,) for k in leaf_codes] if len(indices) == 1 else list(leaf_codes)
+        del leaf_codes
+
+        # value codes: one per unique key of each level, for lookups by key
+        # path codes:  one per (parent path code, value code) of each level, in order of first appearance,
+        #              so each group's keys are ordered the way map_rows_nested() orders them:
+        #              by first appearance within that group
+        value_codes  = [{} for _ in levels]
+        code_values  = [[] for _ in levels]
+        path_codes   = [{} for _ in levels]
+        path_values  = [array('L') for _ in levels]
+        path_parents = [array('L') for _ in levels]
+
+        for leaf in leaves:
+            p = 0
+            for level, v in enumerate(leaf):
+                c = value_codes[level].get(v)
+                if c is None:
+                    c = len(code_values[level])
+                    value_codes[level][v] = c
+                    code_values[level].append(v)
+
+                paths = path_codes[level]
+                q     = paths.get((p, c))
+                if q is None:
+                    q = len(paths)
+                    paths[(p, c)] = q
+                    path_values[level].append(c)
+                    path_parents[level].append(p)
+
+                p = q
+
+        del path_codes
+        del leaves
+
+        # groups of each level, in order: the children of each group of the previous level, in path code order
+        # (path codes of the last level are leaf codes)
+        node_paths  = [array('L', range(len(path_values[0])))]
+        node_starts = [array('L') for _ in levels]
+
+        for level in range(1, last_level + 1):
+            children = [[] for _ in path_values[level - 1]]
+            for q, p in enumerate(path_parents[level]):
+                children[p].append(q)
+
+            order = array('L')
+            for p in node_paths[level - 1]:
+                node_starts[level - 1].append(len(order))
+                order.extend(children[p])
+
+            node_starts[level - 1].append(len(order))
+            node_paths.append(order)
+
+        node_codes = [array('L', map(path_values[level].__getitem__, node_paths[level])) for level in levels]
+
+        # counting sort of rows by group (stable, rows within each group keep their original order):
+        # each group's start is the sum of the row counts of the groups before it, then each row
+        # is placed at the next free position of its group
+        num_leaves = len(node_paths[last_level])
+        positions  = array('L', bytes(num_leaves * array('L').itemsize))
+        for q in row_leaves:
+            positions[q] += 1
+
+        starts = node_starts[last_level]
+        n      = 0
+        for q in node_paths[last_level]:
+            starts.append(n)
+            count        = positions[q]
+            positions[q] = n
+            n           += count
+        starts.append(n)
+
+        rows_order = array('L', bytes(len(row_leaves) * array('L').itemsize))
+        for r, q in enumerate(row_leaves, 1):
+            rows_order[positions[q]] = r
+            positions[q] += 1
+
+        del row_leaves
+        del positions
+
+        # for lookups by key: within each parent group, positions of its child groups sorted by value code
+        node_order   = [array('L') for _ in levels]
+        sorted_codes = [array('L') for _ in levels]
+        for level in levels:
+            bounds = [0, len(node_codes[level])] if level == 0 else node_starts[level - 1]
+            codes  = node_codes[level]
+
+            for lo, hi in zip(bounds, bounds[1:]):
+                order = sorted(range(lo, hi), key=codes.__getitem__)
+                node_order[level].extend(order)
+                sorted_codes[level].extend(map(codes.__getitem__, order))
+
+        self.flux         = flux
+        self.names        = names
+        self.rows_order   = rows_order
+        self.value_codes  = value_codes
+        self.code_values  = code_values
+        self.node_codes   = node_codes
+        self.node_starts  = node_starts
+        self.node_order   = node_order
+        self.sorted_codes = sorted_codes
+
+    @property
+    def is_leaf(self) -> bool:
+        return self.level == len(self.names) - 1
+
+    def keys(self):
+        code_values = self.code_values[self.level]
+        node_codes  = self.node_codes[self.level]
+
+        return (code_values[node_codes[j]] for j in range(self.lo, self.hi))
+
+    def values(self):
+        return (self.__node_value(j) for j in range(self.lo, self.hi))
+
+    def items(self):
+        return zip(self.keys(), self.values())
+
+    def get(self, key, default=None):
+        j = self.__node_position(key)
+        if j is None:
+            return default
+
+        return self.__node_value(j)
+
+    def rows(self) -> list:
+        """ every row in this group, in group order """
+        lo = self.lo
+        hi = self.hi
+        for level in range(self.level, len(self.names)):
+            lo = self.node_starts[level][lo]
+            hi = self.node_starts[level][hi]
+
+        m = self.flux.matrix
+        return [m[i] for i in self.rows_order[lo:hi]]
+
+    def to_dict(self) -> dict:
+        """ materialize as flux.map_rows_nested() would """
+        if self.is_leaf:
+            return dict(self.items())
+
+        return {k: v.to_dict() for k, v in self.items()}
+
+    def __node_position(self, key):
+        from bisect import bisect_left
+
+        code = self.value_codes[self.level].get(key)
+        if code is None:
+            return None
+
+        sorted_codes = self.sorted_codes[self.level]
+        j = bisect_left(sorted_codes, code, self.lo, self.hi)
+        if j == self.hi or sorted_codes[j] != code:
+            return None
+
+        return self.node_order[self.level][j]
+
+    def __node_value(self, j):
+        lo = self.node_starts[self.level][j]
+        hi = self.node_starts[self.level][j + 1]
+
+        if self.is_leaf:
+            m = self.flux.matrix
+            return [m[i] for i in self.rows_order[lo:hi]]
+
+        return group_index_cls(None, None, self, self.level + 1, lo, hi)
+
+    def __getitem__(self, key):
+        j = self.__node_position(key)
+        if j is None:
+            raise KeyError(key)
+
+        return self.__node_value(j)
+
+    def __contains__(self, key):
+        return self.__node_position(key) is not None
+
+    def __len__(self):
+        return self.hi - self.lo
+
+    def __iter__(self):
+        return self.keys()
+
+    def __repr__(self):
+        return '{} {} level {}: {:,} groups'.format(self.__class__.__name__,
+                                                    self.names,
+                                                    self.level,
+                                                    len(self))
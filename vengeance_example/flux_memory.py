@@ -0,0 +1,57 @@
+
+"""
+deep_sizeof(), used by flux_extended_cls.memory_usage()
+"""
+
+
+# objects that do not refer to other objects, for deep_sizeof()
+atomic_types = (str, bytes, int, float, complex, bool, type(None))
+
+
+def deep_sizeof(o, seen=None) -> int:
+    """ bytes of o and every object it refers to, each object counted once
+
+    follows containers, instance __dict__ and __slots__; classes, modules and functions
+    are not followed. pass the same seen set to several calls to count shared objects once
+
+    eg:
+        n_1 = deep_sizeof(flux.map_rows_append('col_a', rowtype='dict'))
+        n_2 = deep_sizeof(flux.map_rows_append('col_a', rowtype='namedtuple'))
+    """
+    import sys
+    from types import BuiltinFunctionType
+    from types import FunctionType
+    from types import ModuleType
+
+    not_followed = (type, ModuleType, FunctionType, BuiltinFunctionType)
+
+    seen   = set() if seen is None else seen
+    stack  = [o]
+    nbytes = 0
+
+    while stack:
+        o = stack.pop()
+        if id(o) in seen:
+            continue
+
+        seen.add(id(o))
+        nbytes += sys.getsizeof(o)
+
+        if isinstance(o, atomic_types) or isinstance(o, not_followed):
+            continue
+
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+
+        if hasattr(o, '__dict__'):
+            stack.append(o.__dict__)
+
+        for cls in type(o).__mro__:
+            slots = getattr(cls, '__slots__', ())
+            slots = [slots] if isinstance(slots, str) else slots
+            stack.extend(getattr(o, s) for s in slots if s not in ('__dict__', '__weakref__') and hasattr(o, s))
+
+    return nbytes
@@ -0,0 +1,324 @@
+
+"""
+out-of-core helpers of flux_extended_cls.sort_file(), .contiguous_file(), .groupby_file() and .aggregate_file():
+rows are streamed from files and spilled to temporary files, rather than held in memory at once
+"""
+import os
+import pickle
+
+from itertools import islice
+from typing import List
+
+from vengeance import flux_cls
+from vengeance.util.filesystem import pickle_extensions
+
+try:
+    from flux_files import arrow_file_extension
+    from flux_files import is_chunked_flux_file
+    from flux_files import read_flux_chunk_table
+    from flux_files import read_flux_chunks
+    from flux_files import write_chunked_flux_file
+except (ModuleNotFoundError, ImportError):
+    from .flux_files import arrow_file_extension
+    from .flux_files import is_chunked_flux_file
+    from .flux_files import read_flux_chunk_table
+    from .flux_files import read_flux_chunks
+    from .flux_files import write_chunked_flux_file
+
+
+max_open_spill_files = 128
+
+
+def parse_memory_size(size) -> int:
+    """ eg, 2_000_000_000, '2GB', '512 MB', '1.5GiB' """
+    if isinstance(size, (int, float)):
+        return int(size)
+
+    units = {'b':   1,
+             'kb':  1_000,     'kib': 1_024,
+             'mb':  1_000**2,  'mib': 1_024**2,
+             'gb':  1_000**3,  'gib': 1_024**3,
+             'tb':  1_000**4,  'tib': 1_024**4}
+
+    s    = str(size).strip().lower().replace(' ', '').replace('_', '')
+    unit = s.lstrip('0123456789.')
+    num  = s[:len(s) - len(unit)]
+
+    if not num or (unit or 'b') not in units:
+        raise ValueError('invalid memory size: {!r}, eg: 2_000_000_000, \'2GB\', \'512MB\''.format(size))
+
+    return int(float(num) * units[unit or 'b'])
+
+
+def column_indices(header, names) -> List[int]:
+    header  = list(header)
+    missing = [name for name in names if name not in header]
+    if missing:
+        raise KeyError('column names not in header: {}'.format(missing))
+
+    return [header.index(name) for name in names]
+
+
+def row_key_function(indices):
+    from operator import itemgetter
+
+    if len(indices) == 1:
+        return itemgetter(indices[0])
+
+    return itemgetter(*indices)
+
+
+def sort_rows(rows, indices, reverses) -> list:
+    """ in-place sort of primitive rows, same semantics as flux.sort() """
+    if len(set(reverses)) == 1:
+        rows.sort(key=row_key_function(indices), reverse=reverses[0])
+        return rows
+
+    # multiple sorting must be done in reverse order,
+    # with last name sorted first, first name sorted last
+    for i, reverse in zip(reversed(indices), reversed(reverses)):
+        rows.sort(key=row_key_function([i]), reverse=reverse)
+
+    return rows
+
+
+def memory_bounded_runs(rows, memory_limit, sample_nrows=1_000):
+    """ yield lists of rows, each list approximately memory_limit bytes
+    row size is estimated from the first sample_nrows rows of each run
+    """
+    rows = iter(rows)
+
+    while True:
+        run = list(islice(rows, sample_nrows))
+        if not run:
+            return
+
+        max_nrows = memory_bounded_nrows(run, memory_limit)
+        run.extend(islice(rows, max_nrows - len(run)))
+
+        yield run
+        del run
+
+
+def memory_bounded_nrows(sample, memory_limit) -> int:
+    """ approximate number of rows like those in sample that fit in memory_limit bytes """
+    import sys
+
+    nbytes = sum(sys.getsizeof(row) + sum(map(sys.getsizeof, row)) for row in sample)
+    nbytes = max(nbytes, 1)
+
+    return max(len(sample), int(memory_limit / (nbytes / len(sample))))
+
+
+def grouped_rows(rows, key, memory_limit, num_partitions=64, temp_dir=None, sample_nrows=1_000, level=0):
+    """ yield (key, rows) for each group
+
+    rows are grouped in memory until approximately memory_limit bytes are held,
+    after that, all rows are hash-partitioned by key to num_partitions spill
+    files and each partition is grouped on its own. a partition that is still
+    larger than memory_limit is partitioned again, unless all of its rows have
+    the same key (a single group cannot be split)
+
+    level:
+        each level partitions by the next base-num_partitions digit of hash(key): rows
+        in the same partition share the previous digits, so the next level always
+        splits them, unless their keys' hashes are equal
+    """
+    import tempfile
+    from itertools import chain
+
+    # region {closure functions}
+    def group_rows(_rows_):
+        _groups_ = {}
+        for _row_ in _rows_:
+            _k_ = key(_row_)
+            try:
+                _groups_[_k_].append(_row_)
+            except KeyError:
+                _groups_[_k_] = [_row_]
+
+        return _groups_
+    # endregion
+
+    rows      = iter(rows)
+    sample    = list(islice(rows, sample_nrows))
+    max_nrows = memory_bounded_nrows(sample, memory_limit) if sample else 0
+
+    in_memory = list(islice(rows, max_nrows - len(sample)))
+    in_memory = chain(sample, in_memory)
+    overflow  = next(rows, None)
+
+    if overflow is None:
+        yield from group_rows(in_memory).items()
+        return
+
+    num_partitions = max(2, min(num_partitions, max_open_spill_files))
+    divisor        = num_partitions ** level
+
+    if divisor > 2 ** 64:
+        yield from group_rows(chain(in_memory, [overflow], rows)).items()
+        return
+
+    with tempfile.TemporaryDirectory(dir=temp_dir) as t_dir:
+        paths      = [os.path.join(t_dir, 'partition_{}.spill'.format(i)) for i in range(num_partitions)]
+        buffers    = [[] for _ in paths]
+        first_keys = [None] * num_partitions
+        is_mixed   = [False] * num_partitions
+        files      = [open(path, 'wb') for path in paths]
+
+        try:
+            for row in chain(in_memory, [overflow], rows):
+                k = key(row)
+                i = (hash(k) // divisor) % num_partitions
+
+                if first_keys[i] is None:
+                    first_keys[i] = (k,)
+                elif not is_mixed[i] and first_keys[i][0] != k:
+                    is_mixed[i] = True
+
+                buffers[i].append(row)
+
+                if len(buffers[i]) == 10_000:
+                    pickle.dump(buffers[i], files[i], protocol=pickle.HIGHEST_PROTOCOL)
+                    buffers[i] = []
+
+            for f, buffer in zip(files, buffers):
+                if buffer:
+                    pickle.dump(buffer, f, protocol=pickle.HIGHEST_PROTOCOL)
+        finally:
+            for f in files:
+                f.close()
+
+        del buffers
+
+        for path, first_key, mixed in zip(paths, first_keys, is_mixed):
+            if first_key is None:
+                pass
+            elif mixed:
+                yield from grouped_rows(read_spill_file(path), key, memory_limit,
+                                        num_partitions,
+                                        t_dir,
+                                        sample_nrows,
+                                        level + 1)
+            else:
+                yield first_key[0], list(read_spill_file(path))
+
+            os.remove(path)
+
+
+def read_file_rows(path, encoding=None, flux_class=flux_cls, **kwargs):
+    """ :return: (header, rows), where rows is a generator of primitive row values
+    .csv files and chunked .flux files (see flux_extended_cls.serialize(compression=...))
+    are streamed, one chunk at a time; single pickle stream .flux files are loaded whole;
+    path may also be a flux_cls
+    """
+    import csv
+
+    if isinstance(path, flux_cls):
+        flux = path
+        return flux.header_names(), (row.values for row in flux.matrix[1:])
+
+    filetype = arrow_file_extension(path)
+
+    if filetype in pickle_extensions and is_chunked_flux_file(path):
+        table  = read_flux_chunk_table(path)
+        chunks = read_flux_chunks(path, table, workers=1)
+
+        return list(table['header']), (values for chunk in chunks for values in chunk)
+
+    if filetype in pickle_extensions:
+        flux = flux_class.deserialize(path)
+        return flux.header_names(), (row.values for row in flux.matrix[1:])
+
+    if filetype != '.csv':
+        raise ValueError("invalid filetype: '{}' \nfiletype must be in {}"
+                         .format(filetype, ['.csv'] + list(pickle_extensions)))
+
+    newline = kwargs.pop('newline', '')
+
+    # region {closure functions}
+    def csv_rows():
+        """ the file is opened when the first row is requested, and closed when the generator
+        is exhausted, closed or garbage-collected
+        """
+        with open(path, 'r', encoding=encoding, newline=newline) as _f_:
+            _csv_reader_ = csv.reader(_f_, **kwargs)
+            next(_csv_reader_, None)
+
+            yield from _csv_reader_
+    # endregion
+
+    with open(path, 'r', encoding=encoding, newline=newline) as f:
+        header = next(csv.reader(f, **kwargs), [])
+
+    return header, csv_rows()
+
+
+def write_file_rows(path, header, rows, encoding=None, **kwargs):
+    """ .csv files and .flux files are streamed; .flux files are written as uncompressed
+    chunks (see flux_extended_cls.serialize(compression=...)), one chunk at a time
+    """
+    import csv
+
+    filetype = arrow_file_extension(path)
+
+    if filetype in pickle_extensions:
+        write_chunked_flux_file(path, header, rows, {}, compression=None, workers=1)
+        return
+
+    if filetype != '.csv':
+        raise ValueError("invalid filetype: '{}' \nfiletype must be in {}"
+                         .format(filetype, ['.csv'] + list(pickle_extensions)))
+
+    with open(path, 'w', encoding=encoding, newline=kwargs.pop('newline', '')) as f:
+        csv_writer = csv.writer(f, **kwargs)
+        csv_writer.writerow(header)
+        csv_writer.writerows(rows)
+
+
+def write_spill_file(path, rows, batch_nrows=10_000) -> str:
+    """ rows are pickled in batches, read back (in order) with read_spill_file() """
+    with open(path, 'wb') as f:
+        rows = iter(rows)
+        for batch in iter(lambda: list(islice(rows, batch_nrows)), []):
+            pickle.dump(batch, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    return path
+
+
+def read_spill_file(path):
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                batch = pickle.load(f)
+            except EOFError:
+                return
+
+            yield from batch
+
+
+class sort_key_cls:
+    """ sort key for a separate reverse flag on each value, for when sorting by
+    multiple stable passes is not possible (eg, heapq.merge())
+    """
+    __slots__ = ('values', 'reverses')
+
+    def __init__(self, values, reverses):
+        self.values   = values
+        self.reverses = reverses
+
+    def __lt__(self, other):
+        for v_1, v_2, reverse in zip(self.values, other.values, self.reverses):
+            if v_1 == v_2:
+                continue
+
+            if reverse:
+                return v_2 < v_1
+
+            return v_1 < v_2
+
+        return False
+
+    def __eq__(self, other):
+        """ heapq.merge() breaks ties by comparing (key, order) lists: requires equality of keys """
+        return self.values == other.values
@@ -0,0 +1,153 @@
+
+"""
+worker functions of flux_extended_cls.parallel_aggregate(), and parallel_aggregate_scaling() to benchmark it
+"""
+
+
+# reducers of flux_extended_cls.parallel_aggregate(): each worker returns one partial value per group
+# (see reduce_groups()), merged by the parent with these functions
+parallel_reducers = {'count': lambda a, b: a + b,
+                     'sum':   lambda a, b: a + b,
+                     'min':   min,
+                     'max':   max,
+                     'mean':  lambda a, b: (a[0] + b[0], a[1] + b[1])}
+
+
+def encoded_column(values):
+    """ :return: (array of int codes, list of unique values), codes in order of first appearance """
+    from array import array
+
+    codes = {}
+    a     = array('q', [codes.setdefault(v, len(codes)) for v in values])
+
+    return a, list(codes)
+
+
+def shared_column(a):
+    """ copy array into a new multiprocessing.shared_memory block """
+    from multiprocessing.shared_memory import SharedMemory
+
+    shm = SharedMemory(create=True, size=max(len(a) * a.itemsize, 1))
+    shm.buf[:len(a) * a.itemsize] = memoryview(a).cast('B')
+
+    return shm
+
+
+def aggregate_shared_rows(shm_names, typecodes, num_keys, reducers, lo, hi) -> dict:
+    """ worker process: attach to column buffers by name, aggregate rows lo:hi
+    shm_names and typecodes are None for the value columns of 'count' reducers
+
+    workers only close the blocks: they are unlinked by the parent, whose
+    resource tracker is shared with its workers
+    """
+    from multiprocessing.shared_memory import SharedMemory
+
+    shms    = [SharedMemory(name) if name is not None else None for name in shm_names]
+    columns = [shm.buf.cast(typecode) if shm is not None else None for shm, typecode in zip(shms, typecodes)]
+
+    try:
+        return aggregate_rows(columns, num_keys, reducers, lo, hi)
+    finally:
+        for shm, column in zip(shms, columns):
+            if shm is None:
+                continue
+
+            column.release()
+            shm.close()
+
+
+def aggregate_rows(columns, num_keys, reducers, lo, hi) -> dict:
+    """ {tuple of key codes: [partial value of each reducer]} for rows lo:hi
+
+    columns:
+        key code columns, followed by one value column for each reducer (None for 'count')
+        (arrays, or memoryviews of shared memory blocks)
+
+    columns are read through memoryview slices, without copying rows lo:hi into lists:
+    each row is given a group number, then each reducer accumulates into one
+    list slot per group, rather than collecting a list of row indices for every group
+    """
+    from array import array
+
+    group_numbers = {}
+    row_groups    = array('q', (group_numbers.setdefault(key, len(group_numbers))
+                                for key in zip(*[memoryview(c)[lo:hi] for c in columns[:num_keys]])))
+
+    num_groups = len(group_numbers)
+    partials   = []
+    for reducer, c in zip(reducers, columns[num_keys:]):
+        values = memoryview(c)[lo:hi] if c is not None else None
+        partials.append(reduce_groups(reducer, row_groups, values, num_groups))
+
+    return {key: [p[g] for p in partials] for key, g in group_numbers.items()}
+
+
+def reduce_groups(reducer, row_groups, values, num_groups) -> list:
+    """ partial value of reducer for each group number; values is None for 'count' """
+    if reducer in ('count', 'mean'):
+        counts = [0] * num_groups
+        for g in row_groups:
+            counts[g] += 1
+
+        if reducer == 'count':
+            return counts
+
+    if reducer in ('sum', 'mean'):
+        sums = [0.0] * num_groups
+        for g, v in zip(row_groups, values):
+            sums[g] += v
+
+        if reducer == 'sum':
+            return sums
+
+        return list(zip(sums, counts))
+
+    extremes = [None] * num_groups
+    if reducer == 'min':
+        for g, v in zip(row_groups, values):
+            e = extremes[g]
+            if e is None or v < e:
+                extremes[g] = v
+    else:
+        for g, v in zip(row_groups, values):
+            e = extremes[g]
+            if e is None or v > e:
+                extremes[g] = v
+
+    return extremes
+
+
+def parallel_aggregate_scaling(flux_class, num_rows=1_000_000, workers=(1, 2, 4, 8), num_keys=1_000, seed=0) -> dict:
+    """ benchmark of flux_class.parallel_aggregate() on random rows
+
+    :return: {'serial': seconds, num_workers: seconds, ...}
+        'serial' is the part that always runs in this process: encoding the key column and
+        converting the value column; the speedup over 1 worker is bounded by total / serial
+
+    eg:
+        from flux_extended import flux_extended_cls
+        for k, seconds in parallel_aggregate_scaling(flux_extended_cls).items():
+            print(k, seconds)
+    """
+    import random
+    from array import array
+    from time import perf_counter
+
+    rng  = random.Random(seed)
+    flux = flux_class([['key', 'amount']] +
+                      [['k{}'.format(rng.randrange(num_keys)), rng.random()] for _ in range(num_rows)])
+
+    aggregates = {'total': ('amount', 'sum')}
+    timings    = {}
+
+    t = perf_counter()
+    encoded_column([row.values[0] for row in flux.matrix[1:]])
+    array('d', [row.values[1] for row in flux.matrix[1:]])
+    timings['serial'] = perf_counter() - t
+
+    for w in workers:
+        t = perf_counter()
+        flux.parallel_aggregate('key', aggregates=aggregates, workers=w, min_worker_nrows=1)
+        timings[w] = perf_counter() - t
+
+    return timings
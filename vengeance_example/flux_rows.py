@@ -0,0 +1,229 @@
+
+"""
+row helpers of flux_extended_cls:
+    * row_blocks_cls, used by flux_extended_cls.concat() / .from_files()
+    * namedtuple classes and batches of .namedtuples(), .tuples(), .dicts()
+"""
+from collections import namedtuple
+from functools import lru_cache
+from itertools import islice
+
+from vengeance import flux_cls
+from vengeance.util.iter import ColumnNameError
+
+
+class row_blocks_cls:
+    """ chunked row store for building one large flux from many batches of rows
+
+    rows are held in a list of blocks, with the cumulative row count before each block:
+        * appending a batch copies its rows (new flux_row_cls objects over copied values lists,
+          as flux_cls(flux) does), or, with adopt=True, takes the batch's rows and values lists as they are
+        * rows[i] finds its block by bisect, O(log(number of blocks))
+        * .insert(i, rows) only splits the block containing i, rather than shifting every row after i
+        * .to_flux() builds flux.matrix once, at the end
+
+    eg:
+        rows = row_blocks_cls()
+        for batch in batches:           # fluxes, flux rows or lists of values
+            rows += batch
+        rows.insert(5, more_rows)
+        flux = rows.to_flux(flux_extended_cls)
+
+    compare to
+        flux = flux_cls()
+        for batch in batches:
+            flux = flux + batch         # copies every accumulated row on each batch: quadratic
+
+    adopt=True skips the copies when the batches are not used afterwards: adopted rows are moved,
+    after .to_flux() they belong to the new flux and refer to its headers
+
+    header rows:
+        * a flux's header row is never included
+        * a list of flux_row_cls: the first row is skipped if it is its flux's header row
+        * a list of lists: the first row holds column names only in the first batch, when
+          header_names were not given (unless appended with header=False), or when appended with header=True
+    """
+
+    def __init__(self, header_names=None, block_nrows=8_192, adopt=False):
+        self.header_names = list(header_names) if header_names is not None else None
+        self.block_nrows  = block_nrows
+        self.adopt        = adopt
+        self.blocks       = []
+        self.offsets      = [0]
+
+    def append(self, rows, header=None):
+        """ append a batch of rows: a flux, a list of flux_row_cls or a list of lists
+        header: whether the first of a list of lists is a row of column names
+                (None: only if header_names are not known yet)
+        """
+        rows = self.__batch_rows(rows, header)
+        if not rows:
+            return self
+
+        if self.blocks and len(self.blocks[-1]) + len(rows) <= self.block_nrows:
+            self.blocks[-1].extend(rows)
+        else:
+            self.blocks.append(rows)
+            self.offsets.append(self.offsets[-1])
+
+        self.offsets[-1] += len(rows)
+
+        return self
+
+    def extend(self, batches):
+        for rows in batches:
+            self.append(rows)
+
+        return self
+
+    def insert(self, i, rows, header=None):
+        """ insert rows before position i (0 is the first row after header), see .append() for header """
+        from bisect import bisect_right
+
+        if i < 0:
+            i += len(self)
+        if i >= len(self):
+            return self.append(rows, header)
+
+        rows = self.__batch_rows(rows, header)
+        if not rows:
+            return self
+
+        b     = bisect_right(self.offsets, max(i, 0)) - 1
+        j     = i - self.offsets[b]
+        block = self.blocks[b]
+
+        if len(block) + len(rows) <= self.block_nrows:
+            block[j:j] = rows
+            split = [block]
+        else:
+            split = [block[:j], rows, block[j:]]
+            split = [block for block in split if block]
+
+        self.blocks[b:b + 1] = split
+        self.__reset_offsets(b)
+
+        return self
+
+    def to_flux(self, flux_class=flux_cls):
+        """ build flux.matrix in a single pass over the blocks """
+        import gc
+        from itertools import chain
+
+        if self.header_names is None:
+            return flux_class()
+
+        flux = flux_class([self.header_names])
+        h    = flux.headers
+        m    = flux.matrix
+
+        gc_enabled = gc.isenabled()
+        if gc_enabled: gc.disable()
+
+        m.extend(chain.from_iterable(self.blocks))
+        for row in islice(m, 1, None):
+            row.__dict__['headers'] = h
+
+        if gc_enabled: gc.enable()
+
+        if hasattr(flux, 'validate_row_lengths'):
+            flux.validate_row_lengths()
+
+        return flux
+
+    def __batch_rows(self, rows, header) -> list:
+        from vengeance.classes.flux_row_cls import flux_row_cls
+
+        header_names = None
+
+        if isinstance(rows, flux_cls):
+            header_names = rows.header_names()
+            rows         = rows.matrix[1:]
+        else:
+            rows = list(rows)
+
+            if rows and isinstance(rows[0], flux_row_cls):
+                header_names = rows[0].header_names()
+                if rows[0].is_header_row():
+                    del rows[0]
+            elif rows and (header or (header is None and self.header_names is None)):
+                header_names = rows.pop(0)
+
+        if self.header_names is None:
+            if header_names is None:
+                raise ColumnNameError('column names are required: submit header_names, '
+                                      'or a first batch with a header row')
+
+            self.header_names = list(header_names)
+        elif header_names is not None and list(header_names) != self.header_names:
+            raise ColumnNameError('rows do not have the same column names: \n\texpected: {}\n\trecieved: {}'
+                                  .format(self.header_names, list(header_names)))
+
+        if not rows:
+            return []
+
+        is_flux_rows = isinstance(rows[0], flux_row_cls)
+
+        if self.adopt:
+            if is_flux_rows: return rows
+            else:            return [flux_row_cls(None, values) for values in rows]
+
+        if is_flux_rows: return [flux_row_cls(None, list(row.values), row.row_label) for row in rows]
+        else:            return [flux_row_cls(None, list(values)) for values in rows]
+
+    def __reset_offsets(self, b):
+        offsets = self.offsets
+        del offsets[b + 1:]
+
+        for block in self.blocks[b:]:
+            offsets.append(offsets[-1] + len(block))
+
+    def __getitem__(self, i):
+        from bisect import bisect_right
+
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            if step > 0:
+                return list(islice(self, start, stop, step))
+
+            # islice() does not accept negative steps: rows are looked up by position instead
+            return [self[j] for j in range(start, stop, step)]
+
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('row index out of range')
+
+        b = bisect_right(self.offsets, i) - 1
+        return self.blocks[b][i - self.offsets[b]]
+
+    def __iadd__(self, rows):
+        return self.append(rows)
+
+    def __len__(self):
+        return self.offsets[-1]
+
+    def __iter__(self):
+        from itertools import chain
+        return chain.from_iterable(self.blocks)
+
+    def __repr__(self):
+        return '{} {}: {:,} rows in {:,} blocks'.format(self.__class__.__name__,
+                                                      self.header_names,
+                                                      len(self),
+                                                      len(self.blocks))
+
+
+@lru_cache(maxsize=128)
+def row_namedtuple_class(names):
+    """ names: tuple of column names """
+    return namedtuple('Row', names)
+
+
+def batched_rows(rows, batch=None):
+    """ rows unchanged if batch is None, otherwise lists of up to batch rows """
+    if batch is None:
+        return rows
+
+    rows = iter(rows)
+    return iter(lambda: list(islice(rows, batch)), [])
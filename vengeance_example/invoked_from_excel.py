@@ -1,6 +1,19 @@
 
 """
     ./files/example.xlsm, 'invoke python' tab
+
+    every macro click starts a new Python interpreter; to skip interpreter
+    startup and imports on each click, start a long-lived server once:
+        > python -c "import invoked_from_excel; invoked_from_excel.parse_cmd_line('serve')"
+
+    parse_cmd_line() then forwards its arguments to the server and prints the
+    server's output as it arrives; if no server is running, the command is
+    executed in this process, as before
+
+    the server only accepts requests with its token (written to server_token_path
+    on startup, readable only by the current user, or set by the
+    VENGEANCE_EXAMPLE_TOKEN environment variable), and only runs the named
+    commands of execute_command()
 """
 
 import os
@@ -11,6 +24,22 @@ from time import sleep
 
 from argparse import ArgumentParser
 
+server_address    = ('127.0.0.1', int(os.environ.get('VENGEANCE_EXAMPLE_PORT', 50_717)))
+server_token_path = os.path.join(os.path.expanduser('~'), '.vengeance_example_server_token')
+connect_timeout   = 0.25
+exit_status_token = '\x04exit:'
+
+
+class command_parser_cls(ArgumentParser):
+    """ usage errors are written to sys.stdout, which the server routes to its client,
+    rather than to the stderr of the process
+    """
+    def error(self, message):
+        self.print_usage(sys.stdout)
+        sys.stdout.write('{}: error: {}\n'.format(self.prog, message))
+
+        raise SystemExit(2)
+
 
 def parse_cmd_line(fake_cli_str=None):
     print('invoked_from_excel.py')
@@ -18,18 +47,40 @@ def parse_cmd_line(fake_cli_str=None):
     if fake_cli_str:
         __add_sys_args(fake_cli_str)
 
-    parser = ArgumentParser()
-    parser.add_argument('command')
+    argv = sys.argv[1:]
+
+    if argv and argv[0] == 'serve':
+        return serve()
+
+    exit_status = forward_to_server(argv)
+
+    if exit_status is None and argv == ['stop_server']:
+        print('no server running')
+        exit_status = 0
+    elif exit_status is None:
+        exit_status = execute_command(argv)
+
+    if exit_status:
+        sys.exit(exit_status)
+
+
+def execute_command(argv):
+    """ :return: exit status """
+    commands = {'write_file':          write_file,
+                'write_file_and_wait': write_file_and_wait}
+
+    parser = command_parser_cls(prog='invoked_from_excel')
+    parser.add_argument('command', choices=list(commands))
     parser.add_argument('--content', default='')
 
-    cli_args = parser.parse_args()
+    try:
+        cli_args = parser.parse_args(argv)
+    except SystemExit as e:
+        return e.code
 
-    if cli_args.command == 'write_file':
-        write_file(cli_args.content)
-    elif cli_args.command == 'write_file_and_wait':
-        write_file_and_wait(cli_args.content)
-    else:
-        raise ValueError('invalid command {}'.format(cli_args.command))
+    commands[cli_args.command](cli_args.content)
+
+    return 0
 
 
 def write_file(content):
@@ -46,6 +97,170 @@ def write_file_and_wait(content):
     sleep(5)
 
 
+# region {server}
+def forward_to_server(argv):
+    """ :return: exit status from server, or None if no server is running """
+    import json
+    import socket
+
+    token = server_token()
+    if token is None:
+        return None
+
+    try:
+        conn = socket.create_connection(server_address, timeout=connect_timeout)
+    except OSError:
+        return None
+
+    with conn:
+        conn.settimeout(None)
+        conn.sendall((json.dumps({'token': token, 'argv': argv}) + '\n').encode('utf-8'))
+
+        with conn.makefile('r', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith(exit_status_token):
+                    return int(line[len(exit_status_token):])
+
+                sys.stdout.write(line)
+                sys.stdout.flush()
+
+    return 1
+
+
+def server_token():
+    """ :return: token of the running server, or None if no server has written one """
+    token = os.environ.get('VENGEANCE_EXAMPLE_TOKEN')
+    if token:
+        return token
+
+    try:
+        with open(server_token_path, 'r') as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def write_server_token():
+    """ :return: VENGEANCE_EXAMPLE_TOKEN if set, otherwise a new random token,
+    written to a file only the current user can read
+    """
+    import secrets
+
+    token = os.environ.get('VENGEANCE_EXAMPLE_TOKEN')
+    if token:
+        return token
+
+    token = secrets.token_hex(32)
+
+    fd = os.open(server_token_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        f.write(token)
+
+    return token
+
+
+def serve():
+    """ run until interrupted, or until a client sends the 'stop_server' command
+
+    commands run in separate threads, so a long command (eg, write_file_and_wait)
+    does not block other clicks; each thread's print() output is sent to its own client
+    """
+    import hmac
+    import json
+    import socket
+    import threading
+    import traceback
+    from socketserver import StreamRequestHandler
+    from socketserver import ThreadingTCPServer
+
+    # imports are paid once, here, instead of on every click
+    import vengeance
+
+    # region {closure classes}
+    class thread_stdout_cls:
+        """ routes writes to sys.stdout to the stream of the current thread's client """
+        def __init__(self, default):
+            self.default = default
+            self.local   = threading.local()
+
+        def write(self, s):
+            return getattr(self.local, 'stream', self.default).write(s)
+
+        def flush(self):
+            return getattr(self.local, 'stream', self.default).flush()
+
+        def __getattr__(self, name):
+            return getattr(self.default, name)
+
+    class command_server_cls(ThreadingTCPServer):
+        """ SO_REUSEADDR on Windows would let another process bind the same port,
+        so the port is bound exclusively there instead
+        """
+        allow_reuse_address = (os.name != 'nt')
+        daemon_threads      = True
+
+        def server_bind(self):
+            if hasattr(socket, 'SO_EXCLUSIVEADDRUSE'):
+                self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_EXCLUSIVEADDRUSE, 1)
+
+            super().server_bind()
+
+    class command_handler_cls(StreamRequestHandler):
+        def handle(self):
+            stream = self.connection.makefile('w', encoding='utf-8', buffering=1)
+
+            try:
+                request = json.loads(self.rfile.readline().decode('utf-8'))
+                argv    = list(request['argv'])
+                is_valid_token = hmac.compare_digest(str(request['token']), token)
+            except (ValueError, TypeError, KeyError):
+                is_valid_token = False
+
+            if not is_valid_token:
+                stream.write('invalid request or server token\n')
+                stream.write('{}1\n'.format(exit_status_token))
+                stream.close()
+                return
+
+            if argv == ['stop_server']:
+                threading.Thread(target=server.shutdown, daemon=True).start()
+                stream.write('{}0\n'.format(exit_status_token))
+                stream.close()
+                return
+
+            stdout.local.stream = stream
+            try:
+                exit_status = execute_command(argv)
+            except Exception:
+                traceback.print_exc(file=stream)
+                exit_status = 1
+            finally:
+                del stdout.local.stream
+
+            stream.write('{}{}\n'.format(exit_status_token, exit_status or 0))
+            stream.close()
+    # endregion
+
+    stdout = thread_stdout_cls(sys.stdout)
+
+    with command_server_cls(server_address, command_handler_cls) as server:
+        token      = write_server_token()
+        sys.stdout = stdout
+
+        print('invoked_from_excel server listening on {}:{} (vengeance {})'.format(*server_address,
+                                                                                    vengeance.__version__))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sys.stdout = stdout.default
+
+            if not os.environ.get('VENGEANCE_EXAMPLE_TOKEN'):
+                os.remove(server_token_path)
+# endregion
+
+
 def __add_sys_args(cli_str):
     sys.argv = ['']
 
@@ -57,3 +272,5 @@ def __add_sys_args(cli_str):
 # for debugging in IDE
 # if __name__ == '__main__':
 #     parse_cmd_line('write_file_and_wait --content invoke_python_test_1')
+#     parse_cmd_line('serve')
+#     parse_cmd_line('stop_server')
@@ -6,20 +6,28 @@
     > cd "/{vengeance_example}/"
     > python main.py
 """
-try:
-    import flux_example
-    import excel_example
-    import share
-except (ModuleNotFoundError, ImportError):
-    from . import flux_example
-    from . import excel_example
-    from . import share
 
 
 def main():
+    # example modules are imported when they are run: excel_example
+    # pulls in vengeance.excel_com, which flux_example never needs
+    try:
+        import flux_example
+    except (ModuleNotFoundError, ImportError):
+        from . import flux_example
+
     flux_example.main()
+
+    # try:
+    #     import excel_example
+    # except (ModuleNotFoundError, ImportError):
+    #     from . import excel_example
+    #
     # excel_example.main()
 
+    # import times of share and of the vengeance_example package are
+    # checked by tests/test_share.py (share.assert_import_budget())
+
     pass
 
 
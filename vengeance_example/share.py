@@ -1,20 +1,41 @@
 
 import os
 
+from datetime import datetime
+from datetime import timedelta
+from typing import TYPE_CHECKING
 from typing import Any
-import vengeance as vgc
-# from vengeance import open_workbook
-# from vengeance import close_workbook
-# from vengeance import lev_cls
-from vengeance import flux_cls
+from typing import Dict
+from typing import Tuple
+
+# vengeance is imported within functions, so importing share (eg, from a
+# short-lived job, or to check import times) does not pay for vengeance
+if TYPE_CHECKING:
+    from vengeance import flux_cls
 
 ''' :types: '''
-wb:      Any
-wb_levs: (None, dict)
+wb:        Any
+wb_levs:   (None, dict)
+wb_fluxes: (None, dict)
 
 wb        = None
 wb_levs   = {}
-files_dir = os.path.split(os.path.realpath(__file__))[0] + '\\files\\'
+wb_fluxes = {}      # fluxes read from workbook files by load_sheets(), {(path, *lev_key): flux_cls}
+files_dir = os.path.join(os.path.split(os.path.realpath(__file__))[0], 'files', '')
+
+# .Value2 date serials count days from 1899-12-30 (absorbs Excel's 1900 leap-year bug)
+excel_epoch       = datetime(1899, 12, 30)
+excel_block_nrows = 20_000
+
+# COM error codes returned by .Value2 for error cells, escaped to the same strings as lev.values()
+# (same as vengeance.excel_com.excel_constants.excel_errors, which cannot be imported without pywin32)
+excel_error_codes = {-2146826281: '#excel_error: div0#',
+                     -2146826246: '#excel_error: na#',
+                     -2146826259: '#excel_error: name#',
+                     -2146826288: '#excel_error: null#',
+                     -2146826252: '#excel_error: num#',
+                     -2146826265: '#excel_error: ref#',
+                     -2146826273: '#excel_error: value#'}
 
 if not os.path.exists(files_dir):
     raise FileExistsError('whoops, need to modify files_dir')
@@ -51,16 +72,97 @@ def print_profiler(profiler):
         pass
 
 
+def import_times(statement='from vengeance import flux_cls') -> 'flux_cls':
+    """ cold import times of statement, from 'python -X importtime' in a new interpreter
+
+    one row per imported module, in import order:
+        ['module', 'depth', 'self_seconds', 'cumulative_seconds']
+    depth 0 are modules imported directly by statement
+    """
+    import subprocess
+    import sys
+
+    from vengeance import flux_cls
+
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                               capture_output=True,
+                               text=True,
+                               cwd=os.path.split(os.path.realpath(__file__))[0])
+    if completed.returncode != 0:
+        raise ImportError('{!r} failed:\n{}'.format(statement, completed.stderr))
+
+    m = [['module', 'depth', 'self_seconds', 'cumulative_seconds']]
+    for line in completed.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or '[us]' in line:
+            continue
+
+        us_self, us_cumulative, module = line[len('import time:'):].split('|')
+        depth = (len(module) - len(module.lstrip()) - 1) // 2
+
+        m.append([module.strip(),
+                  depth,
+                  int(us_self) / 1e6,
+                  int(us_cumulative) / 1e6])
+
+    return flux_cls(m)
+
+
+def assert_import_budget(statement='from vengeance import flux_cls', budget_seconds=None):
+    """ raise AssertionError if cold import of statement takes longer than budget_seconds
+
+    budget_seconds defaults to the VENGEANCE_EXAMPLE_IMPORT_BUDGET environment variable,
+    or 0.5 seconds; short-lived jobs (eg, invoked_from_excel.py) pay this on every run
+    """
+    if budget_seconds is None:
+        budget_seconds = float(os.environ.get('VENGEANCE_EXAMPLE_IMPORT_BUDGET', 0.5))
+
+    flux = import_times(statement)
+    total_seconds = sum(row.cumulative_seconds for row in flux if row.depth == 0)
+
+    if total_seconds > budget_seconds:
+        flux.sort('cumulative_seconds', reverse=True)
+        slowest = ['    {:<40} {:.3f}s'.format(row.module, row.cumulative_seconds) for row in flux.matrix[1:11]]
+
+        raise AssertionError('{!r} imported in {:.3f}s, budget is {:.3f}s\n{}'
+                             .format(statement, total_seconds, budget_seconds, '\n'.join(slowest)))
+
+    return total_seconds
+
+
 # noinspection PyTypeChecker
 def random_matrix(num_rows=100,
                   num_cols=3,
                   len_values=3,
                   with_header=True,
-                  value_type=str):
-
+                  value_type=str,
+                  *,
+                  seed=None,
+                  none_ratio=0.0,
+                  cardinality=None,
+                  cache=False):
+    """
+    value_type:
+        str, float, int or datetime, or a sequence of these to mix column types, eg
+            value_type=(str, str, float, int, datetime)
+    seed:
+        identical matrix for identical arguments
+    none_ratio:
+        fraction of values in each column replaced with None
+    cardinality:
+        maximum number of unique values in each column (eg, to simulate grouping keys)
+    cache:
+        store matrix in files_dir/fixtures/ on first call, keyed by all other arguments,
+        and load it from there on subsequent calls (requires a seed)
+
+    values are generated a whole column at a time (with numpy if installed)
+    rather than one value at a time
+    """
     from string import ascii_lowercase
-    from random import choices
-    from random import uniform
+    import gc
+    import random
+
+    import vengeance as vgc
 
     # region {closure functions}
     def header_names():
@@ -77,38 +179,163 @@ def random_matrix(num_rows=100,
 
         return h
 
-    def random_chars():
-        return ''.join(choices(ascii_lowercase, k=len_values))
-
-    def random_numbers():
-        return round(uniform(0, 9), len_values)
+    def column_types():
+        if isinstance(value_type, type):
+            return [value_type] * num_cols
+
+        vt = list(value_type)
+        return [vt[ci % len(vt)] for ci in range(num_cols)]
+
+    def random_column_numpy(vt, n):
+        if vt == str:
+            c = rng.integers(97, 123, size=(n, len_values), dtype=numpy.uint8)
+            c = c.view('S{}'.format(len_values)).ravel().astype('U')
+        elif vt == float:
+            c = rng.uniform(0, 9, n).round(len_values)
+        elif vt == int:
+            c = rng.integers(0, 10 ** len_values, n)
+        elif vt == datetime:
+            c = rng.integers(0, date_range_days, n) * 86_400
+            c = (numpy.datetime64(date_epoch, 's') + c).astype(object)
+        else:
+            raise TypeError('invalid value_type: {}'.format(vt))
+
+        return c
+
+    def random_column_python(vt, n):
+        if vt == str:
+            s = ''.join(rng.choices(ascii_lowercase, k=n * len_values))
+            c = [s[i:i + len_values] for i in range(0, n * len_values, len_values)]
+        elif vt == float:
+            c = [round(rng.uniform(0, 9), len_values) for _ in range(n)]
+        elif vt == int:
+            c = rng.choices(range(10 ** len_values), k=n)
+        elif vt == datetime:
+            c = [date_epoch + timedelta(days=d) for d in rng.choices(range(date_range_days), k=n)]
+        else:
+            raise TypeError('invalid value_type: {}'.format(vt))
+
+        return c
+
+    def random_column(vt):
+        if cardinality is None:
+            c = random_column_f(vt, num_rows)
+        elif numpy_installed:
+            c = random_column_f(vt, cardinality)
+            c = c[rng.integers(0, cardinality, num_rows)]
+        else:
+            c = random_column_f(vt, cardinality)
+            c = rng.choices(c, k=num_rows)
+
+        if numpy_installed:
+            c = c.tolist()
+
+        return c
+
+    def replace_with_none(c):
+        k = int(num_rows * none_ratio)
+        if k == 0:
+            return c
+
+        if numpy_installed:
+            indices = rng.choice(num_rows, k, replace=False).tolist()
+        else:
+            indices = rng.sample(range(num_rows), k)
+
+        for i in indices:
+            c[i] = None
+
+        return c
     # endregion
 
-    if value_type == str:
-        m = [[random_chars() for _ in range(num_cols)]
-                             for _ in range(num_rows)]
-        # m = [[random_chars()] * num_cols
-        #                         for _ in range(num_rows)]
-    elif value_type == float:
-        m = [[random_numbers() for _ in range(num_cols)]
-                               for _ in range(num_rows)]
-        # m = [[random_numbers()] * num_cols
-        #                           for _ in range(num_rows)]
+    valid_types = (str, float, int, datetime)
+
+    if cache and (seed is None):
+        raise ValueError('cached fixtures require a seed')
+    if not isinstance(len_values, int) or len_values < 1:
+        raise ValueError('len_values must be an int of at least 1, not {!r}'.format(len_values))
+    if cardinality is not None and (not isinstance(cardinality, int) or cardinality < 1):
+        raise ValueError('cardinality must be None or an int of at least 1, not {!r}'.format(cardinality))
+    if not 0.0 <= none_ratio <= 1.0:
+        raise ValueError('none_ratio must be between 0.0 and 1.0, not {!r}'.format(none_ratio))
+
+    invalid = [vt for vt in column_types() if vt not in valid_types]
+    if invalid:
+        raise TypeError('invalid value_type: {}, expected one of {}'
+                        .format(invalid[0], [vt.__name__ for vt in valid_types]))
+
+    try:
+        import numpy
+        numpy_installed = True
+    except ImportError:
+        numpy_installed = False
+
+    date_epoch      = datetime(2000, 1, 1)
+    date_range_days = 365 * 20
+
+    if numpy_installed:
+        rng = numpy.random.default_rng(seed)
+        random_column_f = random_column_numpy
     else:
-        raise AssertionError
+        rng = random.Random(seed)
+        random_column_f = random_column_python
+
+    # fixtures are stored by column: far fewer (and larger) objects to pickle than rows
+    # numpy and random.Random draw different values from the same seed, so the generator is part of the key
+    path = None
+    if cache:
+        path = random_matrix_fixture_path(num_rows, num_cols, len_values,
+                                          value_type, seed, none_ratio, cardinality,
+                                          'numpy' if numpy_installed else 'python')
+
+    gc_enabled = gc.isenabled()
+    if gc_enabled: gc.disable()
+
+    try:
+        if path and os.path.exists(path):
+            columns = vgc.read_file(path, filetype='.pkl')
+        else:
+            columns = [replace_with_none(random_column(vt)) for vt in column_types()]
+
+            if path:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                vgc.write_file(path, columns, filetype='.pkl')
+
+        m = [list(row) for row in zip(*columns)]
+    finally:
+        if gc_enabled: gc.enable()
 
     if with_header:
         m.insert(0, header_names())
 
-    # m = tuple(tuple(row) for row in m)
-
     return m
 
 
+def random_matrix_fixture_path(*args):
+    """ fixtures are keyed by a hash of all random_matrix() arguments """
+    from hashlib import sha1
+
+    def stable_repr(a):
+        """ repr(type) includes memory addresses for some types, use names instead """
+        if isinstance(a, type):
+            return a.__name__
+        if isinstance(a, (list, tuple)):
+            return [stable_repr(v) for v in a]
+
+        return a
+
+    key = repr([stable_repr(a) for a in args])
+    key = sha1(key.encode()).hexdigest()[:16]
+
+    return os.path.join(files_dir, 'fixtures', 'random_matrix_{}.pkl'.format(key))
+
+
 def set_project_workbook(excel_app='any',
                          **kwargs):
     global wb
 
+    import vengeance as vgc
+
     print()
     wb = vgc.open_workbook(files_dir + 'example.xlsm',
                            excel_app,
@@ -122,6 +349,8 @@ def close_project_workbook(save=True):
 
     import gc
 
+    import vengeance as vgc
+
     if isinstance(wb_levs, dict):
         wb_levs = {}
 
@@ -144,15 +373,6 @@ def worksheet_to_lev(ws, *,
         return ws
 
     # region {closure functions}
-    def worksheet_name():
-        """ convert ws variable type to hashable value """
-        if isinstance(ws, str):
-            return ws.lower()
-        if hasattr(ws, 'Name'):
-            return ws.Name.lower()      # _Worksheet win32com type
-
-        return ws
-
     def worksheet_headers():
         headers = {}
         if h_r:
@@ -166,16 +386,11 @@ def worksheet_to_lev(ws, *,
     global wb
     global wb_levs
 
-    ws_name = worksheet_name()
-    if ws_name in ('sheet1', 'empty sheet'):
-        h_r = 1
-        m_r = 0
-    elif c_1 is None:
-        c_1 = 'B'
-
-    lev_key = (ws_name,
-               m_r, h_r,
-               c_1, c_2)
+    lev_key = worksheet_lev_key(ws, m_r=m_r, h_r=h_r,
+                                    c_1=c_1, c_2=c_2)
+    (ws_name,
+     m_r, h_r,
+     c_1, c_2) = lev_key
     is_cached = isinstance(wb_levs, dict)
 
     if is_cached and lev_key in wb_levs:
@@ -201,15 +416,347 @@ def worksheet_to_lev(ws, *,
     return lev
 
 
+def worksheet_lev_key(ws, *,
+                      m_r=1,
+                      h_r=2,
+                      c_1=None,
+                      c_2=None):
+    """ key into wb_levs: (ws_name, m_r, h_r, c_1, c_2), after per-sheet defaults are applied """
+
+    # region {closure functions}
+    def worksheet_name():
+        """ convert ws variable type to hashable value """
+        if isinstance(ws, str):
+            return ws.lower()
+        if hasattr(ws, 'Name'):
+            return ws.Name.lower()      # _Worksheet win32com type
+
+        return ws
+    # endregion
+
+    ws_name = worksheet_name()
+    if ws_name in ('sheet1', 'empty sheet'):
+        h_r = 1
+        m_r = 0
+    elif c_1 is None:
+        c_1 = 'B'
+
+    return (ws_name,
+            m_r, h_r,
+            c_1, c_2)
+
+
 def worksheet_to_flux(ws, *,
                       m_r=1,
                       h_r=2,
                       c_1=None,
-                      c_2=None) -> flux_cls:
+                      c_2=None,
+                      value2=False,
+                      date_columns=None) -> 'flux_cls':
+    """
+    value2:
+        False: values are read as flux_cls(lev) reads them, through .Value (dates are datetimes)
+        True:  values are read through worksheet_values(), a single .Value2 call per block
+               of rows; dates are serial numbers unless listed in date_columns
+    """
+    from vengeance import flux_cls
+
+    lev = worksheet_to_lev(ws, m_r=m_r, h_r=h_r,
+                               c_1=c_1, c_2=c_2)
+    if not value2:
+        if date_columns is not None:
+            raise ValueError('date_columns requires value2=True (.Value already returns dates as datetimes)')
+
+        return flux_cls(lev)
+
+    if lev.is_empty():
+        return flux_cls()
+
+    m = list(worksheet_values(lev, date_columns=date_columns))
+    return flux_cls(m)
 
+
+def worksheet_values(ws, r_1='*h', r_2='*l', *,
+                     date_columns=None,
+                     block_nrows=excel_block_nrows,
+                     m_r=1,
+                     h_r=2,
+                     c_1=None,
+                     c_2=None):
+    """ same rows as lev.values(r_1, r_2), read at the cost of a raw .Value2 call
+
+    lev.values() escapes Excel's error values by reading .Value, then looking up
+    every error cell individually through .SpecialCells(), which is a separate
+    COM call per error. this instead reads .Value2 once per block of rows, and
+    translates the block in bulk (see escape_excel_values())
+
+    date_columns:
+        .Value2 returns dates as serial numbers; columns listed here (by header
+        name, column letter or 0-based offset) are converted to datetimes
+    m_r, h_r, c_1, c_2:
+        anchors of ws when it is a sheet name, see worksheet_to_lev()
+    """
     lev = worksheet_to_lev(ws, m_r=m_r, h_r=h_r,
                                c_1=c_1, c_2=c_2)
-    return flux_cls(lev)
+    if lev.is_empty():
+        yield []
+        return
+
+    excel_range  = lev.range('*f {}:*l {}'.format(r_1, r_2))
+    date_indices = lev_column_indices(lev, date_columns)
+
+    ws_com = lev.ws
+    r_f    = excel_range.Row
+    r_l    = r_f + excel_range.Rows.Count - 1
+    c_f    = excel_range.Column
+    c_l    = c_f + excel_range.Columns.Count - 1
+
+    for r_b in range(r_f, r_l + 1, block_nrows):
+        r_e = min(r_b + block_nrows - 1, r_l)
+        m   = ws_com.Range(ws_com.Cells(r_b, c_f),
+                           ws_com.Cells(r_e, c_l)).Value2
+
+        yield from escape_excel_values(m, date_indices)
+
+
+def worksheet_flux_rows(ws, r_1='*h', r_2='*l', *,
+                        date_columns=None,
+                        block_nrows=excel_block_nrows,
+                        m_r=1,
+                        h_r=2,
+                        c_1=None,
+                        c_2=None):
+    """ same rows as lev.flux_rows(r_1, r_2), read through worksheet_values() """
+    from vengeance.classes.flux_row_cls import flux_row_cls
+    from vengeance.util.iter import map_values_to_enum
+
+    lev = worksheet_to_lev(ws, m_r=m_r, h_r=h_r,
+                               c_1=c_1, c_2=c_2)
+
+    if lev.headers:
+        headers = map_values_to_enum(lev.headers.keys())
+    elif lev.meta_headers:
+        headers = map_values_to_enum(lev.meta_headers.keys())
+    else:
+        headers = {}
+
+    if lev.is_empty():
+        yield flux_row_cls(headers, [], '')
+        return
+
+    reserved = headers.keys() & set(flux_row_cls.reserved_names())
+    if reserved:
+        raise NameError("reserved name(s) {} found in header row {}"
+                        .format(list(reserved), list(headers.keys())))
+
+    r = lev.range('*f {}:*l {}'.format(r_1, r_2)).Row
+    m = worksheet_values(lev, r_1, r_2,
+                         date_columns=date_columns,
+                         block_nrows=block_nrows)
+
+    for r, row in enumerate(m, r):
+        a = '${}${}:${}${}'.format(lev.first_c, r, lev.last_c, r)
+        yield flux_row_cls(headers, row, a)
+
+
+def escape_excel_values(m, date_indices=()):
+    """ translate a block of raw .Value2 values
+
+    .Value2 returns numbers as floats and error cells as int COM error codes: rows are
+    screened with a single C-level type scan, and only rows that contain an int are walked
+    value by value; ints that are not error codes (see excel_error_codes) are left unchanged
+
+    date serials are converted one column at a time, only for date_indices
+    """
+    if not isinstance(m, tuple):
+        m = ((m,),)
+
+    m = [list(row) for row in m]
+
+    for row in m:
+        if int not in map(type, row):
+            continue
+
+        for i, v in enumerate(row):
+            if type(v) is int and v in excel_error_codes:
+                row[i] = excel_error_codes[v]
+
+    for c in date_indices:
+        for row in m:
+            v = row[c]
+            if type(v) is float:
+                row[c] = excel_epoch + timedelta(days=v)
+
+    return m
+
+
+def lev_column_indices(lev, names):
+    """ convert header names, meta names or column letters to 0-based offsets from lev.first_c """
+    if not names:
+        return []
+
+    if isinstance(names, (str, int)):
+        names = [names]
+
+    c_f = lev.col_number(lev.first_c)
+    indices = []
+
+    for n in names:
+        if isinstance(n, int):
+            indices.append(n)
+            continue
+
+        c = lev.headers.get(n) or lev.meta_headers.get(n) or n
+        indices.append(lev.col_number(c) - c_f)
+
+    return indices
+
+
+def load_sheets(sheets, workers=None) -> Dict[Tuple[str, str], 'flux_cls']:
+    """ parse many worksheets, from any number of workbooks, concurrently
+
+    sheets: [(path, ws_name), (path, ws_name, {'c_1': ..., 'c_2': ...}), ...]
+        keyword arguments are the same as share.worksheet_to_flux()
+
+    :return: {(path, ws_name): flux_cls}, in the same order as sheets
+
+    each worksheet is read directly from the file (openpyxl) in a separate process,
+    so workers do not compete over a single Excel instance. sheets of the project
+    workbook already in wb_levs are converted from the cached lev_cls instead of being
+    read again; sheets read from file are cached in wb_fluxes under (path, *lev_key),
+    since the same worksheet name may appear in more than one workbook
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    from vengeance import flux_cls
+
+    global wb_levs
+
+    project_path = os.path.normcase(os.path.realpath(files_dir + 'example.xlsm'))
+    is_cached    = isinstance(wb_levs, dict)
+    is_f_cached  = isinstance(wb_fluxes, dict)
+
+    fluxes  = {}
+    pending = {}
+
+    for sheet in sheets:
+        path, ws_name, *kwargs = sheet
+        kwargs  = kwargs[0] if kwargs else {}
+        path_n  = os.path.normcase(os.path.realpath(path))
+        lev_key = worksheet_lev_key(ws_name, **kwargs)
+        f_key   = (path_n, *lev_key)
+
+        fluxes[(path, ws_name)] = None
+
+        if is_cached and (path_n == project_path) and (lev_key in wb_levs):
+            fluxes[(path, ws_name)] = worksheet_to_flux(wb_levs[lev_key])
+        elif is_f_cached and (f_key in wb_fluxes):
+            fluxes[(path, ws_name)] = wb_fluxes[f_key].copy()
+        else:
+            pending[(path, ws_name)] = f_key
+
+    f_args = [(path, *f_key[1:]) for (path, _), f_key in pending.items()]
+
+    if len(f_args) <= 1 or workers == 1:
+        matrices = list(map(read_worksheet_file, f_args))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            matrices = list(executor.map(read_worksheet_file, f_args))
+
+    for (k, f_key), m in zip(pending.items(), matrices):
+        flux = flux_cls(m)
+        if is_f_cached:
+            wb_fluxes[f_key] = flux.copy()
+
+        fluxes[k] = flux
+
+    return fluxes
+
+
+def read_worksheet_file(f_args):
+    """ read worksheet values directly from file, without an Excel instance
+
+    f_args: (path, ws_name, m_r, h_r, c_1, c_2)
+        column boundaries are resolved like lev_cls: c_1 and c_2 may be header names,
+        meta names or column letters, defaulting to the first and last used columns
+
+    the result should match list(lev.values()): header row onwards, trailing empty
+    rows removed, with error cells escaped to the same strings as lev.values()
+    """
+    from openpyxl import load_workbook
+    from openpyxl.utils import column_index_from_string
+
+    (path, ws_name,
+     m_r, h_r,
+     c_1, c_2) = f_args
+
+    excel_errors = {'#DIV/0!': '#excel_error: div0#',
+                    '#N/A':    '#excel_error: na#',
+                    '#NAME?':  '#excel_error: name#',
+                    '#NULL!':  '#excel_error: null#',
+                    '#NUM!':   '#excel_error: num#',
+                    '#REF!':   '#excel_error: ref#',
+                    '#VALUE!': '#excel_error: value#'}
+
+    # region {closure functions}
+    def column_index(c, default):
+        if c is None:
+            return default
+
+        c = ws_h.get(c, c)
+        if isinstance(c, int):
+            return c
+
+        return column_index_from_string(c)
+
+    def row_names(r):
+        if not r or r > len(m):
+            return {}
+
+        return {v: ci for ci, v in enumerate(m[r - 1], 1)
+                      if v is not None}
+    # endregion
+
+    wb_f = load_workbook(path, read_only=True, data_only=True)
+
+    try:
+        ws_names = {n.lower(): n for n in wb_f.sheetnames}
+        ws_f     = wb_f[ws_names[ws_name.lower()]]
+        m        = [list(row) for row in ws_f.iter_rows(min_row=1, min_col=1, values_only=True)]
+    finally:
+        wb_f.close()
+
+    num_cols = max((len(row) for row in m), default=0)
+    for row in m:
+        row.extend([None] * (num_cols - len(row)))
+
+    used_columns = [ci for ci in range(num_cols)
+                       if any(row[ci] is not None for row in m)]
+    if not used_columns:
+        return [[]]
+
+    ws_h = {}
+    ws_h.update(row_names(h_r))
+    ws_h.update(row_names(m_r))
+
+    c_1 = column_index(c_1, used_columns[0] + 1) - 1
+    c_2 = column_index(c_2, used_columns[-1] + 1)
+
+    # values start at the header row; without a header row, at the row after the meta row
+    if h_r:   r_1 = h_r - 1
+    elif m_r: r_1 = m_r
+    else:     r_1 = 0
+
+    m = [row[c_1:c_2] for row in m[r_1:]]
+    while len(m) > 1 and all(v is None for v in m[-1]):
+        m.pop()
+
+    for row in m:
+        for i, v in enumerate(row):
+            if type(v) is str and v in excel_errors:
+                row[i] = excel_errors[v]
+
+    return m
 
 
 def write_to_worksheet(ws, m, *,